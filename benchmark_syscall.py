@@ -0,0 +1,404 @@
+"""
+<Started>
+  October 2026
+
+<Purpose>
+  Measure the latency of system calls executed through execute_syscall.
+
+  Each selected syscall is compiled into a CallPlan, executed a number of
+  times to warm up and then executed and timed repeatedly with
+  time.perf_counter_ns. The time it takes to dispatch a call through ctypes,
+  measured by timing a libc function that does not enter the kernel, is
+  subtracted from every sample.
+
+  Syscalls can be executed through their libc wrappers, through libc's
+  syscall(2) function using their numbers (raw), or both to compare the two
+  side by side.
+
+  For every syscall min/p50/p90/p99/max latencies and the throughput are
+  reported as a table and optionally as JSON. With --counters each syscall is
+  also executed repeat times between two reads of perf_event_open counters
+  (see sysDef/PerfCounters.py), after the timed executions so that reading
+  the counters does not affect the latencies, and the counters per call are
+  reported next to them.
+
+  File descriptors created by syscalls such as open or pipe are closed after
+  each call, outside the timed region (see execute_syscall.close_new_fds), so
+  that later samples do not measure EMFILE. The errno of every timed call is
+  compared with that of the first one, and syscalls whose errno changed
+  during the run are flagged in the report, since their samples time
+  different paths through the kernel.
+
+  Example running this program:
+
+    python benchmark_syscall.py syscall_definitions.sdb getpid open --repeat 10000
+    python benchmark_syscall.py syscall_definitions.sdb getpid open --compare
+    python benchmark_syscall.py syscall_definitions.sdb getpid open --counters
+
+"""
+
+import argparse
+import ctypes
+import json
+import sys
+import time
+
+import execute_syscall
+from sysDef.PerfCounters import PerfCounters
+from sysDef.SyscallManual import SyscallManual
+
+
+DEFAULT_REPEAT = 1000
+DEFAULT_WARMUP = 100
+
+# ways of executing a syscall and the functions compiling them.
+VARIANTS = {
+    "libc": execute_syscall.compile_call_plan,
+    "raw": execute_syscall.compile_raw_call_plan,
+}
+
+# percentiles reported in addition to min and max.
+PERCENTILES = (50, 90, 99)
+
+# in addition to the syscalls never executed by execute_syscall, do not execute
+# fork repeatedly since each child continues the benchmark loop, nor syscalls
+# that block until a signal arrives.
+SKIP_SYSCALLS = execute_syscall.SKIP_SYSCALLS + execute_syscall.BLOCKING_SYSCALLS + ["fork"]
+
+
+def time_call_plan(call_plan, repeat, warmup):
+    """
+    <Purpose>
+      Executes a call plan warmup times and then times repeat executions of it.
+
+    <Arguments>
+      call_plan:
+        The CallPlan to execute.
+
+      repeat:
+        The number of timed executions.
+
+      warmup:
+        The number of untimed executions before the timed ones.
+
+    <Exceptions>
+      None
+
+    <Side Effects>
+      The call plan is executed repeat + warmup times.
+
+    <Returns>
+      A tuple (samples, errno, errno_changes) where samples is a list of
+      repeat latencies in nanoseconds, errno the errno of the first timed
+      execution and errno_changes the number of timed executions that ended
+      with a different errno.
+    """
+
+    perf_counter_ns = time.perf_counter_ns
+    set_errno = ctypes.set_errno
+    get_errno = ctypes.get_errno
+    close_fds = execute_syscall.creates_fds(call_plan.name)
+    close_new_fds = execute_syscall.close_new_fds
+
+    for _ in range(warmup):
+        return_value = call_plan()
+        if close_fds:
+            close_new_fds(call_plan, return_value)
+
+    first_errno = None
+    errno_changes = 0
+
+    samples = [0] * repeat
+    for index in range(repeat):
+        set_errno(0)
+        start = perf_counter_ns()
+        return_value = call_plan()
+        samples[index] = perf_counter_ns() - start
+        errno = get_errno()
+
+        if close_fds:
+            close_new_fds(call_plan, return_value)
+
+        if first_errno is None:
+            first_errno = errno
+        elif errno != first_errno:
+            errno_changes += 1
+
+    return samples, first_errno, errno_changes
+
+
+def measure_dispatch_overhead(repeat, warmup):
+    """
+    Returns the median time in nanoseconds of calling a libc function that does
+    not enter the kernel (abs) through a CallPlan. This is the part of every
+    sample spent in Python, ctypes and the timer itself.
+    """
+
+    empty_plan = execute_syscall.CallPlan("abs", execute_syscall.LIBC["abs"],
+                                          [ctypes.c_int], ctypes.c_int,
+                                          [ctypes.c_int(0)])
+
+    samples = sorted(time_call_plan(empty_plan, repeat, warmup)[0])
+    return percentile(samples, 50)
+
+
+def percentile(sorted_samples, p):
+    """
+    Returns the p-th percentile of a sorted list of samples using the
+    nearest-rank method.
+    """
+
+    rank = int(round(p / 100.0 * len(sorted_samples)))
+    return sorted_samples[min(max(rank, 1), len(sorted_samples)) - 1]
+
+
+def summarize(name, variant, samples, overhead, errno=0, errno_changes=0):
+    """
+    <Purpose>
+      Summarizes the latency samples of a syscall.
+
+    <Arguments>
+      name:
+        The name of the syscall.
+
+      variant:
+        How the syscall was executed, one of VARIANTS.
+
+      samples:
+        A list of latencies in nanoseconds, as returned by time_call_plan.
+
+      overhead:
+        The dispatch overhead in nanoseconds to subtract from every sample.
+
+      errno, errno_changes:
+        The errno of the first sample and the number of samples with another
+        errno, as returned by time_call_plan.
+
+    <Exceptions>
+      None
+
+    <Side Effects>
+      None
+
+    <Returns>
+      A dictionary with the number of calls, the min, percentile, max and mean
+      latencies in nanoseconds and the throughput in calls per second. The
+      throughput is based on the samples before subtracting the overhead, i.e.
+      it is the rate at which this tool can execute the syscall.
+    """
+
+    total = sum(samples)
+    corrected = sorted(max(sample - overhead, 0) for sample in samples)
+
+    summary = {
+        "name": name,
+        "via": variant,
+        "calls": len(samples),
+        "min_ns": corrected[0],
+    }
+
+    for p in PERCENTILES:
+        summary["p%d_ns" % p] = percentile(corrected, p)
+
+    summary["max_ns"] = corrected[-1]
+    summary["mean_ns"] = sum(corrected) / float(len(corrected))
+    summary["calls_per_sec"] = len(samples) * 1e9 / total if total else 0.0
+    summary["errno"] = errno
+    summary["errno_changes"] = errno_changes
+
+    return summary
+
+
+def benchmark(syscall_definitions, repeat=DEFAULT_REPEAT, warmup=DEFAULT_WARMUP,
+              variants=("libc",), counters=None):
+    """
+    <Purpose>
+      Benchmarks each of the given syscalls that can be executed.
+
+    <Arguments>
+      syscall_definitions:
+        A list of SyscallManual objects.
+
+      repeat:
+        The number of timed executions of each syscall.
+
+      warmup:
+        The number of untimed executions of each syscall before the timed ones.
+
+      variants:
+        The ways in which to execute each syscall, from VARIANTS. Each variant
+        the syscall can be executed in gets its own result.
+
+      counters:
+        PerfCounters to count repeat more executions of each syscall with, or
+        None. The counters per call are added to the summaries.
+
+    <Exceptions>
+      None
+
+    <Side Effects>
+      The syscalls are executed.
+
+    <Returns>
+      A tuple (overhead, results) where overhead is the dispatch overhead in
+      nanoseconds and results a list of summaries as returned by summarize.
+    """
+
+    overhead = measure_dispatch_overhead(max(repeat, DEFAULT_REPEAT), warmup)
+
+    results = []
+    for sd in syscall_definitions:
+        if sd.type != SyscallManual.FOUND or sd.name in SKIP_SYSCALLS:
+            continue
+
+        for variant in variants:
+            call_plan = VARIANTS[variant](sd)
+            if call_plan is None:
+                continue
+
+            samples, errno, errno_changes = time_call_plan(call_plan, repeat, warmup)
+            summary = summarize(sd.name, variant, samples, overhead, errno, errno_changes)
+
+            if counters is not None:
+                count_call_plan(counters, call_plan, repeat, (sd.name, variant))
+                summary.update(counters.per_call((sd.name, variant)))
+
+            results.append(summary)
+
+    return overhead, results
+
+
+def count_call_plan(counters, call_plan, repeat, key):
+    """
+    Counts repeat executions of a CallPlan with PerfCounters. Syscalls that
+    create file descriptors are counted one call at a time, so that closing
+    the file descriptors is not counted; their counters then include one read
+    of the counters per call.
+    """
+
+    if not execute_syscall.creates_fds(call_plan.name):
+        counters.call(call_plan, repeat, key)
+        return
+
+    for _ in range(repeat):
+        before = counters.read()
+        return_value = call_plan()
+        counters.add(key, before, counters.read())
+        execute_syscall.close_new_fds(call_plan, return_value)
+
+
+
+def format_table(overhead, results, counters=None):
+    """
+    Returns the benchmark results formatted as a text table, with the counters
+    per call if the PerfCounters they were counted with are given.
+    """
+
+    columns = ["min_ns"] + ["p%d_ns" % p for p in PERCENTILES] + ["max_ns"]
+    headers = ["syscall", "via"] + [c[:-3] + "(ns)" for c in columns] + ["calls/s"]
+
+    events = []
+    if counters is not None:
+        events = counters.events
+        headers += events
+
+    rows = []
+    for result in results:
+        rows.append([result["name"], result["via"]] +
+                    ["%d" % result[c] for c in columns] +
+                    ["%.0f" % result["calls_per_sec"]] +
+                    ["%.2f" % result[e] for e in events])
+
+    widths = [len(header) for header in headers]
+    for row in rows:
+        widths = [max(width, len(cell)) for width, cell in zip(widths, row)]
+
+    lines = ["dispatch overhead subtracted: %d ns" % overhead]
+    if counters is not None:
+        for name, reason in sorted(counters.unavailable.items()):
+            lines.append("%s: not available (%s)" % (name, reason))
+        if counters.exclude_kernel:
+            lines.append("kernel mode not counted (perf_event_paranoid)")
+    lines.append("  ".join(h.ljust(w) if i < 2 else h.rjust(w)
+                           for i, (h, w) in enumerate(zip(headers, widths))))
+    for row in rows:
+        lines.append("  ".join(c.ljust(w) if i < 2 else c.rjust(w)
+                               for i, (c, w) in enumerate(zip(row, widths))))
+
+    for result in results:
+        if result["errno_changes"]:
+            lines.append("%s (%s): errno changed from %d in %d of %d samples" %
+                         (result["name"], result["via"], result["errno"],
+                          result["errno_changes"], result["calls"]))
+
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure syscall latencies.")
+    parser.add_argument("database",
+                        help="definition database or pickle file to read syscall definitions from")
+    parser.add_argument("syscalls", nargs="*",
+                        help="names of the syscalls to benchmark (default: all)")
+    parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT,
+                        help="timed executions per syscall")
+    parser.add_argument("--warmup", type=int, default=DEFAULT_WARMUP,
+                        help="untimed executions per syscall before timing")
+    parser.add_argument("--raw", action="store_true",
+                        help="execute syscalls through syscall(2) instead of their libc wrappers")
+    parser.add_argument("--compare", action="store_true",
+                        help="execute syscalls both ways and report them side by side")
+    parser.add_argument("--counters", action="store_true",
+                        help="also report perf_event_open counters (task-clock, context "
+                             "switches, page faults, cycles, instructions) per call")
+    parser.add_argument("--json", metavar="FILE",
+                        help="also write the results as JSON to FILE ('-' for stdout)")
+    args = parser.parse_intermixed_args()
+
+    if args.repeat < 1:
+        parser.error("--repeat must be at least 1")
+
+    execute_syscall.init()
+
+    syscall_definitions = execute_syscall.load_syscall_definitions(
+        args.database, args.syscalls or None)
+
+    if args.compare:
+        variants = ("libc", "raw")
+    elif args.raw:
+        variants = ("raw",)
+    else:
+        variants = ("libc",)
+
+    counters = None
+    if args.counters:
+        counters = PerfCounters()
+
+    try:
+        overhead, results = benchmark(syscall_definitions, args.repeat, args.warmup,
+                                      variants, counters)
+    finally:
+        if counters is not None:
+            counters.close()
+
+    print(format_table(overhead, results, counters))
+
+    if args.json:
+        report = {
+            "repeat": args.repeat,
+            "warmup": args.warmup,
+            "variants": list(variants),
+            "dispatch_overhead_ns": overhead,
+            "counters": counters.events if counters is not None else [],
+            "results": results,
+        }
+
+        if args.json == "-":
+            json.dump(report, sys.stdout, indent=2)
+            print("")
+        else:
+            with open(args.json, "w") as json_file:
+                json.dump(report, json_file, indent=2)
+
+if __name__ == "__main__":
+    main()
@@ -1,11 +1,17 @@
-import ctypes.util
+import ctypes
 import os
-import pickle
-import sys
-import signal
+import time
 
+from sysDef import StructLayouts
+from sysDef import TypeMap
+from sysDef.BufferPool import BufferPool
+from sysDef.DefinitionDatabase import DefinitionDatabase
 from sysDef.SyscallManual import SyscallManual
 
+# modules only needed by some runs (legacy pickle files, raw syscalls, call
+# logs, recordings, perf counters, the command line) are imported where they
+# are used, to keep the startup time of short runs low.
+
 # controls printing
 DEGUG = False
 
@@ -13,25 +19,158 @@ DEGUG = False
 # syscall in a trace and can be used to track executed syscalls in large traces
 TRACE_PRINT = False
 
+# executes close() on an invalid, negative file descriptor that encodes the
+# index of the syscall about to be executed. This is much cheaper than
+# TRACE_PRINT and is used by trace_syscall to match traced syscalls to their
+# definitions. The file descriptor is -(TRACE_SENTINEL_BASE + index).
+TRACE_SENTINEL = False
+TRACE_SENTINEL_BASE = 1000000
+
+# execute syscalls through libc's syscall(2) function using their numbers
+# instead of calling their libc wrappers. This measures the kernel entry
+# directly and can execute syscalls libc does not wrap.
+RAW_SYSCALL = False
+
 FILEPATH = "TEST_FILE.txt"
 
-LIBC_NAME = ctypes.util.find_library('c')
-LIBC = ctypes.CDLL(LIBC_NAME)
+# records the return value, errno and timing of every executed syscall and
+# writes them to this file, as CSV if it ends in .csv and in the binary
+# columnar format of sysDef/CallLog.py otherwise. None disables recording.
+CAPTURE_FILE = None
+
+# records every executed syscall with its argument values, return value and
+# timing to this file, so that the same sequence can be replayed with
+# replay_syscall.py. See sysDef/CallRecording.py. None disables recording.
+RECORD_FILE = None
+
+# counts the task-clock, context switches, page faults and, where the hardware
+# allows it, cycles and instructions of every executed syscall with
+# perf_event_open counters and prints them per syscall. See
+# sysDef/PerfCounters.py.
+PERF_COUNTERS = False
+
+# seconds a syscall may block before the watchdog interrupts it, or None to
+# execute syscalls without a deadline. See Watchdog.
+SYSCALL_TIMEOUT = 1.0
+
+# syscalls that block until a signal arrives. They are only executed with a
+# watchdog, which delivers that signal.
+BLOCKING_SYSCALLS = ["pause", "sigsuspend"]
+
+# do not execute exit and exit_group because they terminate the program.
+# do not execute vfork because the parent blocks, ultimately causing segfault
+# do not execute settimeofday and clock_settime because with zeroed structures
+# they set the system clock to 1970.
+# do not execute setrlimit and prlimit because with zeroed structures they
+# lower the CPU time limit to 0, getting the program killed.
+# do not execute seccomp because operation 0 puts the program in strict mode,
+# where any further syscall kills it.
+# do not execute ptrace because request 0 (PTRACE_TRACEME) makes the parent
+# trace the program, which then stops on every signal.
+# do not execute readdir because libc's readdir is not the syscall. It takes a
+# DIR * and segfaults when given a file descriptor.
+# do not execute clone and clone3 because through syscall(2) zeroed arguments
+# make clone behave like fork, without a new stack for the child.
+# do not execute rt_sigreturn and sigreturn because they restore registers from
+# whatever is on the stack, which crashes the program.
+SKIP_SYSCALLS = ["exit", "exit_group", "vfork", "settimeofday",
+                 "clock_settime", "setrlimit", "prlimit", "prlimit64", "seccomp",
+                 "ptrace", "readdir", "clone", "clone3", "rt_sigreturn",
+                 "sigreturn"]
+
+# syscalls that are only skipped when executed through syscall(2).
+# do not execute fork because, unlike libc's fork, the raw syscall does not run
+# the fork handlers of libc, so both processes continue the run with libc state
+# meant for the parent.
+RAW_SKIP_SYSCALLS = ["fork"]
+
+# syscalls returning a new file descriptor. Tools executing syscalls
+# repeatedly close it after each call with close_new_fds, so that they do not
+# run out of file descriptors and go on measuring EMFILE.
+FD_SYSCALLS = frozenset(["open", "openat", "creat", "dup", "accept", "accept4",
+                         "socket", "epoll_create", "epoll_create1", "eventfd",
+                         "eventfd2", "inotify_init", "inotify_init1", "signalfd",
+                         "signalfd4", "timerfd_create", "memfd_create",
+                         "fanotify_init", "userfaultfd", "perf_event_open",
+                         "mq_open", "open_by_handle_at"])
+
+# syscalls writing two new file descriptors to their int[2] argument.
+FD_PAIR_SYSCALLS = frozenset(["pipe", "pipe2", "socketpair"])
+
+# libc is loaded by its usual soname first because ctypes.util.find_library
+# runs ldconfig or a compiler, which takes longer than everything else at
+# startup. errno is saved after each call so that it can be read with
+# ctypes.get_errno.
+LIBC_NAME = "libc.so.6"
+try:
+    LIBC = ctypes.CDLL(LIBC_NAME, use_errno=True)
+except OSError:
+    import ctypes.util
+    LIBC_NAME = ctypes.util.find_library('c')
+    LIBC = ctypes.CDLL(LIBC_NAME, use_errno=True)
+
+# syscall numbers of the running architecture, loaded on first use.
+_syscall_table = None
+
+# additional type map files, read after sysDef/type_map.txt. See
+# sysDef/TypeMap.py for their format.
+TYPE_MAP_FILES = []
+
+# buffers of pointer arguments, created on first use.
+_buffer_pool = None
+
+# the TypeMap of parameters, built on first use.
+_type_map = None
+
+_sentinel_close = LIBC["close"]
+_sentinel_close.argtypes = [ctypes.c_int]
+
+
+# kept here for code that used execute_syscall.sockaddr before structure
+# layouts moved to sysDef.StructLayouts.
+sockaddr = StructLayouts.sockaddr
+
+
+
+def get_buffer_pool():
+    """
+    Returns the BufferPool that structure and void * arguments are taken from,
+    creating it on first use.
+    """
+
+    global _buffer_pool
 
+    if _buffer_pool is None:
+        _buffer_pool = BufferPool()
 
-class sockaddr(ctypes.Structure):
+    return _buffer_pool
+
+
+
+def get_type_map():
     """
-    struct sockaddr {
-        unsigned short    sa_family;    // address family, AF_xxx
-        char              sa_data[14];  // 14 bytes of protocol address
-    };
+    Returns the TypeMap mapping parameters to ctypes types, building it from
+    sysDef/type_map.txt and TYPE_MAP_FILES on first use.
     """
-    _fields_ = (('family', ctypes.c_ushort), ('data', ctypes.c_byte * 14))
+
+    global _type_map
+
+    if _type_map is None:
+        _type_map = TypeMap.TypeMap(TYPE_MAP_FILES)
+
+    return _type_map
 
 
 
-def get_parameter_arginfo(parameter):
+def get_parameter_arginfo(parameter, slot=0, buffer_pool=None):
     """
+    Returns the ctypes type and the value of the argument of a parameter, as
+    found in the TypeMap. Numbers are 0, paths are FILEPATH, the ... of
+    variadic functions is NULL and pointers point to a zeroed buffer from
+    buffer_pool (defaults to the shared BufferPool); slot selects which
+    buffer when a syscall has several parameters of the same type. Returns
+    None, None if the parameter is not supported.
+
     http://docs.python.org/3.4/library/ctypes.html
       ctypes type     C type                                  Python type
       -------------------------------------------------------------------
@@ -67,61 +206,73 @@ def get_parameter_arginfo(parameter):
       c_void_p        void *                                  int or None
     """
 
-    argtype = None
-    argvalue = None
+    entry = get_type_map().lookup(parameter)
+    if entry is None:
+        return None, None
 
-    if(parameter.ellipsis):
-        argtype = "ellipsis"
+    if buffer_pool is None:
+        buffer_pool = get_buffer_pool()
 
-    if(parameter.type == "char"):
-        if(parameter.pointer):
-            # char *
-            argtype = ctypes.c_char_p
-            argvalue = ctypes.c_char_p(str.encode(FILEPATH))
+    kind, argtype, element_type = entry
 
-        elif(parameter.unsigned):
-            argtype = ctypes.c_ubyte
+    if(kind == TypeMap.VALUE):
+        argvalue = argtype(0)
 
-        elif(parameter.array):
-            argtype = ctypes.c_char_p
-            argvalue = None
+    elif(kind == TypeMap.STRING):
+        argvalue = ctypes.c_char_p(str.encode(FILEPATH))
 
+    elif(kind == TypeMap.POINTER):
+        if parameter.array_length:
+            # arrays of a fixed size, e.g. int pipefd[2], get a buffer of as
+            # many elements.
+            argvalue = buffer_pool.buffer(element_type * parameter.array_length, slot)
         else:
-            argtype = ctypes.c_char
+            argvalue = ctypes.byref(buffer_pool.buffer(element_type, slot))
 
+    elif(kind == TypeMap.SCRATCH):
+        # cast keeps a reference to the buffer, and so to its mapping, for as
+        # long as the argument lives, whether or not the pool does.
+        argvalue = ctypes.cast(buffer_pool.scratch(slot), ctypes.c_void_p)
 
-    elif(parameter.type and (parameter.type == "int" or parameter.type.endswith("_t"))):
-        if(parameter.unsigned):
-            argtype = ctypes.c_uint
-            argvalue = ctypes.c_uint(0)
+    elif(kind == TypeMap.STRUCT):
+        argvalue = buffer_pool.acquire(parameter.type, slot)
 
+    elif(kind == TypeMap.STRUCT_POINTER):
+        if parameter.array_length:
+            # e.g. const struct timeval times[2]
+            argvalue = buffer_pool.buffer(element_type * parameter.array_length, slot)
         else:
-            argtype = ctypes.c_int
-            argvalue = ctypes.c_int(0)
-
-    elif(parameter.type == "sockaddr"):
-        # sockddr should be a structure
-        assert(parameter.struct)
+            argvalue = ctypes.byref(buffer_pool.acquire(parameter.type, slot))
 
-        argtype = sockaddr
+    elif(kind == TypeMap.ELLIPSIS):
+        # the variadic arguments get a single NULL pointer rather than
+        # whatever the registers hold, which the syscall may write through,
+        # e.g. ioctl(fd, FIBMAP, ...).
+        argtype = ctypes.c_void_p
+        argvalue = None
 
-        t = ctypes.c_byte * 14
-        argvalue = sockaddr(0, t())
+    else:
+        # NULL
+        argvalue = None
 
     return argtype, argvalue
 
 
-def get_syscall_arginfo(syscall_definition):
+def get_syscall_arginfo(syscall_definition, buffer_pool=None):
     syscall_argtypes = []
     syscall_argvalues = []
 
     parameters = syscall_definition.definition.parameters
 
+    # number of parameters of each type seen so far, so that parameters of the
+    # same type get different buffers.
+    slots = {}
+
     for parameter in parameters:
-        argtype, argvalue = get_parameter_arginfo(parameter)
+        slot = slots.get(parameter.type, 0)
+        slots[parameter.type] = slot + 1
 
-        if (argtype == "ellipsis"):
-            continue
+        argtype, argvalue = get_parameter_arginfo(parameter, slot, buffer_pool)
 
         if argtype == None:
             return None, None
@@ -135,49 +286,455 @@ def get_syscall_arginfo(syscall_definition):
 
 
 
-def execute_syscall(syscall_definition):
+def get_return_type(ret_type):
+    """
+    Returns the ctypes type matching the return type of a definition. ctypes
+    assumes int unless told otherwise, which truncates pointers and longs.
+    """
+
+    return get_type_map().return_type(ret_type)
+
+
+
+class CallPlan(object):
+    """
+    <Purpose>
+      A syscall function that has been resolved once, together with its
+      argument types, return type and argument values, and is ready to be
+      called any number of times.
+
+      Each CallPlan owns its own function pointer, so setting the argtypes of
+      one plan never affects another plan of the same syscall. Call plans are
+      immutable.
+
+    <Attributes>
+      self.name:
+        The name of the system call.
+
+      self.argtypes:
+        A tuple of the ctypes types of the arguments.
+
+      self.restype:
+        The ctypes type of the return value.
+
+      self.argvalues:
+        A tuple of the argument values the syscall function is called with.
 
     """
-    # *** remember that the system call name (syscall_definition.name) and the
-    # definition name (syscall_definition.definition.name) are not always the
-    # same.
+
+    __slots__ = ("name", "argtypes", "restype", "argvalues", "_func")
+
+    def __init__(self, name, func, argtypes, restype, argvalues):
+        func.argtypes = argtypes
+        func.restype = restype
+
+        object.__setattr__(self, "name", name)
+        object.__setattr__(self, "argtypes", tuple(argtypes))
+        object.__setattr__(self, "restype", restype)
+        object.__setattr__(self, "argvalues", tuple(argvalues))
+        object.__setattr__(self, "_func", func)
+
+    def __setattr__(self, name, value):
+        raise AttributeError("CallPlan objects are immutable")
+
+    @property
+    def symbol(self):
+        """
+        The name of the libc function the plan calls, e.g. "syscall" for raw
+        plans.
+        """
+
+        return self._func.__name__
+
+    def __call__(self):
+        return self._func(*self.argvalues)
+
+    def with_argvalues(self, argvalues):
+        """
+        Returns a CallPlan of the same syscall function called with different
+        values for its last len(argvalues) arguments. Leading arguments, e.g.
+        the syscall number of a raw plan, are kept.
+        """
+
+        kept = self.argvalues[:len(self.argvalues) - len(argvalues)]
+        return CallPlan(self.name, self._func, self.argtypes, self.restype,
+                        kept + tuple(argvalues))
+
+    def __repr__(self):
+        return "CallPlan(" + self.name + ")"
+
+
+
+def compile_call_plan(syscall_definition, buffer_pool=None):
     """
+    <Purpose>
+      Resolves everything required to execute a syscall into a CallPlan.
 
-    if DEGUG:
-        print "Trying:" + str(syscall_definition)
+      *** remember that the system call name (syscall_definition.name) and the
+      definition name (syscall_definition.definition.name) are not always the
+      same.
+
+    <Arguments>
+      syscall_definition:
+        A SyscallManual object of type FOUND.
 
-    # get the syscall function to execute.
-    syscall_func = getattr(LIBC, syscall_definition.name, None)
+      buffer_pool:
+        The BufferPool the buffers of pointer arguments are taken from.
+        Defaults to the shared pool of get_buffer_pool().
 
-    if(syscall_func == None):
+    <Exceptions>
+      None
+
+    <Side Effects>
+      None
+
+    <Returns>
+      A CallPlan, or None if the syscall is not in LIBC or some of its
+      parameters are not supported.
+    """
+
+    if DEGUG:
+        print("Trying:" + str(syscall_definition))
+
+    # get a function pointer for the syscall function. Indexing the library
+    # creates a new function pointer each time, unlike getattr which returns
+    # a shared one.
+    try:
+        syscall_func = LIBC[syscall_definition.name]
+    except AttributeError:
         if DEGUG:
-            print "Syscall not found in LIBC:" + str(syscall_definition.name)
-            print
-        return
+            print("Syscall not found in LIBC:" + str(syscall_definition.name))
+            print("")
+        return None
 
     # get the required argument types and argument values for this syscall
     # function.
-    syscall_argtypes, syscall_argvalues = get_syscall_arginfo(syscall_definition)
+    syscall_argtypes, syscall_argvalues = get_syscall_arginfo(syscall_definition, buffer_pool)
 
     if syscall_argtypes == None:
         if DEGUG:
-            print "Not Supported:" + str(syscall_definition.name)
-            print
-        return
+            print("Not Supported:" + str(syscall_definition.name))
+            print("")
+        return None
+
+    restype = get_return_type(syscall_definition.definition.ret_type)
+
+    return CallPlan(syscall_definition.name, syscall_func, syscall_argtypes,
+                    restype, syscall_argvalues)
+
+
+
+def get_syscall_table():
+    """
+    Returns the SyscallTable of the running architecture, loading it on first
+    use.
+    """
+
+    global _syscall_table
+
+    if _syscall_table is None:
+        from sysDef.SyscallTable import SyscallTable
+        _syscall_table = SyscallTable.load()
+
+    return _syscall_table
+
+
+
+def compile_raw_call_plan(syscall_definition, buffer_pool=None):
+    """
+    <Purpose>
+      Resolves everything required to execute a syscall through libc's
+      syscall(2) function into a CallPlan. The syscall number is the first
+      argument, followed by the arguments derived from the definition.
+
+    <Arguments>
+      syscall_definition:
+        A SyscallManual object of type FOUND.
+
+      buffer_pool:
+        The BufferPool the buffers of pointer arguments are taken from.
+        Defaults to the shared pool of get_buffer_pool().
+
+    <Exceptions>
+      An Exception is raised if no syscall table is available for the running
+      architecture.
+
+    <Side Effects>
+      None
+
+    <Returns>
+      A CallPlan, or None if the syscall does not exist on the running
+      architecture or some of its parameters are not supported.
+    """
 
     if DEGUG:
-        print "Executing syscall funtion:" + str(syscall_definition.name)
-        print
+        print("Trying raw:" + str(syscall_definition))
+
+    syscall_number = get_syscall_table().number(syscall_definition.name)
+
+    if syscall_number == None:
+        if DEGUG:
+            print("Syscall number not found:" + str(syscall_definition.name))
+            print("")
+        return None
+
+    syscall_argtypes, syscall_argvalues = get_syscall_arginfo(syscall_definition, buffer_pool)
+
+    if syscall_argtypes == None:
+        if DEGUG:
+            print("Not Supported:" + str(syscall_definition.name))
+            print("")
+        return None
+
+    # syscall(2) returns a long, whatever the return type of the syscall.
+    return CallPlan(syscall_definition.name, LIBC["syscall"],
+                    [ctypes.c_long] + syscall_argtypes, ctypes.c_long,
+                    [ctypes.c_long(syscall_number)] + syscall_argvalues)
+
+
+
+class Watchdog(object):
+    """
+    <Purpose>
+      Puts a deadline on the syscalls it executes.
+
+      Before each syscall an ITIMER_REAL interval timer is armed to deliver
+      SIGALRM when the deadline passes and then repeatedly every
+      WATCHDOG_INTERVAL seconds, in case the first signal arrived before the
+      syscall started blocking. The SIGALRM handler is installed without
+      SA_RESTART, so a blocking syscall is interrupted and returns EINTR.
+
+      Syscalls that do not return on a signal are not bounded by the watchdog.
+      Use sweep_syscall, which kills worker processes, to bound those.
+
+      Use a Watchdog as a context manager, which installs the SIGALRM handler
+      and restores the previous one on exit. signal is imported there rather
+      than with this module, since it pulls in enum and slows down the start
+      up of runs that never use a watchdog.
+
+    <Attributes>
+      self.timeout:
+        The number of seconds a syscall may take, or None for no limit.
+
+      self.timeouts:
+        A list of (syscall name, elapsed seconds) tuples, one per syscall that
+        was interrupted.
+
+    """
+
+    WATCHDOG_INTERVAL = 0.1
+
+    def __init__(self, timeout):
+        self.timeout = timeout
+        self.timeouts = []
+        self._fired = False
+        self._previous_handler = None
+
+    def __enter__(self):
+        import signal
+
+        self._previous_handler = signal.signal(signal.SIGALRM, self._handle_alarm)
+        signal.siginterrupt(signal.SIGALRM, True)
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        import signal
+
+        signal.setitimer(signal.ITIMER_REAL, 0)
+        signal.signal(signal.SIGALRM, self._previous_handler)
+
+    def _handle_alarm(self, signum, frame):
+        self._fired = True
 
+    def call(self, call_plan, call_log=None, argument_set=0):
+        """
+        Executes a CallPlan with a deadline, recording it in call_log as
+        argument set argument_set if a CallLog is given. Returns its return
+        value, which is that of the interrupted syscall if the deadline passed.
+        If it did the syscall is added to self.timeouts.
+        """
+
+        if self.timeout is None:
+            return _call(call_plan, call_log, argument_set)
+
+        import signal
+
+        self._fired = False
+        start = time.perf_counter()
+        signal.setitimer(signal.ITIMER_REAL, self.timeout, self.WATCHDOG_INTERVAL)
+
+        try:
+            return _call(call_plan, call_log, argument_set)
+        finally:
+            signal.setitimer(signal.ITIMER_REAL, 0)
+            elapsed = time.perf_counter() - start
+
+            if self._fired:
+                self.timeouts.append((call_plan.name, elapsed))
+
+
+
+def _call(call_plan, call_log, argument_set):
+    if call_log is None:
+        return call_plan()
+
+    return call_log.call(call_plan, argument_set)
+
+
+
+def execute_syscall(syscall_definition, raw=None, watchdog=None, call_log=None,
+                    counters=None):
+    """
+    Compiles and executes a syscall once, through its libc wrapper or through
+    syscall(2) if raw is True (defaults to RAW_SYSCALL), with the deadline of
+    watchdog if one is given. If a CallLog is given the call is recorded in
+    it and if PerfCounters are given the call is counted in their totals. Use
+    compile_call_plan or compile_raw_call_plan directly to execute the same
+    syscall repeatedly.
+
+    Returns the return value of the syscall, or None if it was not executed.
+    """
+
+    call_plan = _compile(syscall_definition, raw)
+
+    if call_plan == None:
+        return None
+
+    return _execute_call_plan(call_plan, watchdog, call_log, counters)
+
+
+
+def _compile(syscall_definition, raw):
+    if raw is None:
+        raw = RAW_SYSCALL
+
+    if raw:
+        return compile_raw_call_plan(syscall_definition)
+
+    return compile_call_plan(syscall_definition)
+
+
+
+def _execute_call_plan(call_plan, watchdog, call_log, counters):
+    if DEGUG:
+        print("Executing syscall funtion:" + str(call_plan.name))
+        print("")
 
     if TRACE_PRINT:
-        print "Executing:" + str(syscall_definition.name)
+        print("Executing:" + str(call_plan.name))
+
+    if counters is not None:
+        before = counters.read()
+
+    if watchdog is not None:
+        return_value = watchdog.call(call_plan, call_log)
+    else:
+        return_value = _call(call_plan, call_log, 0)
+
+    if counters is not None:
+        counters.add(call_plan.name, before, counters.read())
+
+    return return_value
+
+
+
+def creates_fds(name):
+    """
+    Returns True if the syscall with the given name creates file descriptors
+    that close_new_fds closes.
+    """
+
+    return name in FD_SYSCALLS or name in FD_PAIR_SYSCALLS
 
-    # set the required argument types for the syscall function.
-    syscall_func.argtypes = syscall_argtypes
 
-    # call the syscall function with the derived arguments values unpacked
-    exec("syscall_func(*syscall_argvalues)")
+
+def close_new_fds(call_plan, return_value):
+    """
+    Closes the file descriptors created by a call of a CallPlan of one of
+    FD_SYSCALLS or FD_PAIR_SYSCALLS that returned return_value. Calls that
+    failed created none.
+    """
+
+    if return_value is None or return_value < 0:
+        return
+
+    if call_plan.name in FD_SYSCALLS:
+        _close_fd(return_value)
+
+    elif call_plan.name in FD_PAIR_SYSCALLS and return_value == 0:
+        for argvalue in call_plan.argvalues:
+            if isinstance(argvalue, ctypes.Array):
+                for fd in argvalue:
+                    _close_fd(fd)
+                break
+
+
+
+def _close_fd(fd):
+    try:
+        os.close(fd)
+    except OSError:
+        pass
+
+
+
+def emit_trace_sentinel(index):
+    """
+    Marks the start of the syscall with the given index in a trace by executing
+    a close() that fails with EBADF. See TRACE_SENTINEL.
+    """
+
+    _sentinel_close(-(TRACE_SENTINEL_BASE + index))
+
+
+
+def execute_syscalls(syscall_definitions, timeout=None, call_log=None, counters=None,
+                     raw=None):
+    """
+    Executes each of the given syscalls that has a definition and is not
+    skipped, once, in order, through syscall(2) if raw is True (defaults to
+    RAW_SYSCALL). If TRACE_SENTINEL is set each syscall is preceded by a
+    sentinel carrying its index in syscall_definitions. If a CallLog (or a
+    CallRecorder) is given each call is recorded in it and if PerfCounters are
+    given each call is counted.
+
+    Each syscall may take timeout seconds (defaults to SYSCALL_TIMEOUT) before
+    it is interrupted and the next one is executed. A timeout of 0 means no
+    limit. Without a timeout the BLOCKING_SYSCALLS are skipped.
+
+    Returns the number of syscalls that were executed and a list of (syscall
+    name, elapsed seconds) tuples, one per syscall that was interrupted.
+    """
+
+    if timeout is None:
+        timeout = SYSCALL_TIMEOUT
+
+    if raw is None:
+        raw = RAW_SYSCALL
+
+    skipped = SKIP_SYSCALLS
+    if raw:
+        skipped = skipped + RAW_SKIP_SYSCALLS
+    if not timeout:
+        timeout = None
+        skipped = skipped + BLOCKING_SYSCALLS
+
+    executed = 0
+
+    with Watchdog(timeout) as watchdog:
+        for index, sd in enumerate(syscall_definitions):
+            # check if we have a definition for this syscall first.
+            if(sd.type == SyscallManual.FOUND):
+                if sd.name not in skipped:
+                    if TRACE_SENTINEL:
+                        emit_trace_sentinel(index)
+
+                    call_plan = _compile(sd, raw)
+                    if call_plan is not None:
+                        _execute_call_plan(call_plan, watchdog, call_log, counters)
+                        executed += 1
+
+    return executed, watchdog.timeouts
 
 
 
@@ -188,35 +745,163 @@ def init():
         f.close()
 
 
+def load_syscall_definitions(path, syscall_names=None, syscall_filter=None):
+    """
+    <Purpose>
+      Loads syscall definitions from either a definition database or a legacy
+      pickle file.
+
+      Definition databases are decoded lazily so only the definitions of the
+      requested system calls are built. Filters on names are applied before
+      decoding.
+
+    <Arguments>
+      path:
+        The definition database or pickle file to load.
+
+      syscall_names:
+        The names of the system calls whose definitions to load, or None to
+        load all of them.
+
+      syscall_filter:
+        A sysDef.SyscallFilter.SyscallFilter the loaded definitions must
+        pass, or None.
+
+    <Exceptions>
+      None
+
+    <Side Effects>
+      None
+
+    <Returns>
+      A list of SyscallManual objects.
+    """
+
+    if DefinitionDatabase.is_database(path):
+        with DefinitionDatabase(path) as database:
+            if syscall_names is None:
+                names = database.names
+            else:
+                names = [name for name in syscall_names if name in database]
+
+            if syscall_filter is not None:
+                names = syscall_filter.select_names(names)
+
+            syscall_definitions = [database.get(name) for name in names]
+
+    else:
+        import pickle
+
+        # legacy format. Only unpickle files from trusted sources; prefer
+        # converting them with "python -m sysDef.DefinitionDatabase".
+        with open(path, 'rb') as pickle_file:
+            syscall_definitions = pickle.load(pickle_file)
+
+        if syscall_names is not None:
+            syscall_definitions = [sd for sd in syscall_definitions if sd.name in syscall_names]
+
+        if syscall_filter is not None:
+            syscall_definitions = [sd for sd in syscall_definitions
+                                   if syscall_filter.match_name(sd.name)]
+
+    if syscall_filter is not None and syscall_filter.needs_definitions():
+        syscall_definitions = [sd for sd in syscall_definitions
+                               if syscall_filter.match_definition(sd)]
+
+    return syscall_definitions
+
+
 def main():
-    init()
+    # start up does not meet the target of well under 50 ms for a single
+    # syscall: it takes about 25 ms more than a bare interpreter, of which
+    # about 10 ms build this parser (translations, the terminal size) and
+    # most of the rest imports ctypes, and re and enum for the declaration
+    # parser. signal is only imported by a Watchdog.
+    import argparse
+
+    from sysDef import SyscallFilter
+
+    # parse_intermixed_args formats the usage on every run unless it is given,
+    # which imports shutil and locale.
+    parser = argparse.ArgumentParser(
+        usage="%(prog)s [options] database [syscall ...]",
+        description="Execute syscalls with arguments built from their definitions.")
+    parser.add_argument("database",
+                        help="definition database or pickle file to read syscall definitions from")
+    parser.add_argument("syscalls", nargs="*",
+                        help="names of the syscalls to execute (default: all)")
+    SyscallFilter.add_arguments(parser)
+    parser.add_argument("--list", action="store_true",
+                        help="print the definitions of the selected syscalls instead of executing them")
+    parser.add_argument("--raw", action="store_true", default=RAW_SYSCALL,
+                        help="execute syscalls through syscall(2) instead of their libc wrappers")
+    parser.add_argument("--timeout", type=float, default=SYSCALL_TIMEOUT,
+                        help="seconds a syscall may block before it is interrupted (0 for no limit)")
+    parser.add_argument("--capture", metavar="FILE", default=CAPTURE_FILE,
+                        help="record the return value, errno and timing of every syscall to FILE "
+                             "(CSV if it ends in .csv, binary columns otherwise)")
+    parser.add_argument("--record", metavar="FILE", default=RECORD_FILE,
+                        help="record the executed syscalls and their argument values to FILE "
+                             "for replay_syscall.py")
+    parser.add_argument("--counters", action="store_true", default=PERF_COUNTERS,
+                        help="count perf_event_open events of every syscall and print them")
+    args = parser.parse_intermixed_args()
+
+    syscall_filter = SyscallFilter.from_arguments(args, args.syscalls)
 
     # to avoid generating long trace files, instead of generating the syscall
-    # definitions we pickle them in.
+    # definitions we load them from a definition database (or a legacy pickle
+    # file), decoding only those of the selected syscalls.
+    syscall_definitions = load_syscall_definitions(args.database, syscall_filter=syscall_filter)
+
+    if args.list:
+        for sd in syscall_definitions:
+            print(sd.definition if sd.type == SyscallManual.FOUND else sd.name)
+        return
+
+    init()
+
+    call_log = None
+    if args.capture is not None:
+        from sysDef.CallLog import CallLog
+        call_log = CallLog(len(syscall_definitions))
 
-    # need exactly one argument which is the pickle file from which to get the
-    # syscall definitions.
-    if len(sys.argv) != 2:
-        raise Exception("Please give the name of the pickle file from which to " +
-                      "read syscall definitions.")
+    # the recorder executes the calls, recording them in the call log too.
+    recorder = None
+    if args.record is not None:
+        from sysDef.CallRecording import CallRecorder
+        recorder = CallRecorder(args.record, call_log)
 
-    # get the syscall definitions from the pickle file
-    pickle_file = open(sys.argv[1], 'rb')
-    syscall_definitions = pickle.load(pickle_file)
+    counters = None
+    if args.counters:
+        from sysDef.PerfCounters import PerfCounters
+        counters = PerfCounters()
 
-    # do not execute exit because it will cause the program to terminate.
-    # do not execute pause because it pauses the program's execution.
-    # do not execute vfork because the parent blocks, ultimately causing segfault
-    skip_syscalls = ["exit", "pause", "vfork"]
+    try:
+        executed, timeouts = execute_syscalls(syscall_definitions, args.timeout,
+                                    recorder if recorder is not None else call_log,
+                                    counters, args.raw)
+    finally:
+        if counters is not None:
+            counters.close()
 
-    for sd in syscall_definitions:
-        # check if we have a definition for this syscall first.
-        if(sd.type == SyscallManual.FOUND):
-            if sd.name not in skip_syscalls:
-                execute_syscall(sd)
+        if recorder is not None:
+            recorder.close()
+
+    for name, elapsed in timeouts:
+        print("Timed out: %s after %.2fs" % (name, elapsed))
+
+    # a run that is cut short by a syscall never prints this.
+    print("Executed %d of %d definitions" % (executed, len(syscall_definitions)))
+
+    if counters is not None:
+        from sysDef.PerfCounters import format_counters
+        print(format_counters(counters, [sd.name for sd in syscall_definitions]))
+
+    if call_log is not None:
+        call_log.write(args.capture)
 
 
 
 if __name__ == '__main__':
     main()
-
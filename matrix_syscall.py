@@ -0,0 +1,550 @@
+"""
+<Started>
+  October 2026
+
+<Purpose>
+  Execute syscalls with matrices of boundary-value arguments instead of a
+  single argument set.
+
+  execute_syscall gives each parameter exactly one value, so each syscall
+  follows a single path in the kernel, usually an early error return. Here
+  each parameter gets a list of candidate values depending on its kind:
+
+    - integers:          0, 1, -1 and the limits of their type, and of int
+                         for wider types, to catch truncation
+    - lengths:           0, 1 and the size of a scratch buffer
+    - file descriptors:  an open file, -1 and a valid but unused number
+    - paths:             FILEPATH, a missing path, "", an overlong path, NULL
+    - other pointers:    a buffer from the BufferPool, NULL
+    - other parameters:  the single value chosen by execute_syscall
+
+  Argument sets are generated lazily from either the cartesian product of the
+  candidates of all parameters or a pairwise covering array, which covers
+  every combination of values of any two parameters in far fewer sets and is
+  built with the in-parameter-order (IPOG) strategy. Sets are compiled and
+  executed in batches, up to a configurable number per syscall. File
+  descriptors created by syscalls such as open or pipe are closed after each
+  execution (see execute_syscall.close_new_fds).
+  The return value, errno and timing of every execution can be recorded with
+  --capture, see sysDef/CallLog.py, and the executed sequence with its
+  argument values with --record, to be replayed by replay_syscall.py.
+
+  Example running this program:
+
+    python matrix_syscall.py syscall_definitions.sdb open lseek --pairwise --cap 500
+    python matrix_syscall.py syscall_definitions.sdb lseek --capture lseek.csv
+    python matrix_syscall.py syscall_definitions.sdb --pairwise --record matrix.rec
+
+"""
+
+import argparse
+import collections
+import ctypes
+import itertools
+import json
+import os
+
+import execute_syscall
+from sysDef import SyscallFilter
+from sysDef.BufferPool import SCRATCH_SIZE
+from sysDef.CallLog import CallLog
+from sysDef.CallRecording import CallRecorder
+from sysDef.SyscallManual import SyscallManual
+
+
+DEFAULT_CAP = 1000
+DEFAULT_BATCH_SIZE = 64
+
+# in addition to the syscalls never executed by execute_syscall, do not
+# execute syscalls whose boundary values affect other processes or the whole
+# system, e.g. kill(-1, 1), or create processes. Do not execute syscalls
+# that unmap, protect or replace memory either: given the address of a buffer
+# and a large length they reach the memory of the interpreter, e.g.
+# munmap(buffer, UINT_MAX). Nor syscalls that change the credentials of the
+# process, e.g. setuid(1), after which the remaining syscalls no longer run
+# with the same privileges, and cannot open FILEPATH.
+SKIP_SYSCALLS = execute_syscall.SKIP_SYSCALLS + [
+    "fork", "kill", "killpg", "tkill", "tgkill", "reboot", "sethostname",
+    "setdomainname", "swapon", "swapoff", "umount", "umount2", "syslog",
+    "acct", "pivot_root", "chroot", "munmap", "mprotect", "pkey_mprotect",
+    "madvise", "mremap", "brk", "remap_file_pages", "setuid", "setuid32",
+    "setgid", "setgid32", "setreuid", "setreuid32", "setregid", "setregid32",
+    "setresuid", "setresuid32", "setresgid", "setresgid32", "setfsuid",
+    "setfsuid32", "setfsgid", "setfsgid32", "setgroups", "setgroups32",
+    "capset",
+]
+
+# names of parameters holding file descriptors.
+FD_PARAMETER_NAMES = SyscallFilter.FD_PARAMETER_NAMES
+
+# timeouts are only given values that do not block forever: no NULL timeout
+# structures and no negative or huge integer timeouts.
+TIMEOUT_PARAMETER_NAMES = set(["timeout", "tmo_p", "abs_timeout"])
+
+# dirfd parameters also accept the current working directory.
+AT_FDCWD = -100
+
+# pointer parameters that are never NULL. The libc wrappers of these syscalls
+# dereference them in user space instead of failing with EFAULT, e.g.
+# clock_gettime runs in the vDSO and mq_open checks the first character of
+# the name.
+NON_NULL_PARAMETERS = {
+    "clock_gettime": ["tp"],
+    "mq_open": ["name"],
+    "mq_unlink": ["name"],
+    "timer_create": ["timerid"],
+}
+
+# names of parameters holding the length of a buffer or of a memory range.
+# They are not given the limits of their type, only lengths that stay within
+# the buffers of the BufferPool.
+LENGTH_PARAMETER_NAMES = set(["len", "length", "size", "count", "buflen", "bufsize",
+                              "bufsiz", "plen", "msg_len", "old_size", "new_size",
+                              "addrlen", "optlen", "cpusetsize", "bytecount"])
+
+SIGNED_TYPES = (ctypes.c_short, ctypes.c_int, ctypes.c_long, ctypes.c_longlong)
+UNSIGNED_TYPES = (ctypes.c_ushort, ctypes.c_uint, ctypes.c_ulong, ctypes.c_ulonglong)
+
+# names of the limits of integers of each width.
+LIMIT_NAMES = {16: "SHRT", 32: "INT", 64: "LONG"}
+
+# longer than PATH_MAX.
+LONG_PATH = b"a" * 4097
+
+MISSING_PATH = b"MISSING_TEST_FILE.txt"
+
+
+class ArgumentFixtures:
+    """
+    <Purpose>
+      Resources referenced by candidate argument values, such as an open file
+      descriptor. Syscalls may close or otherwise consume them, so they are
+      renewed before each syscall.
+
+    <Attributes>
+      self.fd:
+        A file descriptor open for reading and writing on FILEPATH.
+
+      self.unused_fd:
+        A file descriptor number that is valid but not open.
+
+    """
+
+    def __init__(self):
+        self.fd = None
+        self.unused_fd = None
+        self.renew()
+
+
+    def renew(self):
+        self.close()
+        execute_syscall.init()
+        self.fd = os.open(execute_syscall.FILEPATH, os.O_RDWR)
+        self.unused_fd = os.dup(self.fd)
+        os.close(self.unused_fd)
+
+
+    def close(self):
+        if self.fd is not None:
+            try:
+                os.close(self.fd)
+            except OSError:
+                # the syscall closed it already.
+                pass
+            self.fd = None
+
+
+
+def parameter_candidates(parameter, argtype, argvalue, fixtures):
+    """
+    <Purpose>
+      Returns the candidate values of a parameter.
+
+    <Arguments>
+      parameter:
+        The SyscallParameter.
+
+      argtype, argvalue:
+        The argument type and value chosen for the parameter by
+        execute_syscall.get_parameter_arginfo.
+
+      fixtures:
+        The ArgumentFixtures candidate values may refer to.
+
+    <Exceptions>
+      None
+
+    <Side Effects>
+      None
+
+    <Returns>
+      A list of (label, value) tuples. The label describes the value in
+      reports.
+    """
+
+    if parameter.pointer and parameter.type == "char" and argtype is ctypes.c_char_p:
+        return [("FILEPATH", argvalue),
+                ("missing", ctypes.c_char_p(MISSING_PATH)),
+                ("empty", ctypes.c_char_p(b"")),
+                ("long", ctypes.c_char_p(LONG_PATH)),
+                ("NULL", None)]
+
+    if (parameter.pointer or parameter.array) and argvalue is not None:
+        if parameter.name in TIMEOUT_PARAMETER_NAMES:
+            return [("buffer", argvalue)]
+
+        return [("buffer", argvalue), ("NULL", None)]
+
+    if argtype in SIGNED_TYPES and not parameter.pointer:
+        if parameter.name in FD_PARAMETER_NAMES:
+            candidates = [("open_fd", argtype(fixtures.fd)),
+                          ("-1", argtype(-1)),
+                          ("unused_fd", argtype(fixtures.unused_fd))]
+            if "dirfd" in parameter.name:
+                candidates.append(("AT_FDCWD", argtype(AT_FDCWD)))
+            return candidates
+
+        if parameter.name in TIMEOUT_PARAMETER_NAMES:
+            return [("0", argtype(0)), ("1", argtype(1))]
+
+    if argtype in SIGNED_TYPES + UNSIGNED_TYPES and not parameter.pointer:
+        if parameter.name in LENGTH_PARAMETER_NAMES:
+            return [("0", argtype(0)), ("1", argtype(1)),
+                    ("SCRATCH_SIZE", argtype(SCRATCH_SIZE))]
+
+        signed = argtype in SIGNED_TYPES
+        return [(label, argtype(value)) for label, value in integer_boundaries(argtype, signed)]
+
+    return [("default", argvalue)]
+
+
+def integer_boundaries(argtype, signed):
+    """
+    Returns the boundary values of an integer ctypes type as (label, value)
+    tuples: 0, 1, -1 (if signed) and the limits of the type. Types wider than
+    int also get the limits of int.
+    """
+
+    bits = 8 * ctypes.sizeof(argtype)
+    widths = [bits]
+    if bits > 32:
+        widths.append(32)
+
+    if signed:
+        boundaries = [("0", 0), ("1", 1), ("-1", -1)]
+        for width in widths:
+            name = LIMIT_NAMES.get(width, "INT%d" % width)
+            boundaries.append((name + "_MAX", 2 ** (width - 1) - 1))
+            boundaries.append((name + "_MIN", -2 ** (width - 1)))
+
+    else:
+        boundaries = [("0", 0), ("1", 1)]
+        for width in widths:
+            name = LIMIT_NAMES.get(width, "INT%d" % width)
+            boundaries.append(("U" + name + "_MAX", 2 ** width - 1))
+
+    return boundaries
+
+
+def argument_sets(syscall_definition, fixtures, pairwise=False):
+    """
+    <Purpose>
+      Lazily generates the argument sets of a syscall.
+
+    <Arguments>
+      syscall_definition:
+        A SyscallManual object of type FOUND.
+
+      fixtures:
+        The ArgumentFixtures candidate values may refer to.
+
+      pairwise:
+        If True only generate a pairwise covering array, a subset of the
+        cartesian product that contains every combination of values of any
+        two parameters. See pairwise_indexes.
+
+    <Exceptions>
+      None
+
+    <Side Effects>
+      None
+
+    <Returns>
+      An iterator of (labels, argvalues) tuples, or None if the parameters of
+      the syscall are not supported.
+    """
+
+    argtypes, argvalues = execute_syscall.get_syscall_arginfo(syscall_definition)
+    if argtypes is None:
+        return None
+
+    parameters = syscall_definition.definition.parameters
+
+    candidates = [parameter_candidates(parameter, argtype, argvalue, fixtures)
+                  for parameter, argtype, argvalue in zip(parameters, argtypes, argvalues)]
+
+    non_null = NON_NULL_PARAMETERS.get(syscall_definition.name, [])
+    candidates = [[c for c in values if not (parameter.name in non_null and c[1] is None)]
+                  for parameter, values in zip(parameters, candidates)]
+
+    if pairwise:
+        indexes = pairwise_indexes([len(c) for c in candidates])
+    else:
+        indexes = itertools.product(*[range(len(c)) for c in candidates])
+
+    return ((tuple(candidates[i][choice][0] for i, choice in enumerate(combination)),
+             tuple(candidates[i][choice][1] for i, choice in enumerate(combination)))
+            for combination in indexes)
+
+
+def pairwise_indexes(sizes):
+    """
+    <Purpose>
+      Builds a pairwise covering array: combinations of indexes into lists of
+      the given sizes that together contain every pair of indexes of any two
+      lists.
+
+      The array is built with the in-parameter-order (IPOG) strategy. It
+      starts with every pair of indexes of the two largest lists. Each further
+      list is added by extending every combination with the index covering
+      the most pairs not covered yet (horizontal growth), and then adding
+      combinations for the pairs still left (vertical growth). The result
+      usually has little more than the product of the two largest sizes
+      combinations, however many lists there are.
+
+    <Arguments>
+      sizes:
+        The sizes of the lists.
+
+    <Exceptions>
+      None
+
+    <Side Effects>
+      None
+
+    <Returns>
+      A list of tuples of indexes, one index per list in the order of sizes.
+      With fewer than two lists there are no pairs and every combination of
+      the cartesian product is returned.
+    """
+
+    if len(sizes) < 2 or 0 in sizes:
+        return list(itertools.product(*[range(size) for size in sizes]))
+
+    # largest lists first, which keeps the array small.
+    order = sorted(range(len(sizes)), key=lambda i: -sizes[i])
+    ordered_sizes = [sizes[i] for i in order]
+
+    rows = [[a, b] for a in range(ordered_sizes[0]) for b in range(ordered_sizes[1])]
+
+    for column in range(2, len(ordered_sizes)):
+        size = ordered_sizes[column]
+        uncovered = set((other, a, b) for other in range(column)
+                        for a in range(ordered_sizes[other]) for b in range(size))
+
+        # horizontal growth.
+        for row in rows:
+            best = max(range(size),
+                       key=lambda value: sum((other, row[other], value) in uncovered
+                                             for other in range(column)))
+            row.append(best)
+            uncovered.difference_update((other, row[other], best) for other in range(column))
+
+        # vertical growth. Rows are left open (None) where any index will do.
+        new_rows = []
+        for other, a, b in sorted(uncovered):
+            for row in new_rows:
+                if row[column] == b and row[other] is None:
+                    row[other] = a
+                    break
+            else:
+                row = [None] * column + [b]
+                row[other] = a
+                new_rows.append(row)
+
+        for row in new_rows:
+            rows.append([0 if value is None else value for value in row])
+
+    combinations = []
+    for row in rows:
+        combination = [0] * len(sizes)
+        for position, index in zip(order, row):
+            combination[position] = index
+        combinations.append(tuple(combination))
+
+    return combinations
+
+
+def batched(iterable, size):
+    """
+    Yields lists of up to size consecutive items of iterable.
+    """
+
+    iterator = iter(iterable)
+    while True:
+        batch = list(itertools.islice(iterator, size))
+        if not batch:
+            return
+        yield batch
+
+
+def run_matrix(syscall_definitions, pairwise=False, cap=DEFAULT_CAP,
+               batch_size=DEFAULT_BATCH_SIZE, raw=False,
+               timeout=execute_syscall.SYSCALL_TIMEOUT, call_log=None):
+    """
+    <Purpose>
+      Executes each of the given syscalls with its argument sets.
+
+    <Arguments>
+      syscall_definitions:
+        A list of SyscallManual objects.
+
+      pairwise:
+        Execute a pairwise covering array of the argument sets instead of all
+        of them.
+
+      cap:
+        The maximum number of argument sets executed per syscall, or None for
+        no limit.
+
+      batch_size:
+        The number of argument sets compiled and executed together.
+
+      raw:
+        Execute syscalls through syscall(2) instead of their libc wrappers.
+
+      timeout:
+        The number of seconds each execution may block before it is
+        interrupted by an execute_syscall.Watchdog, or None for no limit, in
+        which case execute_syscall.BLOCKING_SYSCALLS are skipped.
+
+      call_log:
+        A sysDef.CallLog.CallLog or sysDef.CallRecording.CallRecorder
+        recording every execution, with the index of its argument set in the
+        argument sets of the syscall, or None.
+
+    <Exceptions>
+      None
+
+    <Side Effects>
+      The syscalls are executed.
+
+    <Returns>
+      A list of dictionaries with the name of each syscall, the number of
+      argument sets executed, how many times each value was returned and how
+      many executions timed out.
+    """
+
+    skipped = list(SKIP_SYSCALLS)
+    if timeout is None:
+        skipped += execute_syscall.BLOCKING_SYSCALLS
+
+    fixtures = ArgumentFixtures()
+    results = []
+
+    try:
+        with execute_syscall.Watchdog(timeout) as watchdog:
+            for sd in syscall_definitions:
+                if sd.type != SyscallManual.FOUND or sd.name in skipped:
+                    continue
+
+                result = _run_syscall_matrix(sd, fixtures, watchdog, pairwise, cap,
+                                             batch_size, raw, call_log)
+                if result is not None:
+                    results.append(result)
+    finally:
+        fixtures.close()
+
+    return results
+
+
+def _run_syscall_matrix(sd, fixtures, watchdog, pairwise, cap, batch_size, raw, call_log):
+    if raw:
+        base_plan = execute_syscall.compile_raw_call_plan(sd)
+    else:
+        base_plan = execute_syscall.compile_call_plan(sd)
+
+    if base_plan is None:
+        return None
+
+    fixtures.renew()
+    sets = argument_sets(sd, fixtures, pairwise)
+    if cap is not None:
+        sets = itertools.islice(sets, cap)
+
+    timeouts_before = len(watchdog.timeouts)
+    executed = 0
+    returns = collections.Counter()
+    close_fds = execute_syscall.creates_fds(sd.name)
+
+    for batch in batched(sets, batch_size):
+        plans = [base_plan.with_argvalues(values) for _, values in batch]
+        for index, plan in enumerate(plans, executed):
+            return_value = watchdog.call(plan, call_log, index)
+            returns[str(return_value)] += 1
+            if close_fds:
+                execute_syscall.close_new_fds(plan, return_value)
+        executed += len(plans)
+
+    return {"name": sd.name, "argument_sets": executed, "returns": dict(returns),
+            "timeouts": len(watchdog.timeouts) - timeouts_before}
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Execute syscalls with boundary-value argument matrices.")
+    parser.add_argument("database",
+                        help="definition database or pickle file to read syscall definitions from")
+    parser.add_argument("syscalls", nargs="*",
+                        help="names of the syscalls to execute (default: all)")
+    parser.add_argument("--pairwise", action="store_true",
+                        help="execute a pairwise covering array instead of the full cartesian product")
+    parser.add_argument("--cap", type=int, default=DEFAULT_CAP,
+                        help="maximum argument sets per syscall (0 for no limit)")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE,
+                        help="argument sets compiled and executed together")
+    parser.add_argument("--raw", action="store_true",
+                        help="execute syscalls through syscall(2) instead of their libc wrappers")
+    parser.add_argument("--timeout", type=float, default=execute_syscall.SYSCALL_TIMEOUT,
+                        help="seconds an execution may block before it is interrupted (0 for no limit)")
+    parser.add_argument("--json", metavar="FILE",
+                        help="also write the results as JSON to FILE")
+    parser.add_argument("--capture", metavar="FILE",
+                        help="record the return value, errno and timing of every execution "
+                             "to FILE (CSV if it ends in .csv, binary columns otherwise)")
+    parser.add_argument("--record", metavar="FILE",
+                        help="record the executed syscalls and their argument values to FILE "
+                             "for replay_syscall.py")
+    args = parser.parse_intermixed_args()
+
+    syscall_definitions = execute_syscall.load_syscall_definitions(
+        args.database, args.syscalls or None)
+
+    call_log = CallLog() if args.capture else None
+
+    # the recorder executes the calls, recording them in the call log too.
+    recorder = CallRecorder(args.record, call_log) if args.record else None
+
+    try:
+        results = run_matrix(syscall_definitions, args.pairwise, args.cap or None,
+                             args.batch_size, args.raw, args.timeout or None,
+                             recorder if recorder is not None else call_log)
+    finally:
+        if recorder is not None:
+            recorder.close()
+
+    for result in results:
+        returns = ", ".join("%s x%d" % item for item in sorted(result["returns"].items()))
+        if result["timeouts"]:
+            returns += " (%d timed out)" % result["timeouts"]
+        print(result["name"].ljust(24) + str(result["argument_sets"]).rjust(6) + "  " + returns)
+
+    if args.json:
+        with open(args.json, "w") as json_file:
+            json.dump(results, json_file, indent=2)
+
+    if call_log is not None:
+        call_log.write(args.capture)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,314 @@
+"""
+<Started>
+  October 2026
+
+<Purpose>
+  Replay a recording of syscalls made with the --record option of
+  execute_syscall or matrix_syscall, e.g. to reproduce a pattern of syscalls
+  against another kernel or to use it as load.
+
+  The recording is read with mmap as it is replayed. Each distinct call (the
+  same function with the same recorded arguments) is compiled into a CallPlan
+  once and reused, so replaying costs about as much as executing the calls.
+  Buffers are given their recorded contents before every call.
+
+  By default calls are replayed as fast as possible. With --speed they are
+  replayed at the pacing of the recording, sped up by the given factor: a
+  call recorded t seconds after the start of the recording is executed t /
+  speed seconds after the start of the replay, or as soon as possible if the
+  replay is behind.
+
+  Integers, including file descriptors and process ids, are replayed with
+  their recorded values. Calls whose errno differs from the recorded one,
+  which usually means that the kernel took a different path, are counted per
+  syscall.
+
+  Example running this program:
+
+    python execute_syscall.py syscall_definitions.sdb --record run.rec
+    python replay_syscall.py run.rec --speed 10
+    python replay_syscall.py run.rec --repeat 100 --timeout 0
+
+"""
+
+import argparse
+import collections
+import ctypes
+import time
+
+import execute_syscall
+from sysDef import CallRecording
+from sysDef.CallLog import CallLog
+from sysDef.BufferPool import SCRATCH_SIZE
+
+
+# fork is not replayed since the child would continue replaying.
+SKIP_SYSCALLS = execute_syscall.SKIP_SYSCALLS + ["fork"]
+
+# when waiting for the time of the next call, sleep until this many
+# nanoseconds before it and spin for the rest, since sleeping overshoots.
+SPIN_NS = 200000
+
+
+
+def compile_replay_plan(recorded_call):
+    """
+    <Purpose>
+      Compiles a recorded call into a CallPlan executing it again.
+
+    <Arguments>
+      recorded_call:
+        A sysDef.CallRecording.RecordedCall.
+
+    <Exceptions>
+      None
+
+    <Side Effects>
+      Buffers are taken from the BufferPool of execute_syscall.
+
+    <Returns>
+      A tuple (CallPlan, restores) where restores is a list of (address, size,
+      contents) tuples of the buffers to fill with their recorded contents
+      before each call. None if the function is not in libc or some of the
+      arguments could not be recorded.
+    """
+
+    try:
+        func = execute_syscall.LIBC[recorded_call.symbol]
+    except AttributeError:
+        return None
+
+    pool = execute_syscall.get_buffer_pool()
+
+    argtypes = []
+    argvalues = []
+    restores = []
+
+    for slot, (kind, value) in enumerate(recorded_call.arguments()):
+        if kind == CallRecording.NULL:
+            argtypes.append(ctypes.c_void_p)
+            argvalues.append(None)
+
+        elif kind == CallRecording.INTEGER:
+            value_type, integer = value
+            argtypes.append(value_type)
+            argvalues.append(value_type(integer))
+
+        elif kind == CallRecording.STRING:
+            argtypes.append(ctypes.c_char_p)
+            argvalues.append(ctypes.c_char_p(value))
+
+        elif kind == CallRecording.BUFFER:
+            size, contents = value
+            buffer = pool.buffer(ctypes.c_ubyte * size, slot)
+            argtypes.append(ctypes.c_void_p)
+            argvalues.append(ctypes.c_void_p(ctypes.addressof(buffer)))
+            restores.append((ctypes.addressof(buffer), size, contents))
+
+        elif kind == CallRecording.SCRATCH:
+            buffer = pool.scratch(slot)
+            argtypes.append(ctypes.c_void_p)
+            argvalues.append(ctypes.c_void_p(ctypes.addressof(buffer)))
+            restores.append((ctypes.addressof(buffer), SCRATCH_SIZE, b""))
+
+        elif kind == CallRecording.STRUCT:
+            # structures passed by value.
+            name, size, contents = value
+            buffer = pool.acquire(name, slot)
+            if buffer is None or ctypes.sizeof(buffer) != size:
+                return None
+            argtypes.append(type(buffer))
+            argvalues.append(buffer)
+            restores.append((ctypes.addressof(buffer), size, contents))
+
+        else:
+            return None
+
+    plan = execute_syscall.CallPlan(recorded_call.name, func, argtypes,
+                                    recorded_call.restype, argvalues)
+    return plan, restores
+
+
+
+def wait_until(target_ns):
+    """
+    Returns when time.perf_counter_ns() reaches target_ns.
+    """
+
+    remaining = target_ns - time.perf_counter_ns()
+    if remaining > SPIN_NS:
+        time.sleep((remaining - SPIN_NS) / 1e9)
+
+    while time.perf_counter_ns() < target_ns:
+        pass
+
+
+
+def replay(path, speed=None, repeat=1, timeout=None, call_log=None):
+    """
+    <Purpose>
+      Replays a recording.
+
+    <Arguments>
+      path:
+        The file of the recording.
+
+      speed:
+        Replay at the pacing of the recording sped up by this factor, or as
+        fast as possible if None.
+
+      repeat:
+        The number of times to replay the recording. Repetitions follow each
+        other at the pacing of the recording.
+
+      timeout:
+        The number of seconds each call may block before it is interrupted by
+        an execute_syscall.Watchdog, or None for no limit, in which case
+        execute_syscall.BLOCKING_SYSCALLS are skipped.
+
+      call_log:
+        A sysDef.CallLog.CallLog recording every replayed call, with its index
+        in the recording as its argument set, or None.
+
+    <Exceptions>
+      An Exception is raised if the file is not a recording.
+
+    <Side Effects>
+      The recorded syscalls are executed.
+
+    <Returns>
+      A dictionary with the number of replayed "calls", the "elapsed_s" and
+      "recorded_s" seconds the replay and the recording took, the number of
+      "skipped" calls per syscall and the number of calls per syscall whose
+      errno "differs" from the recorded one, and the list of (syscall name,
+      elapsed seconds) "timeouts" of the calls that were interrupted.
+    """
+
+    skipped_names = set(SKIP_SYSCALLS)
+    if not timeout:
+        timeout = None
+        skipped_names.update(execute_syscall.BLOCKING_SYSCALLS)
+
+    # (function, return type, encoded arguments) -> (plan, restores) or None
+    plans = {}
+    skipped = collections.Counter()
+    differs = collections.Counter()
+    calls = 0
+    span_ns = 0
+
+    memset = ctypes.memset
+    memmove = ctypes.memmove
+    set_errno = ctypes.set_errno
+    get_errno = ctypes.get_errno
+
+    with execute_syscall.Watchdog(timeout) as watchdog:
+        start_ns = time.perf_counter_ns()
+
+        for repetition in range(repeat):
+            offset_ns = repetition * span_ns
+
+            for recorded_call in CallRecording.read_calls(path):
+                if repetition == 0:
+                    span_ns = max(span_ns, recorded_call.start_ns + recorded_call.duration_ns)
+
+                name = recorded_call.name
+                if name in skipped_names:
+                    skipped[name] += 1
+                    continue
+
+                key = (recorded_call.symbol, recorded_call.restype,
+                       recorded_call.encoded_arguments)
+                entry = plans.get(key, False)
+                if entry is False:
+                    entry = plans[key] = compile_replay_plan(recorded_call)
+
+                if entry is None:
+                    skipped[name] += 1
+                    continue
+
+                plan, restores = entry
+
+                if speed:
+                    wait_until(start_ns + int((offset_ns + recorded_call.start_ns) / speed))
+
+                for address, size, contents in restores:
+                    memset(address, 0, size)
+                    memmove(address, contents, len(contents))
+
+                set_errno(0)
+                watchdog.call(plan, call_log, recorded_call.index)
+                if get_errno() != recorded_call.errno:
+                    differs[name] += 1
+
+                calls += 1
+
+        elapsed_ns = time.perf_counter_ns() - start_ns
+
+    return {
+        "calls": calls,
+        "elapsed_s": elapsed_ns / 1e9,
+        "recorded_s": span_ns * repeat / 1e9,
+        "skipped": dict(skipped),
+        "differs": dict(differs),
+        "timeouts": watchdog.timeouts,
+    }
+
+
+
+def format_counts(counts, limit=10):
+    """
+    Returns the largest counts of a dictionary of counts per syscall as text.
+    """
+
+    items = sorted(counts.items(), key=lambda item: (-item[1], item[0]))
+    text = ", ".join("%s x%d" % item for item in items[:limit])
+    if len(items) > limit:
+        text += " and %d more" % (len(items) - limit)
+
+    return text
+
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay a recording of syscalls.")
+    parser.add_argument("recording", help="a recording made with --record")
+    parser.add_argument("--speed", type=float,
+                        help="replay at the recorded pacing sped up by SPEED "
+                             "(default: as fast as possible)")
+    parser.add_argument("--repeat", type=int, default=1,
+                        help="number of times to replay the recording")
+    parser.add_argument("--timeout", type=float, default=execute_syscall.SYSCALL_TIMEOUT,
+                        help="seconds a call may block before it is interrupted (0 for no limit)")
+    parser.add_argument("--capture", metavar="FILE",
+                        help="record the return value, errno and timing of every replayed call "
+                             "to FILE (CSV if it ends in .csv, binary columns otherwise)")
+    args = parser.parse_args()
+
+    # recorded paths refer to the file execute_syscall creates.
+    execute_syscall.init()
+
+    call_log = CallLog() if args.capture else None
+
+    result = replay(args.recording, args.speed, args.repeat, args.timeout, call_log)
+
+    elapsed = result["elapsed_s"]
+    recorded = result["recorded_s"]
+    print("replayed %d calls in %.3fs (%.0f calls/s), recorded in %.3fs (%.0f calls/s)" %
+          (result["calls"], elapsed, result["calls"] / elapsed if elapsed else 0,
+           recorded, result["calls"] / recorded if recorded else 0))
+
+    if result["skipped"]:
+        print("skipped: " + format_counts(result["skipped"]))
+
+    if result["differs"]:
+        print("errno differs from the recording: " + format_counts(result["differs"]))
+
+    if result["timeouts"]:
+        timeouts = collections.Counter(name for name, elapsed in result["timeouts"])
+        print("timed out: " + format_counts(timeouts))
+
+    if call_log is not None:
+        call_log.write(args.capture)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,176 @@
+"""
+<Started>
+  October 2026
+
+<Purpose>
+  Collect syscall latencies of runs on different kernels and hosts in a
+  result store (see sysDef/ResultStore.py) and report the syscalls whose
+  latencies regressed between two sets of runs.
+
+  Runs are added from the binary call logs written with --capture by
+  execute_syscall, matrix_syscall, replay_syscall and stress_syscall, with
+  the metadata of the host they are added on unless given otherwise. Each
+  call is stored with its syscall, argument set and latency.
+
+  compare tests every syscall and argument set (and with --per-host, every
+  host) of the baseline runs against the candidate runs with a Mann-Whitney
+  U test on their whole latency distributions, and prints the significant
+  regressions and improvements. It exits with status 1 if a regression is
+  found, so it can gate an automated run.
+
+  Example running this program:
+
+    python execute_syscall.py syscall_definitions.sdb --capture old.cols
+    python results_syscall.py add results.db old.cols --label 6.7
+    python results_syscall.py add results.db new.cols --label 6.8 --hostname db1
+    python results_syscall.py runs results.db
+    python results_syscall.py compare results.db label=6.7 label=6.8 --per-host
+
+"""
+
+import argparse
+import json
+import sys
+
+from sysDef.CallLog import CallLog
+from sysDef import ResultStore
+
+
+
+def format_comparison(results, show_all=False):
+    """
+    Returns the results of ResultStore.compare as a text table, with only the
+    regressions and improvements unless show_all is set.
+    """
+
+    headers = ["syscall", "args", "host", "n", "p50 (ns)", "p90 (ns)", "p99 (ns)",
+               "change", "P(slower)", "p", "status"]
+
+    rows = []
+    for result in results:
+        if not show_all and result["status"] is None:
+            continue
+
+        row = [result["syscall"],
+               "" if result["argument_set"] is None else "%d" % result["argument_set"],
+               result["host"] or "",
+               "%d/%d" % (result["baseline_n"], result["candidate_n"])]
+        for p in ResultStore.PERCENTILES:
+            row.append("%d -> %d" % (result["baseline_p%d_ns" % p], result["candidate_p%d_ns" % p]))
+        row += ["%+.1f%%" % (result["change"] * 100), "%.2f" % result["p_greater"],
+                "%.2g" % result["p"], result["status"] or ""]
+        rows.append(row)
+
+    widths = [len(header) for header in headers]
+    for row in rows:
+        widths = [max(width, len(cell)) for width, cell in zip(widths, row)]
+
+    lines = ["  ".join(h.ljust(w) for h, w in zip(headers, widths)).rstrip()]
+    for row in rows:
+        lines.append("  ".join(c.ljust(w) for c, w in zip(row, widths)).rstrip())
+
+    return "\n".join(lines)
+
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Store syscall latencies of runs and compare them.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    add = commands.add_parser("add", help="add a capture file as a run")
+    add.add_argument("store", help="the SQLite result store (created if missing)")
+    add.add_argument("capture", help="a binary call log written with --capture")
+    add.add_argument("--label", help="label to select the run by, e.g. the kernel under test")
+    for field in ("hostname", "kernel", "machine", "cpu_model"):
+        add.add_argument("--" + field.replace("_", "-"), dest=field,
+                         help="%s of the host the capture was made on (default: this host's)" %
+                              field.replace("_", " "))
+    add.add_argument("--cpus", type=int,
+                     help="number of CPUs of the host the capture was made on")
+
+    runs = commands.add_parser("runs", help="list the runs of a store")
+    runs.add_argument("store", help="the SQLite result store")
+
+    delete = commands.add_parser("delete", help="delete runs from a store")
+    delete.add_argument("store", help="the SQLite result store")
+    delete.add_argument("runs", metavar="RUNS",
+                        help="runs to delete: ids, 'latest' or FIELD=VALUE conditions")
+
+    compare = commands.add_parser("compare", help="compare two sets of runs")
+    compare.add_argument("store", help="the SQLite result store")
+    compare.add_argument("baseline", metavar="BASELINE",
+                         help="baseline runs: comma separated ids, 'latest' or FIELD=VALUE "
+                              "conditions, e.g. label=6.7,hostname=db1")
+    compare.add_argument("candidate", metavar="CANDIDATE", help="candidate runs, as BASELINE")
+    compare.add_argument("--per-host", action="store_true",
+                         help="compare the runs of each host separately")
+    compare.add_argument("--pool-argument-sets", action="store_true",
+                         help="compare syscalls as a whole instead of each argument set")
+    compare.add_argument("--alpha", type=float, default=ResultStore.DEFAULT_ALPHA,
+                         help="false discovery rate of significant changes")
+    compare.add_argument("--min-change", type=float, default=ResultStore.DEFAULT_MIN_CHANGE,
+                         help="relative change of the median below which changes are not reported")
+    compare.add_argument("--all", action="store_true",
+                         help="print every comparison, not only the changes")
+    compare.add_argument("--json", metavar="FILE",
+                         help="also write the comparisons as JSON to FILE ('-' for stdout)")
+
+    args = parser.parse_args()
+
+    with ResultStore.ResultStore(args.store) as store:
+        if args.command == "add":
+            metadata = dict((field, getattr(args, field)) for field in
+                            ("hostname", "kernel", "machine", "cpu_model", "cpus")
+                            if getattr(args, field) is not None)
+            run = store.add_call_log(CallLog.read_columns(args.capture), args.label,
+                                     args.capture, metadata)
+            print("added run %d" % run)
+
+        elif args.command == "runs":
+            for run in store.runs():
+                print("%4d  %s  %-16s %-16s %-24s %-8s %3d cpus %10d latencies" % (
+                    run["id"], run["created"], run["label"] or "", run["hostname"],
+                    run["kernel"], run["machine"], run["cpus"], run["latencies"]))
+
+        elif args.command == "delete":
+            for run in store.select_runs(args.runs):
+                store.delete_run(run)
+                print("deleted run %d" % run)
+
+        else:
+            try:
+                baseline = store.select_runs(args.baseline)
+                candidate = store.select_runs(args.candidate)
+                results = store.compare(baseline, candidate, args.per_host,
+                                        not args.pool_argument_sets, args.alpha,
+                                        args.min_change)
+            except Exception as e:
+                parser.error(str(e))
+
+            regressions = sum(1 for result in results if result["status"] == ResultStore.REGRESSION)
+            improvements = sum(1 for result in results if result["status"] == ResultStore.IMPROVEMENT)
+
+            print("runs %s against %s: %d comparisons, %d regressions, %d improvements" % (
+                ",".join(str(run) for run in baseline), ",".join(str(run) for run in candidate),
+                len(results), regressions, improvements))
+            if regressions or improvements or args.all:
+                print(format_comparison(results, args.all))
+
+            if args.json:
+                report = {"baseline": baseline, "candidate": candidate, "per_host": args.per_host,
+                          "alpha": args.alpha, "min_change": args.min_change,
+                          "results": results}
+
+                if args.json == "-":
+                    json.dump(report, sys.stdout, indent=2)
+                    print("")
+                else:
+                    with open(args.json, "w") as json_file:
+                        json.dump(report, json_file, indent=2)
+
+            if regressions:
+                sys.exit(1)
+
+if __name__ == "__main__":
+    main()
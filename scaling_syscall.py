@@ -0,0 +1,451 @@
+"""
+<Started>
+  October 2026
+
+<Purpose>
+  Measure how the throughput of each syscall scales with the number of
+  threads and processes executing it at the same time, to find syscalls
+  serialized by locks in the kernel.
+
+  Each selected syscall is compiled into a CallPlan once. For every worker
+  count (1, 2, 4, ... up to the number of usable CPUs by default) that many
+  workers execute the plan in a loop for a fixed time, each pinned to its own
+  CPU with sched_setaffinity, and their calls per second are added together.
+
+  Workers are run as threads of this process and as forked processes. ctypes
+  releases the GIL while a syscall executes, but the Python code between
+  calls runs one thread at a time, so threads can not scale beyond the time
+  the syscall spends in the kernel. Processes do not share the GIL, nor
+  their file descriptor table and memory map, so comparing the two tells the
+  GIL and the per-process kernel locks apart from the locks every process
+  contends on.
+
+  For every syscall a table of the throughput at each worker count is
+  printed, with the speedup over the smallest worker count and the
+  efficiency, the speedup divided by the increase in workers. A syscall that
+  scales perfectly has an efficiency of 1.0; a throughput that stays flat or
+  drops as workers are added points to contention.
+
+  File descriptors created by syscalls such as open or pipe are closed after
+  each call (see execute_syscall.close_new_fds), so that workers do not run
+  out of file descriptors. The close is included in the time of the call.
+
+  Example running this program:
+
+    python scaling_syscall.py syscall_definitions.sdb getpid open close
+    python scaling_syscall.py syscall_definitions.sdb --category path --counts 1,2,4,8,16
+
+"""
+
+import argparse
+import ctypes
+import json
+import os
+import struct
+import sys
+import threading
+import time
+
+import execute_syscall
+from sysDef import SyscallFilter
+from sysDef.SyscallManual import SyscallManual
+
+
+DEFAULT_DURATION = 1.0
+DEFAULT_WARMUP = 100
+
+# ways of running the workers.
+MODES = ("thread", "process")
+
+MODE_LABELS = {"thread": "threads", "process": "processes"}
+
+# the clock is read once every this many calls, so reading it does not
+# count against the syscall.
+CHECK_EVERY = 32
+
+# in addition to the syscalls never executed by execute_syscall, do not
+# execute fork repeatedly since each child continues the loop, nor syscalls
+# that block until a signal arrives.
+SKIP_SYSCALLS = execute_syscall.SKIP_SYSCALLS + execute_syscall.BLOCKING_SYSCALLS + ["fork"]
+
+# a worker process reports its calls, errors and elapsed nanoseconds.
+_RESULT = struct.Struct("<qqq")
+
+
+
+def default_counts(cpus):
+    """
+    Returns the worker counts 1, 2, 4, ... up to and including the number of
+    cpus.
+    """
+
+    counts = []
+    count = 1
+    while count < len(cpus):
+        counts.append(count)
+        count *= 2
+    counts.append(len(cpus))
+
+    return counts
+
+
+
+def _run_worker(call_plan, cpu, start_ns, end_ns, close_fds, warmup):
+    """
+    Executes a CallPlan on a CPU from start_ns until end_ns and returns a
+    tuple (calls, errors, elapsed ns). Used by worker threads and processes.
+    """
+
+    if cpu is not None:
+        # with pid 0 only the calling thread is pinned.
+        os.sched_setaffinity(0, [cpu])
+
+    monotonic_ns = time.monotonic_ns
+    set_errno = ctypes.set_errno
+    get_errno = ctypes.get_errno
+    close_new_fds = execute_syscall.close_new_fds
+
+    for _ in range(warmup):
+        return_value = call_plan()
+        if close_fds:
+            close_new_fds(call_plan, return_value)
+
+    time.sleep(max(start_ns - monotonic_ns(), 0) / 1e9)
+    while monotonic_ns() < start_ns:
+        pass
+
+    calls = 0
+    errors = 0
+    now_ns = monotonic_ns()
+    begin_ns = now_ns
+
+    while now_ns < end_ns:
+        for _ in range(CHECK_EVERY):
+            set_errno(0)
+            return_value = call_plan()
+            if get_errno():
+                errors += 1
+            elif close_fds:
+                close_new_fds(call_plan, return_value)
+
+        calls += CHECK_EVERY
+        now_ns = monotonic_ns()
+
+    return calls, errors, now_ns - begin_ns
+
+
+
+def _run_threads(call_plan, cpus, start_ns, end_ns, close_fds, warmup):
+    results = [None] * len(cpus)
+
+    def target(index):
+        results[index] = _run_worker(call_plan, cpus[index], start_ns, end_ns,
+                                     close_fds, warmup)
+
+    threads = [threading.Thread(target=target, args=(index,)) for index in range(len(cpus))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    return results
+
+
+
+def _run_processes(call_plan, cpus, start_ns, end_ns, close_fds, warmup):
+    # flush so buffered output is not written by every process.
+    sys.stdout.flush()
+    sys.stderr.flush()
+
+    children = []
+    for cpu in cpus:
+        result_read, result_write = os.pipe()
+        pid = os.fork()
+        if pid == 0:
+            try:
+                os.close(result_read)
+                result = _run_worker(call_plan, cpu, start_ns, end_ns, close_fds, warmup)
+                os.write(result_write, _RESULT.pack(*result))
+            finally:
+                os._exit(0)
+
+        os.close(result_write)
+        children.append((pid, result_read))
+
+    # a process that died reports nothing and is left out.
+    results = []
+    for pid, result_read in children:
+        with os.fdopen(result_read, "rb") as result_file:
+            data = result_file.read(_RESULT.size)
+        os.waitpid(pid, 0)
+        results.append(_RESULT.unpack(data) if len(data) == _RESULT.size else None)
+
+    return results
+
+
+
+def measure(call_plan, mode, cpus, duration=DEFAULT_DURATION, warmup=DEFAULT_WARMUP):
+    """
+    <Purpose>
+      Executes a CallPlan from a number of workers at the same time.
+
+    <Arguments>
+      call_plan:
+        The CallPlan to execute.
+
+      mode:
+        "thread" to run the workers as threads, "process" to run them as
+        forked processes.
+
+      cpus:
+        A list of the CPU each worker is pinned to, one per worker. A CPU of
+        None leaves the worker unpinned.
+
+      duration:
+        The number of seconds the workers execute the plan for.
+
+      warmup:
+        The number of calls each worker makes before it starts counting.
+
+    <Exceptions>
+      None
+
+    <Side Effects>
+      The syscall is executed.
+
+    <Returns>
+      A dictionary with the number of "workers", the number of them that
+      "failed" (processes that died), the total "calls" and "errors" and the
+      combined "calls_per_sec" of the workers.
+    """
+
+    run = _run_threads if mode == "thread" else _run_processes
+    close_fds = execute_syscall.creates_fds(call_plan.name)
+
+    # workers start together, once all of them are created and warmed up.
+    start_ns = time.monotonic_ns() + 50000000 + 1000000 * len(cpus)
+    end_ns = start_ns + int(duration * 1e9)
+
+    results = run(call_plan, cpus, start_ns, end_ns, close_fds, warmup)
+
+    point = {"workers": len(cpus), "failed": 0, "calls": 0, "errors": 0, "calls_per_sec": 0.0}
+    for result in results:
+        if result is None:
+            point["failed"] += 1
+            continue
+
+        calls, errors, elapsed_ns = result
+        point["calls"] += calls
+        point["errors"] += errors
+        if elapsed_ns:
+            point["calls_per_sec"] += calls * 1e9 / elapsed_ns
+
+    return point
+
+
+
+def scaling(syscall_definitions, counts, cpus, modes=MODES, duration=DEFAULT_DURATION,
+            raw=False, warmup=DEFAULT_WARMUP):
+    """
+    <Purpose>
+      Measures the scaling of each of the given syscalls that can be
+      executed.
+
+    <Arguments>
+      syscall_definitions:
+        A list of SyscallManual objects.
+
+      counts:
+        A list of the numbers of workers to measure.
+
+      cpus:
+        The list of CPUs to pin workers to. Worker i is pinned to
+        cpus[i % len(cpus)], so counts above len(cpus) share CPUs.
+
+      modes:
+        The ways of running the workers, from MODES.
+
+      duration:
+        The number of seconds each measurement lasts.
+
+      raw:
+        Execute syscalls through syscall(2) instead of their libc wrappers.
+
+      warmup:
+        The number of calls each worker makes before it starts counting.
+
+    <Exceptions>
+      None
+
+    <Side Effects>
+      The syscalls are executed.
+
+    <Returns>
+      A list of dictionaries, one per syscall, with its "name" and for each
+      mode the list of the measurements (see measure) at each count, with
+      their "speedup" over the smallest count and their "efficiency".
+    """
+
+    compile_plan = execute_syscall.compile_raw_call_plan if raw else execute_syscall.compile_call_plan
+
+    results = []
+    for sd in syscall_definitions:
+        if sd.type != SyscallManual.FOUND or sd.name in SKIP_SYSCALLS:
+            continue
+
+        call_plan = compile_plan(sd)
+        if call_plan is None:
+            continue
+
+        result = {"name": sd.name}
+        for mode in modes:
+            points = []
+            for count in counts:
+                point = measure(call_plan, mode, [cpus[i % len(cpus)] for i in range(count)],
+                                duration, warmup)
+
+                base = points[0] if points else point
+                point["speedup"] = 0.0
+                if base["calls_per_sec"]:
+                    point["speedup"] = point["calls_per_sec"] / base["calls_per_sec"]
+                point["efficiency"] = point["speedup"] * base["workers"] / count
+
+                points.append(point)
+
+            result[mode] = points
+
+        results.append(result)
+
+    return results
+
+
+
+def format_table(result, modes=MODES):
+    """
+    Returns the scaling of a syscall as returned by scaling formatted as a
+    text table.
+    """
+
+    headers = ["workers"]
+    for mode in modes:
+        headers += [MODE_LABELS[mode] + " calls/s", "speedup", "efficiency"]
+
+    rows = []
+    for index, point in enumerate(result[modes[0]]):
+        row = ["%d" % point["workers"]]
+        for mode in modes:
+            point = result[mode][index]
+            row += ["%.0f" % point["calls_per_sec"], "%.2fx" % point["speedup"],
+                    "%.2f" % point["efficiency"]]
+            if point["failed"]:
+                row[-1] += " (%d died)" % point["failed"]
+        rows.append(row)
+
+    widths = [len(header) for header in headers]
+    for row in rows:
+        widths = [max(width, len(cell)) for width, cell in zip(widths, row)]
+
+    lines = [result["name"]]
+    lines.append("  ".join(h.rjust(w) for h, w in zip(headers, widths)))
+    for row in rows:
+        lines.append("  ".join(c.rjust(w) for c, w in zip(row, widths)))
+
+    return "\n".join(lines)
+
+
+
+def parse_list(text):
+    """
+    Returns the list of positive integers of a comma separated list. Raises an
+    Exception if an item is not one.
+    """
+
+    numbers = []
+    for item in text.split(","):
+        if not item.strip().isdigit():
+            raise Exception("Invalid number in list: " + item)
+        numbers.append(int(item))
+
+    return numbers
+
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Measure how syscall throughput scales with threads and processes.")
+    parser.add_argument("database",
+                        help="definition database or pickle file to read syscall definitions from")
+    parser.add_argument("syscalls", nargs="*",
+                        help="names of the syscalls to measure (default: the selected syscalls)")
+    SyscallFilter.add_arguments(parser)
+    parser.add_argument("--counts", metavar="N,N,...",
+                        help="comma separated numbers of workers (default: 1, 2, 4, ... "
+                             "up to the number of CPUs)")
+    parser.add_argument("--cpus", metavar="CPU,CPU,...",
+                        help="comma separated CPUs to pin workers to (default: the CPUs "
+                             "this process may run on)")
+    parser.add_argument("--no-pin", action="store_true",
+                        help="do not pin workers to CPUs")
+    parser.add_argument("--mode", choices=MODES + ("both",), default="both",
+                        help="run workers as threads, as processes or both")
+    parser.add_argument("--duration", type=float, default=DEFAULT_DURATION,
+                        help="seconds each measurement lasts")
+    parser.add_argument("--warmup", type=int, default=DEFAULT_WARMUP,
+                        help="calls each worker makes before counting")
+    parser.add_argument("--raw", action="store_true",
+                        help="execute syscalls through syscall(2) instead of their libc wrappers")
+    parser.add_argument("--json", metavar="FILE",
+                        help="also write the results as JSON to FILE ('-' for stdout)")
+    args = parser.parse_intermixed_args()
+
+    if args.duration <= 0:
+        parser.error("--duration must be positive")
+
+    try:
+        cpus = parse_list(args.cpus) if args.cpus else sorted(os.sched_getaffinity(0))
+        counts = parse_list(args.counts) if args.counts else default_counts(cpus)
+    except Exception as e:
+        parser.error(str(e))
+
+    if not counts or min(counts) < 1:
+        parser.error("--counts must be at least 1")
+
+    modes = MODES if args.mode == "both" else (args.mode,)
+    pinned = [None] if args.no_pin else cpus
+
+    syscall_filter = SyscallFilter.from_arguments(args, args.syscalls)
+    syscall_definitions = execute_syscall.load_syscall_definitions(
+        args.database, syscall_filter=syscall_filter)
+
+    execute_syscall.init()
+
+    if max(counts) > len(cpus) and not args.no_pin:
+        print("more workers than CPUs (%d): workers share CPUs" % len(cpus))
+
+    results = []
+    for sd in syscall_definitions:
+        for result in scaling([sd], counts, pinned, modes, args.duration, args.raw,
+                              args.warmup):
+            print(format_table(result, modes))
+            print("")
+            results.append(result)
+
+    if args.json:
+        report = {
+            "counts": counts,
+            "cpus": None if args.no_pin else cpus,
+            "modes": list(modes),
+            "duration_s": args.duration,
+            "raw": args.raw,
+            "results": results,
+        }
+
+        if args.json == "-":
+            json.dump(report, sys.stdout, indent=2)
+            print("")
+        else:
+            with open(args.json, "w") as json_file:
+                json.dump(report, json_file, indent=2)
+
+if __name__ == "__main__":
+    main()
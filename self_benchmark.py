@@ -0,0 +1,334 @@
+"""
+<Started>
+  October 2026
+
+<Purpose>
+  Benchmark the hot paths of this program itself, so that a change that
+  makes parsing definitions, loading them, starting up or dispatching
+  syscalls slower is noticed.
+
+  The benchmark runs offline: definitions are parsed from man page synopses
+  recorded in MAN_FIXTURES (regenerate them with --record-fixtures on a host
+  with man pages) and loaded from the bundled syscall_definitions.pickle and
+  a definition database converted from it. It measures:
+
+    parse_synopses_per_s      man page synopses parsed into definitions
+                              (SyscallManual) per second
+    parse_definitions_per_s   definition lines parsed (Definition) per second
+    pickle_load_ms            loading every definition from the pickle
+    database_load_ms          loading every definition from the database
+    database_single_ms        opening the database and loading one definition
+    startup_ms                running execute_syscall.py for one syscall in a
+                              new interpreter
+    call_plan_ns              executing a compiled CallPlan of getpid
+    execute_syscall_ns        compiling and executing getpid with
+                              execute_syscall.execute_syscall
+    bytes_per_definition      memory held per definition loaded from the
+                              pickle
+
+  Every timing is repeated and the best repetition is kept, since the others
+  only add noise from the rest of the system. The results are compared
+  against a stored baseline (BASELINE_FILE), and the program exits with
+  status 1 if a metric is worse than the baseline by more than the
+  tolerance. Timings depend on the host, so the baseline is not shipped:
+  save one with --save-baseline before making a change, on the host the
+  change is measured on.
+
+  Example running this program:
+
+    python self_benchmark.py --save-baseline
+    python self_benchmark.py
+    python self_benchmark.py --record-fixtures
+
+"""
+
+import argparse
+import json
+import os
+import pickle
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import execute_syscall
+from sysDef import ManSource
+from sysDef.Definition import Definition
+from sysDef.DefinitionDatabase import DefinitionDatabase
+from sysDef.SyscallManual import SyscallManual
+
+
+DIRECTORY = os.path.dirname(os.path.abspath(__file__))
+
+PICKLE_FILE = os.path.join(DIRECTORY, "syscall_definitions.pickle")
+MAN_FIXTURES = os.path.join(DIRECTORY, "man_fixtures.json")
+BASELINE_FILE = os.path.join(DIRECTORY, "self_benchmark_baseline.json")
+
+DEFAULT_REPEAT = 7
+DEFAULT_TOLERANCE = 0.20
+
+# the number of calls timed together by the call benchmarks.
+CALLS = 20000
+
+# the number of new interpreters started by the startup benchmark.
+STARTUPS = 5
+
+# metrics, in the order they are reported, and whether higher is better.
+METRICS = (
+    ("parse_synopses_per_s", True),
+    ("parse_definitions_per_s", True),
+    ("pickle_load_ms", False),
+    ("database_load_ms", False),
+    ("database_single_ms", False),
+    ("startup_ms", False),
+    ("call_plan_ns", False),
+    ("execute_syscall_ns", False),
+    ("bytes_per_definition", False),
+)
+
+
+
+def best_time(function, repeat):
+    """
+    Calls function repeat times and returns the shortest time a call took, in
+    seconds.
+    """
+
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        elapsed = time.perf_counter() - start
+        if best is None or elapsed < best:
+            best = elapsed
+
+    return best
+
+
+
+def record_fixtures(path, syscall_names):
+    """
+    Reads the synopses of the man page sources of syscall_names and writes
+    them to path, as a JSON object of synopsis lines (or null if there is no
+    man page) by syscall name. Returns the number of synopses found.
+    """
+
+    synopses = {}
+    for name in syscall_names:
+        try:
+            synopses[name] = ManSource.read_synopsis(name)
+        except Exception:
+            synopses[name] = None
+
+    with open(path, "w") as fixtures_file:
+        json.dump({"uname": " ".join(os.uname()), "synopses": synopses}, fixtures_file,
+                  indent=0, sort_keys=True)
+        fixtures_file.write("\n")
+
+    return sum(1 for lines in synopses.values() if lines is not None)
+
+
+
+def run_benchmarks(repeat=DEFAULT_REPEAT, fixtures_path=MAN_FIXTURES, pickle_path=PICKLE_FILE):
+    """
+    <Purpose>
+      Runs every benchmark.
+
+    <Arguments>
+      repeat:
+        The number of repetitions of each timing.
+
+      fixtures_path:
+        The file of recorded man page synopses.
+
+      pickle_path:
+        The pickled definitions to load.
+
+    <Exceptions>
+      An Exception is raised if the fixtures or the pickle can not be read.
+
+    <Side Effects>
+      A definition database and the file execute_syscall uses as a path are
+      created in a temporary directory, and getpid is executed.
+
+    <Returns>
+      A dictionary of the value of each of the METRICS.
+    """
+
+    results = {}
+
+    with open(fixtures_path) as fixtures_file:
+        synopses = sorted(json.load(fixtures_file)["synopses"].items())
+
+    def parse_synopses():
+        for name, lines in synopses:
+            SyscallManual.from_synopsis(name, lines)
+
+    results["parse_synopses_per_s"] = len(synopses) / best_time(parse_synopses, repeat)
+
+    def load_pickle():
+        with open(pickle_path, "rb") as pickle_file:
+            return pickle.load(pickle_file)
+
+    syscall_manuals = load_pickle()
+    results["pickle_load_ms"] = best_time(load_pickle, repeat) * 1e3
+
+    # the lines the definitions were parsed from, as the database stores them.
+    lines = [str(sd.definition) + ";" for sd in syscall_manuals
+             if sd.type == SyscallManual.FOUND]
+
+    def parse_definitions():
+        for line in lines:
+            Definition(line)
+
+    results["parse_definitions_per_s"] = len(lines) / best_time(parse_definitions, repeat)
+
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    loaded = load_pickle()
+    results["bytes_per_definition"] = ((tracemalloc.get_traced_memory()[0] - before) /
+                                       float(len(loaded)))
+    tracemalloc.stop()
+    del loaded
+
+    with tempfile.TemporaryDirectory() as directory:
+        database_path = os.path.join(directory, "syscall_definitions.sdb")
+        DefinitionDatabase.write(database_path, syscall_manuals)
+
+        results["database_load_ms"] = best_time(
+            lambda: execute_syscall.load_syscall_definitions(database_path), repeat) * 1e3
+        results["database_single_ms"] = best_time(
+            lambda: execute_syscall.load_syscall_definitions(database_path, ["getpid"]),
+            repeat) * 1e3
+
+        # execute_syscall creates its file in the current directory.
+        command = [sys.executable, os.path.join(DIRECTORY, "execute_syscall.py"),
+                   database_path, "getpid"]
+        results["startup_ms"] = best_time(
+            lambda: subprocess.check_call(command, cwd=directory, stdout=subprocess.DEVNULL),
+            max(repeat, STARTUPS)) * 1e3
+
+    getpid = [sd for sd in syscall_manuals if sd.name == "getpid"][0]
+    call_plan = execute_syscall.compile_call_plan(getpid)
+
+    def call_plans():
+        for _ in range(CALLS):
+            call_plan()
+
+    def execute_syscalls():
+        for _ in range(CALLS):
+            execute_syscall.execute_syscall(getpid)
+
+    results["call_plan_ns"] = best_time(call_plans, repeat) * 1e9 / CALLS
+    results["execute_syscall_ns"] = best_time(execute_syscalls, repeat) * 1e9 / CALLS
+
+    return results
+
+
+
+def compare(results, baseline, tolerance=DEFAULT_TOLERANCE):
+    """
+    Returns a list of (metric, baseline value, value, relative change,
+    regressed) tuples comparing results with a baseline. The change is
+    positive when the metric got worse. Metrics missing from the baseline
+    have a baseline value and change of None.
+    """
+
+    comparison = []
+    for metric, higher_is_better in METRICS:
+        value = results[metric]
+        base = baseline.get(metric)
+        if not base:
+            comparison.append((metric, None, value, None, False))
+            continue
+
+        change = (value - base) / float(base)
+        if higher_is_better:
+            change = -change
+
+        comparison.append((metric, base, value, change, change > tolerance))
+
+    return comparison
+
+
+
+def format_comparison(comparison):
+    lines = ["%-26s %14s %14s %9s" % ("metric", "baseline", "current", "worse by")]
+    for metric, base, value, change, regressed in comparison:
+        line = "%-26s %14s %14.1f %9s" % (metric, "-" if base is None else "%.1f" % base, value,
+                                          "-" if change is None else "%+.1f%%" % (change * 100))
+        if regressed:
+            line += "  REGRESSION"
+        lines.append(line)
+
+    return "\n".join(lines)
+
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark this program's own hot paths.")
+    parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT,
+                        help="repetitions of each timing; the best is kept")
+    parser.add_argument("--baseline", default=BASELINE_FILE,
+                        help="the baseline to compare with (default: %(default)s)")
+    parser.add_argument("--save-baseline", action="store_true",
+                        help="store the results as the baseline instead of comparing")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE,
+                        help="relative change by which a metric may be worse than the baseline")
+    parser.add_argument("--record-fixtures", action="store_true",
+                        help="record the synopses of the man pages of this host as the fixtures "
+                             "and exit")
+    parser.add_argument("--json", metavar="FILE",
+                        help="also write the results as JSON to FILE ('-' for stdout)")
+    args = parser.parse_args()
+
+    if args.repeat < 1:
+        parser.error("--repeat must be at least 1")
+
+    if args.record_fixtures:
+        syscall_manuals = execute_syscall.load_syscall_definitions(PICKLE_FILE)
+        count = record_fixtures(MAN_FIXTURES, [sd.name for sd in syscall_manuals])
+        print("Recorded %d synopses of %d syscalls." % (count, len(syscall_manuals)))
+        return
+
+    results = run_benchmarks(args.repeat)
+
+    if args.save_baseline:
+        with open(args.baseline, "w") as baseline_file:
+            json.dump({"uname": " ".join(os.uname()), "python": sys.version.split()[0],
+                       "results": results}, baseline_file, indent=2, sort_keys=True)
+            baseline_file.write("\n")
+
+        for metric, _ in METRICS:
+            print("%-26s %14.1f" % (metric, results[metric]))
+        print("Saved the baseline to " + args.baseline)
+        return
+
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as baseline_file:
+            stored = json.load(baseline_file)
+        baseline = stored["results"]
+        print("baseline: %s, python %s" % (stored["uname"], stored["python"]))
+    else:
+        print("no baseline at %s, run with --save-baseline to store one" % args.baseline)
+
+    comparison = compare(results, baseline, args.tolerance)
+    print(format_comparison(comparison))
+
+    if args.json:
+        report = {"results": results, "baseline": baseline, "tolerance": args.tolerance}
+
+        if args.json == "-":
+            json.dump(report, sys.stdout, indent=2)
+            print("")
+        else:
+            with open(args.json, "w") as json_file:
+                json.dump(report, json_file, indent=2)
+
+    if any(regressed for _, _, _, _, regressed in comparison):
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,630 @@
+"""
+<Started>
+  October 2026
+
+<Purpose>
+  Execute a weighted mix of syscalls from several threads for a fixed time,
+  optionally at a target rate, and report the achieved throughput and latency
+  histograms every interval. Used to soak-test kernels and seccomp policies
+  under sustained load.
+
+  The mix is given as names with optional weights, e.g. "getpid:10 read:1",
+  or selected with the filters of execute_syscall (each syscall then has a
+  weight of 1). Each syscall is compiled into a CallPlan once, before the
+  threads start, and every thread executes the plans in a random order
+  following the weights. ctypes releases the GIL while a syscall executes, so
+  the threads enter the kernel concurrently; the Python code between calls
+  still runs one thread at a time, and the latency of a call includes waiting
+  for the GIL when it returns.
+
+  A rate limit applies to each thread (--rate-scope thread) or to all of them
+  together (--rate-scope global), in which case it is split evenly between the
+  threads. Calls are scheduled at fixed times from the start, so a thread that
+  falls behind catches up instead of silently lowering the rate, and
+  latencies are measured from the actual start of each call.
+
+  Each thread counts its calls, errors (calls setting errno) and latencies
+  (see sysDef/LatencyHistogram.py) per interval and hands them to the main
+  thread at the end of the interval, so threads share no state while they
+  run. A thread blocked in a syscall hands over its interval late and is
+  reported as stalled for that interval, and is then sent SIGALRM, which
+  interrupts the syscall with EINTR. A syscall can block on a file descriptor
+  another thread created, e.g. read() of file descriptor 0 after close(0)
+  and fanotify_init(). With --capture every call is also
+  recorded in a call log of its thread and the logs are written together at
+  the end, with the index of the thread as the argument set.
+
+  File descriptors created by syscalls such as open or pipe are closed after
+  each call, outside the timed region (see execute_syscall.close_new_fds), so
+  that long runs do not end up measuring EMFILE.
+
+  Example running this program:
+
+    python stress_syscall.py syscall_definitions.sdb getpid:10 read:2 lseek --threads 8 --duration 60
+    python stress_syscall.py syscall_definitions.sdb --category fd --rate 100000 --rate-scope global
+
+"""
+
+import argparse
+import collections
+import ctypes
+import json
+import random
+import signal
+import sys
+import threading
+import time
+
+import execute_syscall
+from sysDef import SyscallFilter
+from sysDef.BufferPool import BufferPool
+from sysDef.CallLog import CallLog
+from sysDef.LatencyHistogram import LatencyHistogram, bucket
+from sysDef.SyscallManual import SyscallManual
+
+
+DEFAULT_THREADS = 4
+DEFAULT_DURATION = 10.0
+DEFAULT_INTERVAL = 1.0
+
+# the number of plans drawn from the weighted mix in advance for each thread.
+# Threads cycle through them, so drawing costs nothing while they run.
+SCHEDULE_LENGTH = 4096
+
+# in addition to the syscalls never executed by execute_syscall, do not
+# execute fork, whose child would continue the stress run, nor syscalls that
+# block until a signal arrives, which would stall their thread every call.
+SKIP_SYSCALLS = execute_syscall.SKIP_SYSCALLS + execute_syscall.BLOCKING_SYSCALLS + ["fork"]
+
+# percentiles reported every interval.
+PERCENTILES = (50, 90, 99, 99.9)
+
+
+
+def parse_mix(items):
+    """
+    Returns an ordered dictionary of syscall names and their weights from
+    "name" or "name:weight" items. Raises an Exception for invalid weights.
+    """
+
+    mix = collections.OrderedDict()
+    for item in items:
+        name, _, weight = item.partition(":")
+        try:
+            weight = float(weight) if weight else 1.0
+        except ValueError:
+            weight = -1
+
+        if weight <= 0:
+            raise Exception("Invalid weight in " + item + ", expected name:weight with weight > 0")
+
+        mix[name] = mix.get(name, 0) + weight
+
+    return mix
+
+
+
+def compile_mix(syscall_definitions, mix=None, raw=False):
+    """
+    <Purpose>
+      Compiles the syscalls of a mix into CallPlans.
+
+    <Arguments>
+      syscall_definitions:
+        A list of SyscallManual objects.
+
+      mix:
+        A dictionary of syscall names and their weights, or None to give every
+        syscall a weight of 1.
+
+      raw:
+        Execute syscalls through syscall(2) instead of their libc wrappers.
+
+    <Exceptions>
+      None
+
+    <Side Effects>
+      Each plan takes its buffers from a BufferPool of its own, so that one
+      syscall writing to its buffers does not change the arguments of
+      another, e.g. the time written by clock_gettime becoming the duration
+      of nanosleep.
+
+    <Returns>
+      A tuple (plans, weights, skipped) where plans is a list of CallPlans,
+      weights the list of their weights and skipped a list of the names of the
+      syscalls that can not be executed.
+    """
+
+    compile_plan = execute_syscall.compile_raw_call_plan if raw else execute_syscall.compile_call_plan
+
+    plans = []
+    weights = []
+    skipped = []
+
+    for sd in syscall_definitions:
+        if mix is not None and sd.name not in mix:
+            continue
+
+        call_plan = None
+        if sd.type == SyscallManual.FOUND and sd.name not in SKIP_SYSCALLS:
+            call_plan = compile_plan(sd, BufferPool())
+
+        if call_plan is None:
+            skipped.append(sd.name)
+            continue
+
+        plans.append(call_plan)
+        weights.append(mix[sd.name] if mix is not None else 1.0)
+
+    return plans, weights, skipped
+
+
+
+class IntervalStats:
+    """
+    <Purpose>
+      What one thread, or all of them, did during one interval.
+
+    <Attributes>
+      self.index:
+        The index of the interval, from 0.
+
+      self.calls:
+        The number of calls.
+
+      self.errors:
+        The number of calls that set errno.
+
+      self.histogram:
+        A LatencyHistogram of the latencies of the calls.
+
+      self.seconds:
+        The length of the interval. The last interval of a run may be
+        shorter than the others.
+
+      self.stalled:
+        The number of threads that did not report the interval in time.
+
+    """
+
+    __slots__ = ("index", "seconds", "calls", "errors", "histogram", "stalled")
+
+    def __init__(self, index, seconds=None):
+        self.index = index
+        self.seconds = seconds
+        self.calls = 0
+        self.errors = 0
+        self.histogram = LatencyHistogram()
+        self.stalled = 0
+
+
+    def add(self, other):
+        self.calls += other.calls
+        self.errors += other.errors
+        self.histogram.add(other.histogram)
+
+
+
+class StressThread(threading.Thread):
+    """
+    <Purpose>
+      A thread executing a schedule of CallPlans until the end of a stress
+      run.
+
+    <Attributes>
+      self.number:
+        The index of the thread, from 0.
+
+      self.intervals:
+        A list of the IntervalStats of the finished intervals, appended to by
+        the thread and read by the main thread.
+
+      self.totals:
+        A dictionary of the [calls, errors] of each syscall during the run.
+
+      self.call_log:
+        A CallLog every call is recorded in, or None.
+
+    """
+
+    def __init__(self, number, schedule, start_ns, end_ns, interval_ns, period_ns=None,
+                 first_call_ns=None, call_log=None):
+        threading.Thread.__init__(self, name="stress-%d" % number)
+        self.daemon = True
+
+        self.number = number
+        self.intervals = []
+        self.totals = {}
+        self.call_log = call_log
+
+        # syscalls writing new file descriptors to an array get an array of
+        # their own in every thread, so that each thread closes the file
+        # descriptors it created.
+        own_plans = {}
+        for plan in schedule:
+            if plan.name in execute_syscall.FD_PAIR_SYSCALLS and plan not in own_plans:
+                own_plans[plan] = plan.with_argvalues(
+                    [type(argvalue)() if isinstance(argvalue, ctypes.Array) else argvalue
+                     for argvalue in plan.argvalues])
+
+        self._schedule = [own_plans.get(plan, plan) for plan in schedule]
+        self._start_ns = start_ns
+        self._end_ns = end_ns
+        self._interval_ns = interval_ns
+        self._period_ns = period_ns
+        self._first_call_ns = start_ns if first_call_ns is None else first_call_ns
+
+
+    def run(self):
+        perf_counter_ns = time.perf_counter_ns
+        set_errno = ctypes.set_errno
+        get_errno = ctypes.get_errno
+        call_log = self.call_log
+        number = self.number
+        schedule = self._schedule
+        length = len(schedule)
+        close_new_fds = execute_syscall.close_new_fds
+        creates_fds = set(plan.name for plan in schedule
+                          if execute_syscall.creates_fds(plan.name))
+        end_ns = self._end_ns
+        period_ns = self._period_ns
+
+        # calls per syscall and the errors among them.
+        calls = collections.Counter()
+        errors = collections.Counter()
+
+        interval = IntervalStats(0)
+        interval_end_ns = self._start_ns + self._interval_ns
+        histogram_counts = interval.histogram.counts
+
+        next_ns = self._first_call_ns
+        position = 0
+
+        # start together with the other threads.
+        time.sleep(max(self._start_ns - perf_counter_ns(), 0) / 1e9)
+
+        while True:
+            now_ns = perf_counter_ns()
+
+            while now_ns >= interval_end_ns:
+                self.intervals.append(interval)
+                interval = IntervalStats(interval.index + 1)
+                histogram_counts = interval.histogram.counts
+                interval_end_ns += self._interval_ns
+
+            if now_ns >= end_ns:
+                break
+
+            if period_ns is not None:
+                if next_ns > now_ns:
+                    # wake up for the next call or to hand over the interval.
+                    time.sleep((min(next_ns, interval_end_ns, end_ns) - now_ns) / 1e9)
+                    continue
+                next_ns += period_ns
+
+            call_plan = schedule[position]
+            position += 1
+            if position == length:
+                position = 0
+
+            set_errno(0)
+            start_ns = perf_counter_ns()
+            return_value = call_plan()
+            call_end_ns = perf_counter_ns()
+            errno = get_errno()
+
+            latency_ns = call_end_ns - start_ns
+            histogram_counts[bucket(latency_ns)] += 1
+            histogram = interval.histogram
+            histogram.count += 1
+            histogram.total_ns += latency_ns
+            if latency_ns > histogram.max_ns:
+                histogram.max_ns = latency_ns
+
+            interval.calls += 1
+            calls[call_plan.name] += 1
+            if errno:
+                interval.errors += 1
+                errors[call_plan.name] += 1
+
+            if call_log is not None:
+                call_log.record(call_plan.name, number, return_value, errno, start_ns,
+                                call_end_ns)
+
+            if call_plan.name in creates_fds:
+                close_new_fds(call_plan, return_value)
+
+        # the last interval ends with the run.
+        self.intervals.append(interval)
+
+        for name in calls:
+            self.totals[name] = [calls[name], errors[name]]
+
+
+
+def stress(plans, weights, threads=DEFAULT_THREADS, duration=DEFAULT_DURATION,
+           interval=DEFAULT_INTERVAL, rate=None, rate_scope="thread", capture=False,
+           report=None, seed=None):
+    """
+    <Purpose>
+      Executes a weighted mix of CallPlans from several threads for a fixed
+      time.
+
+    <Arguments>
+      plans:
+        A list of CallPlans.
+
+      weights:
+        The list of the weights of the plans.
+
+      threads:
+        The number of threads.
+
+      duration:
+        The number of seconds to run for.
+
+      interval:
+        The number of seconds between reports.
+
+      rate:
+        The number of calls per second to execute, or None for as many as
+        possible.
+
+      rate_scope:
+        "thread" if rate applies to each thread, "global" if it applies to all
+        threads together.
+
+      capture:
+        Record every call in a CallLog.
+
+      report:
+        A function called with the IntervalStats of all threads at the end of
+        each interval, or None.
+
+      seed:
+        The seed of the random order of the calls, or None.
+
+    <Exceptions>
+      None
+
+    <Side Effects>
+      The syscalls are executed.
+
+    <Returns>
+      A tuple (total, intervals, totals, call_log) where total is the
+      IntervalStats of the whole run, intervals the list of the IntervalStats
+      of each interval, totals a dictionary of the [calls, errors] of each
+      syscall and call_log the CallLog of all calls, or None.
+    """
+
+    period_ns = None
+    if rate:
+        per_thread = rate / float(threads) if rate_scope == "global" else rate
+        period_ns = int(1e9 / per_thread)
+
+    interval_ns = int(interval * 1e9)
+    generator = random.Random(seed)
+
+    # threads start together, shortly after they are created.
+    start_ns = time.perf_counter_ns() + 10000000
+    end_ns = start_ns + int(duration * 1e9)
+
+    workers = []
+    for number in range(threads):
+        schedule = generator.choices(plans, weights, k=SCHEDULE_LENGTH)
+        call_log = CallLog() if capture else None
+
+        # with a rate limit, the calls of the threads are staggered evenly
+        # over a period.
+        first_call_ns = start_ns
+        if period_ns is not None:
+            first_call_ns += period_ns * number // threads
+
+        workers.append(StressThread(number, schedule, start_ns, end_ns, interval_ns,
+                                    period_ns, first_call_ns, call_log))
+
+    # the handler does nothing; the signal only interrupts the syscall a
+    # stalled thread is blocked in.
+    previous_handler = signal.signal(signal.SIGALRM, _interrupt)
+    signal.siginterrupt(signal.SIGALRM, True)
+
+    try:
+        for worker in workers:
+            worker.start()
+
+        intervals = []
+        index = 0
+        interval_count = -(-(end_ns - start_ns) // interval_ns)
+
+        # report each interval once all threads handed it over, or shortly
+        # after it ended, counting the threads that did not as stalled.
+        grace_ns = min(interval_ns // 10, 100000000)
+        while index < interval_count:
+            deadline_ns = start_ns + (index + 1) * interval_ns + grace_ns
+            while (time.perf_counter_ns() < deadline_ns and
+                   any(len(worker.intervals) <= index for worker in workers)):
+                time.sleep(min(0.01, interval / 10.0))
+
+            merged = IntervalStats(index, min(interval, duration - index * interval))
+            for worker in workers:
+                if len(worker.intervals) > index:
+                    merged.add(worker.intervals[index])
+                else:
+                    merged.stalled += 1
+                    _interrupt_thread(worker)
+
+            intervals.append(merged)
+            if report is not None:
+                report(merged)
+            index += 1
+
+        for worker in workers:
+            worker.join(max((end_ns - time.perf_counter_ns()) / 1e9, 0) + 0.5)
+            if worker.is_alive():
+                _interrupt_thread(worker)
+                worker.join(0.5)
+
+    finally:
+        signal.signal(signal.SIGALRM, previous_handler)
+
+    total = IntervalStats(None, duration)
+    for merged in intervals:
+        total.add(merged)
+
+    # a stalled thread's calls are in the totals once it finishes.
+    totals = {}
+    for worker in workers:
+        for name, (calls, errors) in worker.totals.items():
+            counts = totals.setdefault(name, [0, 0])
+            counts[0] += calls
+            counts[1] += errors
+
+    call_log = None
+    if capture:
+        call_log = CallLog(sum(len(worker.call_log) for worker in workers))
+        for worker in workers:
+            for row in worker.call_log.rows():
+                call_log.record(*row)
+
+    return total, intervals, totals, call_log
+
+
+
+def _interrupt(signum, frame):
+    pass
+
+
+
+def _interrupt_thread(worker):
+    if worker.is_alive():
+        signal.pthread_kill(worker.ident, signal.SIGALRM)
+
+
+
+def format_interval(stats, interval):
+    """
+    Returns a line reporting the IntervalStats of an interval of a run
+    reporting every interval seconds.
+    """
+
+    histogram = stats.histogram
+    line = "%8.1fs  %10.0f calls/s  %6d errors  " % (
+        stats.index * interval + stats.seconds, stats.calls / stats.seconds, stats.errors)
+    line += "  ".join("p%s %6d" % (("%g" % p), histogram.percentile(p)) for p in PERCENTILES)
+    line += "  max %8d ns" % histogram.max_ns
+
+    if stats.stalled:
+        line += "  (%d stalled)" % stats.stalled
+
+    return line
+
+
+
+def interval_to_json(stats, interval):
+    return {
+        "end_s": stats.index * interval + stats.seconds,
+        "calls": stats.calls,
+        "errors": stats.errors,
+        "calls_per_sec": stats.calls / stats.seconds,
+        "stalled_threads": stats.stalled,
+        "percentiles_ns": dict(("p%g" % p, stats.histogram.percentile(p)) for p in PERCENTILES),
+        "max_ns": stats.histogram.max_ns,
+        "histogram": [list(item) for item in stats.histogram.buckets()],
+    }
+
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Execute a weighted mix of syscalls from several threads.")
+    parser.add_argument("database",
+                        help="definition database or pickle file to read syscall definitions from")
+    parser.add_argument("mix", nargs="*", metavar="NAME[:WEIGHT]",
+                        help="syscalls to execute and their relative weights "
+                             "(default: the selected syscalls, with equal weights)")
+    SyscallFilter.add_arguments(parser)
+    parser.add_argument("--threads", type=int, default=DEFAULT_THREADS,
+                        help="number of threads executing syscalls")
+    parser.add_argument("--duration", type=float, default=DEFAULT_DURATION,
+                        help="seconds to run for")
+    parser.add_argument("--interval", type=float, default=DEFAULT_INTERVAL,
+                        help="seconds between reports")
+    parser.add_argument("--rate", type=float,
+                        help="calls per second (default: as many as possible)")
+    parser.add_argument("--rate-scope", choices=("thread", "global"), default="thread",
+                        help="whether --rate applies to each thread or to all of them")
+    parser.add_argument("--raw", action="store_true",
+                        help="execute syscalls through syscall(2) instead of their libc wrappers")
+    parser.add_argument("--seed", type=int,
+                        help="seed of the random order of the calls")
+    parser.add_argument("--capture", metavar="FILE",
+                        help="record the return value, errno and timing of every call to FILE "
+                             "(CSV if it ends in .csv, binary columns otherwise)")
+    parser.add_argument("--json", metavar="FILE",
+                        help="also write the interval reports as JSON to FILE ('-' for stdout)")
+    args = parser.parse_intermixed_args()
+
+    if args.threads < 1:
+        parser.error("--threads must be at least 1")
+    if args.duration <= 0 or args.interval <= 0:
+        parser.error("--duration and --interval must be positive")
+
+    try:
+        mix = parse_mix(args.mix) if args.mix else None
+    except Exception as e:
+        parser.error(str(e))
+
+    syscall_filter = SyscallFilter.from_arguments(args, list(mix) if mix else ())
+    syscall_definitions = execute_syscall.load_syscall_definitions(
+        args.database, syscall_filter=syscall_filter)
+
+    execute_syscall.init()
+
+    plans, weights, skipped = compile_mix(syscall_definitions, mix, args.raw)
+    if skipped:
+        print("not executed: " + ", ".join(skipped))
+    if not plans:
+        print("no syscalls to execute")
+        return
+
+    print("%d syscalls, %d threads, %gs" % (len(plans), args.threads, args.duration))
+
+    total, intervals, totals, call_log = stress(
+        plans, weights, args.threads, args.duration, args.interval, args.rate,
+        args.rate_scope, args.capture is not None,
+        lambda stats: print(format_interval(stats, args.interval), flush=True), args.seed)
+
+    print("")
+    print("total: %d calls, %.0f calls/s, %d errors" %
+          (total.calls, total.calls / args.duration, total.errors))
+    print(total.histogram.format_bars())
+
+    print("")
+    for name, (calls, errors) in sorted(totals.items(), key=lambda item: -item[1][0]):
+        print("%-24s %12d calls  %10d errors" % (name, calls, errors))
+
+    if call_log is not None:
+        call_log.write(args.capture)
+
+    if args.json:
+        report = {
+            "threads": args.threads,
+            "duration_s": args.duration,
+            "interval_s": args.interval,
+            "rate": args.rate,
+            "rate_scope": args.rate_scope,
+            "mix": dict((plan.name, weight) for plan, weight in zip(plans, weights)),
+            "intervals": [interval_to_json(stats, args.interval) for stats in intervals],
+            "totals": dict((name, {"calls": calls, "errors": errors})
+                           for name, (calls, errors) in totals.items()),
+        }
+
+        if args.json == "-":
+            json.dump(report, sys.stdout, indent=2)
+            print("")
+        else:
+            with open(args.json, "w") as json_file:
+                json.dump(report, json_file, indent=2)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,406 @@
+"""
+<Started>
+  October 2026
+
+<Purpose>
+  Execute syscalls in a pool of forked worker processes, isolating the sweep
+  from syscalls that crash, hang or terminate the process executing them.
+
+  Each worker is a forked copy of this process, pinned to a CPU, that executes
+  the syscalls it is sent one at a time and reports back how each one went. A
+  worker that is killed by a signal (e.g. a segfault), does not report back
+  within the timeout or exits (e.g. exit) is recorded against the syscall it
+  was executing and replaced by a new worker, and the sweep goes on. Hence,
+  unlike execute_syscall, no syscalls have to be skipped.
+
+  Within a worker each syscall also runs under an execute_syscall.Watchdog, so
+  a syscall that blocks but returns on a signal (e.g. pause) is interrupted
+  and recorded as timed out without losing the worker.
+
+  If a syscall creates a new process (e.g. fork) the new process exits as soon
+  as the syscall returns in it, so that it does not act as a second worker.
+
+  Example running this program:
+
+    python sweep_syscall.py syscall_definitions.sdb --workers 8 --timeout 2
+
+"""
+
+import argparse
+import json
+import os
+import selectors
+import signal
+import sys
+import time
+
+import execute_syscall
+from sysDef.SyscallManual import SyscallManual
+
+
+DEFAULT_TIMEOUT = 5.0
+
+# outcomes of executing a syscall.
+OK = "ok"                  # the syscall returned.
+UNSUPPORTED = "unsupported"    # the syscall could not be compiled.
+SIGNALED = "signal"        # the worker was killed by a signal.
+TIMEOUT = "timeout"        # the syscall did not return within the timeout.
+EXITED = "exited"          # the worker exited while executing the syscall.
+ERROR = "error"            # an exception was raised while executing the syscall.
+
+
+class _Worker:
+    """
+    The parent's view of a worker process: its pid, the pipes to and from it
+    and the syscall it is currently executing.
+    """
+
+    def __init__(self, pid, task_fd, result_file):
+        self.pid = pid
+        self.task_fd = task_fd
+        self.result_file = result_file
+        self.task = None
+        self.started = None
+        self.tasks_done = 0
+
+
+def _worker_main(syscall_definitions, task_fd, result_fd, raw, syscall_timeout):
+    """
+    The loop run by a worker process. Reads syscall names from task_fd,
+    executes them and writes one JSON line per syscall to result_fd. Never
+    returns.
+    """
+
+    worker_pid = os.getpid()
+    task_file = os.fdopen(task_fd, "r")
+
+    # workers never return, so the watchdog is entered but never left.
+    watchdog = execute_syscall.Watchdog(syscall_timeout)
+    watchdog.__enter__()
+
+    while True:
+        name = task_file.readline().strip()
+        if not name:
+            os._exit(0)
+
+        result = {"name": name}
+        try:
+            if raw:
+                call_plan = execute_syscall.compile_raw_call_plan(syscall_definitions[name])
+            else:
+                call_plan = execute_syscall.compile_call_plan(syscall_definitions[name])
+
+            if call_plan is None:
+                result["status"] = UNSUPPORTED
+            else:
+                start = time.perf_counter()
+                result["return"] = watchdog.call(call_plan)
+                result["elapsed"] = time.perf_counter() - start
+                result["status"] = OK
+
+                if watchdog.timeouts:
+                    result["status"] = TIMEOUT
+                    del watchdog.timeouts[:]
+
+        except Exception as e:
+            result["status"] = ERROR
+            result["detail"] = repr(e)
+
+        # the syscall created a new process (fork, clone, ...). It must not
+        # continue as a worker.
+        if os.getpid() != worker_pid:
+            os._exit(0)
+
+        os.write(result_fd, (json.dumps(result) + "\n").encode("utf-8"))
+
+
+
+class SweepExecutor:
+    """
+    <Purpose>
+      Executes syscalls in a pool of crash-isolated worker processes.
+
+    <Attributes>
+      self.workers:
+        The number of worker processes.
+
+      self.timeout:
+        The number of seconds a syscall may take before its worker is killed.
+
+      self.raw:
+        Whether syscalls are executed through syscall(2) instead of their libc
+        wrappers.
+
+      self.max_tasks:
+        The number of syscalls a worker executes before it is replaced by a
+        fresh one, or None for no limit. Setting this to 1 isolates syscalls
+        from the side effects of those executed before them.
+
+      self.syscall_timeout:
+        The number of seconds a syscall may block before the watchdog of its
+        worker interrupts it, or None for no limit. Should be less than
+        self.timeout.
+
+    """
+
+    def __init__(self, workers=None, timeout=DEFAULT_TIMEOUT, raw=False, max_tasks=None,
+                 syscall_timeout=execute_syscall.SYSCALL_TIMEOUT):
+        if workers is None:
+            workers = os.cpu_count() or 1
+
+        self.workers = workers
+        self.timeout = timeout
+        self.raw = raw
+        self.max_tasks = max_tasks
+        self.syscall_timeout = syscall_timeout
+
+        self._cpus = sorted(os.sched_getaffinity(0))
+        self._next_cpu = 0
+
+        # the parent's ends of the pipes of all live workers. New workers close
+        # them, otherwise a worker would never see the pipes of another worker
+        # being closed.
+        self._parent_fds = set()
+
+
+    def run(self, syscall_definitions):
+        """
+        <Purpose>
+          Executes each of the given syscalls of type FOUND once, in a worker
+          process.
+
+        <Arguments>
+          syscall_definitions:
+            A list of SyscallManual objects.
+
+        <Exceptions>
+          None
+
+        <Side Effects>
+          Forks worker processes, which execute the syscalls.
+
+        <Returns>
+          A list of result dictionaries, one per executed syscall, in the order
+          of syscall_definitions. Each has the name and status (one of OK,
+          UNSUPPORTED, SIGNALED, TIMEOUT, EXITED, ERROR) of the syscall and,
+          depending on the status, its return value, elapsed seconds or a detail
+          string such as the signal name.
+        """
+
+        definitions = {}
+        for sd in syscall_definitions:
+            if sd.type == SyscallManual.FOUND:
+                definitions[sd.name] = sd
+
+        pending = list(definitions)
+        pending.reverse()
+        results = {}
+
+        selector = selectors.DefaultSelector()
+        workers = []
+
+        try:
+            for _ in range(min(self.workers, len(pending))):
+                workers.append(self._start_worker(definitions, selector))
+
+            for worker in workers:
+                self._assign(worker, pending)
+
+            while any(worker.task is not None for worker in workers):
+                now = time.monotonic()
+                deadline = min(worker.started + self.timeout
+                               for worker in workers if worker.task is not None)
+
+                events = selector.select(max(deadline - now, 0))
+
+                for key, _ in events:
+                    worker = key.data
+                    line = worker.result_file.readline()
+
+                    if line:
+                        result = json.loads(line)
+                        results[result["name"]] = result
+                        worker.task = None
+                        worker.tasks_done += 1
+
+                        if self.max_tasks is not None and worker.tasks_done >= self.max_tasks:
+                            worker = self._replace_worker(worker, workers, definitions, selector)
+                    else:
+                        # the worker died while executing its task.
+                        results[worker.task] = self._collect(worker, selector)
+                        worker = self._replace_worker(worker, workers, definitions, selector,
+                                                      collected=True)
+
+                    self._assign(worker, pending)
+
+                # kill the workers whose syscall did not return in time.
+                now = time.monotonic()
+                for worker in list(workers):
+                    if worker.task is not None and now - worker.started >= self.timeout:
+                        os.kill(worker.pid, signal.SIGKILL)
+                        self._collect(worker, selector)
+                        results[worker.task] = {"name": worker.task, "status": TIMEOUT,
+                                                "elapsed": now - worker.started}
+                        worker = self._replace_worker(worker, workers, definitions, selector,
+                                                      collected=True)
+                        self._assign(worker, pending)
+
+        finally:
+            for worker in workers:
+                self._stop_worker(worker, selector)
+            selector.close()
+
+        return [results[name] for name in definitions if name in results]
+
+
+    def _start_worker(self, definitions, selector):
+        task_read, task_write = os.pipe()
+        result_read, result_write = os.pipe()
+
+        # flush so buffered output is not written by both processes.
+        sys.stdout.flush()
+        sys.stderr.flush()
+
+        cpu = self._cpus[self._next_cpu % len(self._cpus)]
+        self._next_cpu += 1
+
+        pid = os.fork()
+        if pid == 0:
+            try:
+                os.close(task_write)
+                os.close(result_read)
+                for fd in self._parent_fds:
+                    os.close(fd)
+                os.sched_setaffinity(0, [cpu])
+                _worker_main(definitions, task_read, result_write, self.raw,
+                             self.syscall_timeout)
+            finally:
+                os._exit(1)
+
+        os.close(task_read)
+        os.close(result_write)
+
+        self._parent_fds.update((task_write, result_read))
+
+        worker = _Worker(pid, task_write, os.fdopen(result_read, "r"))
+        selector.register(worker.result_file, selectors.EVENT_READ, worker)
+        return worker
+
+
+    def _assign(self, worker, pending):
+        if not pending:
+            return
+
+        worker.task = pending.pop()
+        worker.started = time.monotonic()
+        os.write(worker.task_fd, (worker.task + "\n").encode("utf-8"))
+
+
+    def _collect(self, worker, selector):
+        """
+        Reaps a dead (or killed) worker and returns the result describing how
+        it died.
+        """
+
+        self._close_pipes(worker, selector)
+
+        _, status = os.waitpid(worker.pid, 0)
+        result = {"name": worker.task, "elapsed": time.monotonic() - worker.started}
+
+        if os.WIFSIGNALED(status):
+            signum = os.WTERMSIG(status)
+            result["status"] = SIGNALED
+            result["detail"] = signal.Signals(signum).name
+        else:
+            result["status"] = EXITED
+            result["detail"] = "exit status %d" % os.WEXITSTATUS(status)
+
+        return result
+
+
+    def _close_pipes(self, worker, selector):
+        self._parent_fds.difference_update((worker.task_fd, worker.result_file.fileno()))
+        selector.unregister(worker.result_file)
+        worker.result_file.close()
+        os.close(worker.task_fd)
+
+
+    def _replace_worker(self, worker, workers, definitions, selector, collected=False):
+        if not collected:
+            self._stop_worker(worker, selector)
+
+        new_worker = self._start_worker(definitions, selector)
+        workers[workers.index(worker)] = new_worker
+        return new_worker
+
+
+    def _stop_worker(self, worker, selector):
+        if worker.result_file.closed:
+            return
+
+        # closing the task pipe tells an idle worker to exit.
+        self._close_pipes(worker, selector)
+        if worker.task is not None:
+            os.kill(worker.pid, signal.SIGKILL)
+
+        os.waitpid(worker.pid, 0)
+
+
+
+def format_results(results):
+    """
+    Returns the sweep results formatted as text, one syscall per line.
+    """
+
+    lines = []
+    for result in results:
+        line = result["name"].ljust(24) + result["status"].ljust(12)
+        if result["status"] == OK:
+            line += "returned " + str(result["return"])
+        elif "detail" in result:
+            line += result["detail"]
+        elif result["status"] == TIMEOUT:
+            line += "after %.1fs" % result["elapsed"]
+        lines.append(line)
+
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Execute syscalls in crash-isolated worker processes.")
+    parser.add_argument("database",
+                        help="definition database or pickle file to read syscall definitions from")
+    parser.add_argument("syscalls", nargs="*",
+                        help="names of the syscalls to execute (default: all)")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="number of worker processes (default: number of CPUs)")
+    parser.add_argument("--timeout", type=float, default=DEFAULT_TIMEOUT,
+                        help="seconds a syscall may take before its worker is killed")
+    parser.add_argument("--syscall-timeout", type=float, default=execute_syscall.SYSCALL_TIMEOUT,
+                        help="seconds a syscall may block before it is interrupted within its worker (0 for no limit)")
+    parser.add_argument("--max-tasks", type=int, default=None,
+                        help="replace each worker after executing this many syscalls")
+    parser.add_argument("--raw", action="store_true",
+                        help="execute syscalls through syscall(2) instead of their libc wrappers")
+    parser.add_argument("--json", metavar="FILE",
+                        help="also write the results as JSON to FILE")
+    args = parser.parse_intermixed_args()
+
+    execute_syscall.init()
+
+    syscall_definitions = execute_syscall.load_syscall_definitions(
+        args.database, args.syscalls or None)
+
+    executor = SweepExecutor(args.workers, args.timeout, args.raw, args.max_tasks,
+                             args.syscall_timeout or None)
+    results = executor.run(syscall_definitions)
+
+    print(format_results(results))
+
+    if args.json:
+        with open(args.json, "w") as json_file:
+            json.dump(results, json_file, indent=2)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,151 @@
+"""
+<Started>
+  October 2026
+
+<Purpose>
+  Preallocated, reusable memory for the pointer arguments of system calls.
+
+  Each buffer is an anonymous memory mapping followed by an inaccessible guard
+  page, with the structure placed at the start of the mapping. The rest of the
+  mapping is zeroed slack, room for at least MIN_ELEMENTS structures and
+  for as many as fit in the pages of the buffer. Libc wrappers and kernels
+  that treat a pointer as an array, e.g. utimes() reading times[1], or that
+  use a larger structure than the layout, e.g. struct stat on aarch64, find
+  zeroed memory there.
+
+  The guard page only bounds the damage of a system call running far past the
+  slack, e.g. because of a count argument much larger than the buffer. The
+  kernel then fails with EFAULT, but libc wrappers that touch the memory
+  themselves get SIGSEGV, so the slack must cover every access of a wrapper.
+  Buffers never live in the heap, so syscalls such as brk() can not release
+  them either.
+
+  Buffers are allocated once per (layout, slot) and handed out again, zeroed,
+  each time they are acquired, so executing a syscall repeatedly does no
+  allocation. The slot tells apart buffers of the same layout used by the same
+  syscall, e.g. the two timespec arguments of nanosleep.
+
+"""
+
+import ctypes
+import mmap
+
+from . import StructLayouts
+
+
+# size of the buffers of void * arguments.
+SCRATCH_SIZE = 4096
+
+# the number of elements of its layout every buffer has room for, so that a
+# pointer to a structure can be read as an array of two, e.g. by utimes() and
+# futimesat() given an unsized times argument.
+MIN_ELEMENTS = 2
+
+_mprotect = ctypes.CDLL(None, use_errno=True).mprotect
+_mprotect.argtypes = [ctypes.c_void_p, ctypes.c_size_t, ctypes.c_int]
+_mprotect.restype = ctypes.c_int
+
+# mprotect protection making a page inaccessible.
+_PROT_NONE = 0
+
+
+class BufferPool:
+    """
+    <Purpose>
+      A pool of guarded buffers for structure and void * arguments.
+
+      Buffers are shared by everything acquiring the same (layout, slot) from
+      the pool, so a call plan should be executed before another one using the
+      same buffers is compiled. Plans executed in any order, e.g. those of a
+      stress mix, each need a pool of their own.
+
+    <Attributes>
+      self.allocated:
+        The number of buffers allocated so far.
+
+    """
+
+    def __init__(self):
+        self.allocated = 0
+
+        # (name, slot) -> (mapping, buffer, usable size)
+        self._buffers = {}
+
+
+    def acquire(self, name, slot=0):
+        """
+        <Purpose>
+          Returns the zeroed buffer of a structure.
+
+        <Arguments>
+          name:
+            The name of the structure as it appears in definitions.
+
+          slot:
+            Which of the buffers of this structure to return.
+
+        <Exceptions>
+          None
+
+        <Side Effects>
+          The buffer is allocated on first use and zeroed.
+
+        <Returns>
+          An instance of the registered ctypes layout of the structure, or
+          None if no layout is registered for it.
+        """
+
+        layout = StructLayouts.get_layout(name)
+        if layout is None:
+            return None
+
+        return self._acquire(layout, name, slot)
+
+
+    def buffer(self, layout, slot=0):
+        """
+        Returns the zeroed buffer of the given slot for any ctypes type, e.g.
+        ctypes.c_int for an int * argument.
+        """
+
+        return self._acquire(layout, layout.__name__, slot)
+
+
+    def scratch(self, slot=0):
+        """
+        Returns the zeroed scratch buffer of the given slot, for void *
+        arguments. The buffer is a ctypes array of SCRATCH_SIZE bytes.
+        """
+
+        return self._acquire(ctypes.c_ubyte * SCRATCH_SIZE, "void", slot)
+
+
+    def _acquire(self, layout, name, slot):
+        key = (name, slot)
+
+        entry = self._buffers.get(key)
+        if entry is None or type(entry[1]) is not layout:
+            entry = self._allocate(layout)
+            self._buffers[key] = entry
+        else:
+            # the slack is zeroed too, since a previous call may have written
+            # past the structure.
+            ctypes.memset(ctypes.addressof(entry[1]), 0, entry[2])
+
+        return entry[1]
+
+
+    def _allocate(self, layout):
+        size = ctypes.sizeof(layout) * MIN_ELEMENTS
+        usable = -(-size // mmap.PAGESIZE) * mmap.PAGESIZE
+
+        # anonymous mappings are zeroed.
+        mapping = mmap.mmap(-1, usable + mmap.PAGESIZE)
+        base = ctypes.addressof(ctypes.c_ubyte.from_buffer(mapping))
+
+        if _mprotect(base + usable, mmap.PAGESIZE, _PROT_NONE) != 0:
+            raise Exception("Could not create guard page: " +
+                            str(ctypes.get_errno()))
+
+        self.allocated += 1
+        return mapping, layout.from_buffer(mapping), usable
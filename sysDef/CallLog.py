@@ -0,0 +1,268 @@
+"""
+<Started>
+  October 2026
+
+<Purpose>
+  Record every executed syscall in preallocated columns instead of one Python
+  object per call.
+
+  For each call the syscall, the id of its argument set, its return value, its
+  errno and the start and end times (time.perf_counter_ns) are stored in typed
+  arrays, one per column. Syscall names are stored once and referred to by
+  index. Columns start with room for a number of calls and double in size
+  when full, so recording a call allocates nothing most of the time.
+
+  A log is written to a CSV file or to a binary columnar file:
+
+    SYSCOLS 1 <byte order>
+    <number of calls>
+    <syscall name>\t<syscall name>\t...
+    <column name> <array typecode>        <-- one per column
+    ...
+    <column data>                         <-- one per column, in order
+
+  where the data of each column is the bytes of its array, in the given byte
+  order.
+
+"""
+
+import array
+import csv
+import ctypes
+import sys
+import time
+
+
+DEFAULT_CAPACITY = 4096
+
+MAGIC = b"SYSCOLS"
+VERSION = 1
+
+# column names and their array typecodes.
+COLUMNS = (
+    ("syscall", "H"),
+    ("argument_set", "q"),
+    ("return", "q"),
+    ("errno", "i"),
+    ("start_ns", "q"),
+    ("end_ns", "q"),
+)
+
+
+class CallLog:
+    """
+    <Purpose>
+      A columnar log of executed syscalls.
+
+    <Attributes>
+      self.names:
+        The names of the logged syscalls. The syscall column holds indexes
+        into this list.
+
+      self.columns:
+        A dictionary of the arrays of each column, by column name. Only the
+        first len(self) items of each array are used.
+
+    """
+
+    def __init__(self, capacity=DEFAULT_CAPACITY):
+        self.names = []
+        self._name_ids = {}
+        self._length = 0
+        self._capacity = max(capacity, 1)
+
+        self.columns = {}
+        for name, typecode in COLUMNS:
+            self.columns[name] = array.array(typecode, bytes(array.array(typecode).itemsize *
+                                                            self._capacity))
+
+        self._syscall = self.columns["syscall"]
+        self._argument_set = self.columns["argument_set"]
+        self._return = self.columns["return"]
+        self._errno = self.columns["errno"]
+        self._start_ns = self.columns["start_ns"]
+        self._end_ns = self.columns["end_ns"]
+
+
+    def __len__(self):
+        return self._length
+
+
+    def call(self, call_plan, argument_set=0):
+        """
+        <Purpose>
+          Executes a CallPlan and records the call.
+
+        <Arguments>
+          call_plan:
+            The CallPlan to execute. Its function must have been loaded with
+            use_errno=True for errno to be recorded.
+
+          argument_set:
+            The id of the argument set the call plan was compiled with.
+
+        <Exceptions>
+          None
+
+        <Side Effects>
+          The call plan is executed.
+
+        <Returns>
+          The return value of the call.
+        """
+
+        ctypes.set_errno(0)
+        start_ns = time.perf_counter_ns()
+        return_value = call_plan()
+        end_ns = time.perf_counter_ns()
+
+        self.record(call_plan.name, argument_set, return_value, ctypes.get_errno(),
+                    start_ns, end_ns)
+
+        return return_value
+
+
+    def record(self, syscall_name, argument_set, return_value, errno, start_ns, end_ns):
+        """
+        Records a call. A return value of None (a NULL pointer) is recorded as
+        0 and unsigned values that do not fit in 64 signed bits wrap around.
+        """
+
+        index = self._length
+        if index == self._capacity:
+            self._grow()
+
+        name_id = self._name_ids.get(syscall_name)
+        if name_id is None:
+            name_id = len(self.names)
+            self.names.append(syscall_name)
+            self._name_ids[syscall_name] = name_id
+
+        if return_value is None:
+            return_value = 0
+
+        self._syscall[index] = name_id
+        self._argument_set[index] = argument_set
+        try:
+            self._return[index] = return_value
+        except OverflowError:
+            self._return[index] = return_value - 2 ** 64
+        self._errno[index] = errno
+        self._start_ns[index] = start_ns
+        self._end_ns[index] = end_ns
+
+        self._length = index + 1
+
+
+    def rows(self):
+        """
+        Yields a tuple per recorded call with the syscall name followed by the
+        values of the other columns.
+        """
+
+        columns = [self.columns[name] for name, _ in COLUMNS[1:]]
+        for index in range(self._length):
+            yield (self.names[self._syscall[index]],) + tuple(column[index] for column in columns)
+
+
+    def write(self, path):
+        """
+        Writes the log to path, as CSV if path ends in .csv and as a binary
+        columnar file otherwise.
+        """
+
+        if path.endswith(".csv"):
+            self.write_csv(path)
+        else:
+            self.write_columns(path)
+
+
+    def write_csv(self, path):
+        """
+        Writes the log to a CSV file with a header row.
+        """
+
+        with open(path, "w", newline="") as csv_file:
+            writer = csv.writer(csv_file)
+            writer.writerow([name for name, _ in COLUMNS])
+            writer.writerows(self.rows())
+
+
+    def write_columns(self, path):
+        """
+        Writes the log to a binary columnar file. See the format above.
+        """
+
+        with open(path, "wb") as columns_file:
+            columns_file.write(b"%s %d %s\n" % (MAGIC, VERSION, sys.byteorder.encode("ascii")))
+            columns_file.write(b"%d\n" % self._length)
+            columns_file.write("\t".join(self.names).encode("utf-8") + b"\n")
+
+            for name, typecode in COLUMNS:
+                columns_file.write(("%s %s\n" % (name, typecode)).encode("ascii"))
+
+            for name, _ in COLUMNS:
+                columns_file.write(memoryview(self.columns[name])[:self._length].tobytes())
+
+
+    @staticmethod
+    def read_columns(path):
+        """
+        <Purpose>
+          Reads a log written by write_columns.
+
+        <Arguments>
+          path:
+            The path of the binary columnar file.
+
+        <Exceptions>
+          An Exception is raised if the file is not a binary columnar log or
+          is truncated.
+
+        <Side Effects>
+          None
+
+        <Returns>
+          A CallLog.
+        """
+
+        with open(path, "rb") as columns_file:
+            header = columns_file.readline().split()
+            if len(header) != 3 or header[0] != MAGIC or int(header[1]) != VERSION:
+                raise Exception("Not a syscall columns file: " + path)
+
+            byteorder = header[2].decode("ascii")
+            length = int(columns_file.readline())
+            names = columns_file.readline().rstrip(b"\n").decode("utf-8")
+
+            column_types = []
+            for _ in COLUMNS:
+                name, typecode = columns_file.readline().decode("ascii").split()
+                column_types.append((name, typecode))
+
+            call_log = CallLog(length)
+            call_log.names = names.split("\t") if names else []
+            call_log._name_ids = dict((name, i) for i, name in enumerate(call_log.names))
+
+            for name, typecode in column_types:
+                column = array.array(typecode)
+                data = columns_file.read(column.itemsize * length)
+                if len(data) != column.itemsize * length:
+                    raise Exception("Truncated syscall columns file: " + path)
+
+                column.frombytes(data)
+                if byteorder != sys.byteorder:
+                    column.byteswap()
+
+                call_log.columns[name][:length] = column
+
+            call_log._length = length
+
+        return call_log
+
+
+    def _grow(self):
+        for name, column in self.columns.items():
+            column.extend(array.array(column.typecode, bytes(column.itemsize * self._capacity)))
+
+        self._capacity *= 2
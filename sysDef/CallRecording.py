@@ -0,0 +1,585 @@
+"""
+<Started>
+  October 2026
+
+<Purpose>
+  Record the exact sequence of executed syscalls, with their resolved argument
+  values, return values and timing, to a compact binary file that can be
+  replayed later (see replay_syscall.py).
+
+  Arguments are recorded as they are passed: integers with their ctypes type,
+  strings with their bytes and buffers with their size and contents at the
+  time of the call. Trailing zero bytes of buffers are not stored, so the
+  zeroed buffers of most calls take a few bytes. Syscall and function names
+  are stored once and referred to by id.
+
+  A recording is a stream of records, so it is written as calls are executed
+  and read back with mmap without loading it whole:
+
+    SYSREC <version>
+    N <name id> <length> <name>                          <-- defines a name
+    C <syscall id> <function id> <return type> <start ns> <duration ns>
+      <return value> <errno> <number of arguments> <argument>...
+
+  All numbers are little-endian. Each argument is a kind byte followed by the
+  data of its kind:
+
+    NULL        -
+    INTEGER     <type code> <value>
+    STRING      <length> <bytes>
+    BUFFER      <size> <stored length> <bytes>
+    SCRATCH     -
+    STRUCT      <name length> <name> <size> <stored length> <bytes>
+    UNSUPPORTED -
+
+  Example printing a recording:
+
+    python -m sysDef.CallRecording recording.rec
+
+"""
+
+import ctypes
+import mmap
+import os
+import struct
+import sys
+import time
+
+from . import StructLayouts
+
+
+MAGIC = b"SYSREC"
+VERSION = 1
+
+NAME_RECORD = b"N"
+CALL_RECORD = b"C"
+
+# argument kinds.
+NULL = 0
+INTEGER = 1
+STRING = 2
+BUFFER = 3
+SCRATCH = 4
+STRUCT = 5
+UNSUPPORTED = 6
+
+KIND_NAMES = ("NULL", "INTEGER", "STRING", "BUFFER", "SCRATCH", "STRUCT", "UNSUPPORTED")
+
+# the ctypes types of integer arguments and return values, by type code.
+# Aliases (e.g. c_size_t and c_ulong) share a code.
+VALUE_TYPES = tuple(dict.fromkeys([
+    ctypes.c_byte, ctypes.c_ubyte, ctypes.c_short, ctypes.c_ushort,
+    ctypes.c_int, ctypes.c_uint, ctypes.c_long, ctypes.c_ulong,
+    ctypes.c_longlong, ctypes.c_ulonglong, ctypes.c_bool, ctypes.c_void_p]))
+
+TYPE_CODES = dict((value_type, code) for code, value_type in enumerate(VALUE_TYPES))
+
+# the type code of a void return type.
+VOID = 255
+
+# records are collected in memory and written when this many bytes are
+# collected, and when the recording is closed.
+FLUSH_SIZE = 1 << 16
+
+_NAME = struct.Struct("<HB")
+_CALL = struct.Struct("<HHBqqqiB")
+_INTEGER = struct.Struct("<Bq")
+_LENGTH = struct.Struct("<I")
+_BUFFER = struct.Struct("<II")
+
+_HEADER = MAGIC + bytes([VERSION])
+
+_MASK64 = (1 << 64) - 1
+
+
+
+class CallRecorder:
+    """
+    <Purpose>
+      Executes CallPlans and appends them to a recording.
+
+      A CallRecorder has the call() method of sysDef.CallLog.CallLog, so it can
+      be given wherever a call log is. Use it as a context manager, or call
+      close(), to flush the recording.
+
+      Only the process that created the recorder writes to the recording. A
+      child created by a recorded fork() records nothing, so that the
+      recording is not written twice.
+
+    <Attributes>
+      self.path:
+        The file of the recording.
+
+      self.call_log:
+        A CallLog every call is also recorded in, or None.
+
+      self.calls:
+        The number of recorded calls.
+
+    """
+
+    def __init__(self, path, call_log=None):
+        self.path = path
+        self.call_log = call_log
+        self.calls = 0
+
+        self._fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC | os.O_CLOEXEC, 0o644)
+        self._pid = os.getpid()
+        self._buffer = bytearray(_HEADER)
+        self._name_ids = {}
+        self._layout_names = None
+        self._origin_ns = time.perf_counter_ns()
+
+
+    def __enter__(self):
+        return self
+
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+    def close(self):
+        if self._fd is None:
+            return
+
+        if os.getpid() == self._pid:
+            self.flush()
+
+        os.close(self._fd)
+        self._fd = None
+
+
+    def flush(self):
+        """
+        Writes the collected records to the recording.
+        """
+
+        written = 0
+        while written < len(self._buffer):
+            written += os.write(self._fd, self._buffer[written:])
+
+        del self._buffer[:]
+
+
+    def call(self, call_plan, argument_set=0):
+        """
+        <Purpose>
+          Executes a CallPlan and records the call.
+
+        <Arguments>
+          call_plan:
+            The CallPlan to execute. Its function must have been loaded with
+            use_errno=True for errno to be recorded.
+
+          argument_set:
+            The id of the argument set the call plan was compiled with. Only
+            used by the call log.
+
+        <Exceptions>
+          None
+
+        <Side Effects>
+          The call plan is executed and written to the recording.
+
+        <Returns>
+          The return value of the call.
+        """
+
+        # buffers are recorded before the call, as the syscall received them.
+        arguments = self.encode_arguments(call_plan.argvalues)
+
+        ctypes.set_errno(0)
+        start_ns = time.perf_counter_ns()
+        return_value = call_plan()
+        end_ns = time.perf_counter_ns()
+        errno = ctypes.get_errno()
+
+        self.record(call_plan, arguments, return_value, errno, start_ns, end_ns)
+
+        if self.call_log is not None:
+            self.call_log.record(call_plan.name, argument_set, return_value, errno,
+                                 start_ns, end_ns)
+
+        return return_value
+
+
+    def record(self, call_plan, arguments, return_value, errno, start_ns, end_ns):
+        """
+        Appends a call of a CallPlan to the recording. arguments are its
+        argument values as returned by encode_arguments. A return value of
+        None (a NULL pointer) is recorded as 0.
+        """
+
+        if os.getpid() != self._pid:
+            return
+
+        syscall_id = self._name_id(call_plan.name)
+        function_id = self._name_id(call_plan.symbol)
+
+        if call_plan.restype is None:
+            restype = VOID
+        else:
+            restype = TYPE_CODES.get(call_plan.restype, TYPE_CODES[ctypes.c_long])
+
+        return_value = _signed(return_value)
+
+        buffer = self._buffer
+        buffer += CALL_RECORD
+        buffer += _CALL.pack(syscall_id, function_id, restype, start_ns - self._origin_ns,
+                             end_ns - start_ns, return_value, errno, len(call_plan.argvalues))
+        buffer += arguments
+        self.calls += 1
+
+        if len(buffer) >= FLUSH_SIZE:
+            self.flush()
+
+
+    def encode_arguments(self, argvalues):
+        """
+        Returns the recorded form of argument values.
+        """
+
+        return b"".join([self._encode_argument(value) for value in argvalues])
+
+
+    def _encode_argument(self, value):
+        if value is None:
+            return bytes([NULL])
+
+        # strings and pointers are simple ctypes data too, so test them first.
+        if isinstance(value, ctypes.c_char_p):
+            if value.value is None:
+                return bytes([NULL])
+            return bytes([STRING]) + _LENGTH.pack(len(value.value)) + value.value
+
+        if isinstance(value, ctypes.c_void_p):
+            # void * arguments point to scratch buffers.
+            if value.value is None:
+                return bytes([NULL])
+            return bytes([SCRATCH])
+
+        if isinstance(value, int):
+            value = ctypes.c_long(value)
+
+        code = TYPE_CODES.get(type(value))
+        if code is not None:
+            return bytes([INTEGER]) + _INTEGER.pack(code, _signed(value.value))
+
+        # ctypes.byref() of a buffer.
+        buffer = getattr(value, "_obj", None)
+        if buffer is not None:
+            return bytes([BUFFER]) + _encode_contents(buffer)
+
+        # fixed size arrays are passed as themselves.
+        if isinstance(value, ctypes.Array):
+            return bytes([BUFFER]) + _encode_contents(value)
+
+        # structures passed by value.
+        if isinstance(value, ctypes.Structure):
+            name = self._layout_name(type(value))
+            if name is not None:
+                name = name.encode()
+                return bytes([STRUCT, len(name)]) + name + _encode_contents(value)
+
+        return bytes([UNSUPPORTED])
+
+
+    def _name_id(self, name):
+        name_id = self._name_ids.get(name)
+        if name_id is None:
+            name_id = len(self._name_ids)
+            self._name_ids[name] = name_id
+
+            encoded = name.encode()
+            self._buffer += NAME_RECORD + _NAME.pack(name_id, len(encoded)) + encoded
+
+        return name_id
+
+
+    def _layout_name(self, layout):
+        if self._layout_names is None:
+            self._layout_names = dict((registered, name) for name, registered
+                                      in StructLayouts.STRUCT_LAYOUTS.items())
+
+        return self._layout_names.get(layout)
+
+
+
+def _signed(value):
+    """
+    Returns an integer wrapped to 64 signed bits. Booleans and pointers are
+    returned as integers.
+    """
+
+    value = int(value or 0) & _MASK64
+    if value >= 1 << 63:
+        value -= 1 << 64
+
+    return value
+
+
+def _encode_contents(buffer):
+    size = ctypes.sizeof(buffer)
+    contents = ctypes.string_at(ctypes.addressof(buffer), size).rstrip(b"\0")
+
+    return _BUFFER.pack(size, len(contents)) + contents
+
+
+
+class RecordedCall:
+    """
+    <Purpose>
+      A call read from a recording.
+
+    <Attributes>
+      self.index:
+        The position of the call in the recording, from 0.
+
+      self.name:
+        The name of the syscall.
+
+      self.symbol:
+        The name of the libc function that was called, e.g. "syscall" for
+        calls through syscall(2).
+
+      self.restype:
+        The ctypes type of the return value, or None for void.
+
+      self.start_ns:
+        The time the call started, in nanoseconds from the start of the
+        recording.
+
+      self.duration_ns:
+        How long the call took, in nanoseconds.
+
+      self.return_value, self.errno:
+        The return value and errno of the call.
+
+      self.encoded_arguments:
+        The recorded arguments. Calls with the same function and encoded
+        arguments are the same call. Use decode_arguments to read them.
+
+    """
+
+    __slots__ = ("index", "name", "symbol", "restype", "start_ns", "duration_ns",
+                 "return_value", "errno", "encoded_arguments")
+
+    def __init__(self, index, name, symbol, restype, start_ns, duration_ns,
+                 return_value, errno, encoded_arguments):
+        self.index = index
+        self.name = name
+        self.symbol = symbol
+        self.restype = restype
+        self.start_ns = start_ns
+        self.duration_ns = duration_ns
+        self.return_value = return_value
+        self.errno = errno
+        self.encoded_arguments = encoded_arguments
+
+
+    def arguments(self):
+        return decode_arguments(self.encoded_arguments)
+
+
+    def __repr__(self):
+        return "%s(%s) = %d" % (self.name, ", ".join(format_argument(argument)
+                                                     for argument in self.arguments()),
+                                self.return_value)
+
+
+
+def read_calls(path):
+    """
+    <Purpose>
+      Reads the calls of a recording in order, without loading the whole
+      recording in memory.
+
+    <Arguments>
+      path:
+        The file of the recording.
+
+    <Exceptions>
+      An Exception is raised if the file is not a recording or is truncated.
+
+    <Side Effects>
+      The file is mapped in memory while the calls are read.
+
+    <Returns>
+      A generator of RecordedCall objects.
+    """
+
+    with open(path, "rb") as recording_file:
+        with mmap.mmap(recording_file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            if data[:len(_HEADER)] != _HEADER:
+                raise Exception("Not a syscall recording: " + path)
+
+            for recorded_call in _read_records(data, len(_HEADER), path):
+                yield recorded_call
+
+
+def _read_records(data, offset, path):
+    names = []
+    index = 0
+    length = len(data)
+
+    try:
+        while offset < length:
+            record_type = data[offset:offset + 1]
+            offset += 1
+
+            if record_type == NAME_RECORD:
+                name_id, name_length = _NAME.unpack_from(data, offset)
+                offset += _NAME.size
+                if name_id != len(names):
+                    raise Exception("Invalid name id %d" % name_id)
+                names.append(sys.intern(data[offset:offset + name_length].decode()))
+                offset += name_length
+
+            elif record_type == CALL_RECORD:
+                (syscall_id, function_id, restype, start_ns, duration_ns,
+                 return_value, errno, argument_count) = _CALL.unpack_from(data, offset)
+                offset += _CALL.size
+
+                end = _skip_arguments(data, offset, argument_count)
+
+                yield RecordedCall(index, names[syscall_id], names[function_id],
+                                   None if restype == VOID else VALUE_TYPES[restype],
+                                   start_ns, duration_ns, return_value, errno,
+                                   data[offset:end])
+                offset = end
+                index += 1
+
+            else:
+                raise Exception("Invalid record type %r" % record_type)
+
+    except (struct.error, IndexError, UnicodeDecodeError) as e:
+        raise Exception("Truncated or corrupt recording %s at byte %d: %s" % (path, offset, e))
+
+
+def _skip_arguments(data, offset, argument_count):
+    """
+    Returns the offset following argument_count encoded arguments.
+    """
+
+    for _ in range(argument_count):
+        kind = data[offset]
+        offset += 1
+
+        if kind == INTEGER:
+            offset += _INTEGER.size
+
+        elif kind == STRING:
+            offset += _LENGTH.size + _LENGTH.unpack_from(data, offset)[0]
+
+        elif kind == BUFFER:
+            offset += _BUFFER.size + _BUFFER.unpack_from(data, offset)[1]
+
+        elif kind == STRUCT:
+            offset += 1 + data[offset]
+            offset += _BUFFER.size + _BUFFER.unpack_from(data, offset)[1]
+
+        elif kind not in (NULL, SCRATCH, UNSUPPORTED):
+            raise IndexError("invalid argument kind %d" % kind)
+
+    if offset > len(data):
+        raise IndexError("arguments end past the end of the file")
+
+    return offset
+
+
+def decode_arguments(encoded_arguments):
+    """
+    <Purpose>
+      Decodes the recorded arguments of a call.
+
+    <Arguments>
+      encoded_arguments:
+        The encoded_arguments of a RecordedCall.
+
+    <Exceptions>
+      None
+
+    <Side Effects>
+      None
+
+    <Returns>
+      A list of (kind, value) tuples, one per argument, where value is:
+        NULL, SCRATCH, UNSUPPORTED:  None
+        INTEGER:  a (ctypes type, integer) tuple
+        STRING:   the bytes of the string
+        BUFFER:   a (size, contents) tuple, contents without trailing zeros
+        STRUCT:   a (layout name, size, contents) tuple
+    """
+
+    data = encoded_arguments
+    offset = 0
+    arguments = []
+
+    while offset < len(data):
+        kind = data[offset]
+        offset += 1
+
+        if kind == INTEGER:
+            code, value = _INTEGER.unpack_from(data, offset)
+            offset += _INTEGER.size
+            arguments.append((kind, (VALUE_TYPES[code], value)))
+
+        elif kind == STRING:
+            string_length = _LENGTH.unpack_from(data, offset)[0]
+            offset += _LENGTH.size
+            arguments.append((kind, bytes(data[offset:offset + string_length])))
+            offset += string_length
+
+        elif kind == BUFFER:
+            size, stored = _BUFFER.unpack_from(data, offset)
+            offset += _BUFFER.size
+            arguments.append((kind, (size, bytes(data[offset:offset + stored]))))
+            offset += stored
+
+        elif kind == STRUCT:
+            name_length = data[offset]
+            name = bytes(data[offset + 1:offset + 1 + name_length]).decode()
+            offset += 1 + name_length
+            size, stored = _BUFFER.unpack_from(data, offset)
+            offset += _BUFFER.size
+            arguments.append((kind, (name, size, bytes(data[offset:offset + stored]))))
+            offset += stored
+
+        else:
+            arguments.append((kind, None))
+
+    return arguments
+
+
+def format_argument(argument):
+    """
+    Returns a short description of a decoded argument.
+    """
+
+    kind, value = argument
+
+    if kind == INTEGER:
+        return str(value[1])
+
+    if kind == STRING:
+        return repr(value)
+
+    if kind == BUFFER:
+        return "buffer[%d]" % value[0]
+
+    if kind == STRUCT:
+        return "struct %s" % value[0]
+
+    return KIND_NAMES[kind]
+
+
+
+def main():
+    for recorded_call in read_calls(sys.argv[1]):
+        print("%12.6f %10d ns  %r  errno=%d" % (recorded_call.start_ns / 1e9,
+                                               recorded_call.duration_ns, recorded_call,
+                                               recorded_call.errno))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,530 @@
+"""
+<Started>
+  October 2026
+
+<Purpose>
+  Parse C function prototypes and parameter declarations, as they appear in
+  the synopsis of man pages, into their parts.
+
+  The text is split into tokens in a single pass and the tokens are parsed by
+  a recursive-descent parser following the declarator grammar of C:
+
+    prototype    := attributes specifiers declarator attributes [";"]
+    parameters   := "(" [ "void" | parameter ("," parameter)* ] ")"
+    parameter    := "..." | specifiers declarator
+    specifiers   := (qualifier | "struct" tag | "union" tag | "enum" tag | type word)+
+    declarator   := ("*" qualifier*)* direct suffix*
+    direct       := identifier | "(" declarator ")" | nothing
+    suffix       := "[" tokens "]" | parameters
+
+  so that pointers to pointers, sized arrays (int pipefd[2], void buf[.count]),
+  function pointers with their own parameters and nested parentheses are all
+  understood. Qualifiers that do not change how an argument is passed
+  (restrict, _Nullable, volatile, ...), also those inside the brackets of
+  arrays ([_Nullable 2], [static 2]), and attributes ([[deprecated]],
+  __attribute__((...))) are accepted and dropped.
+
+  Errors are reported as ParseError exceptions carrying the position of the
+  offending token.
+
+  Example printing the parts of a prototype:
+
+    python -m sysDef.DeclarationParser "int clone(int (*fn)(void *), void *stack, int flags, void *arg, ...);"
+
+"""
+
+import re
+import sys
+
+
+# type words that may be combined with each other, e.g. unsigned long int.
+BASIC_TYPES = set(["void", "char", "short", "int", "long", "float", "double",
+                   "signed", "unsigned", "_Bool"])
+
+# qualifiers that do not change how an argument is passed and are dropped.
+DROPPED_QUALIFIERS = set(["volatile", "restrict", "__restrict", "__restrict__",
+                          "_Nullable", "_Nonnull", "_Null_unspecified", "__user",
+                          "register", "_Atomic", "static", "extern", "inline"])
+
+TAG_KEYWORDS = set(["struct", "union", "enum"])
+
+ATTRIBUTE_KEYWORDS = set(["__attribute__", "__attribute"])
+
+# kinds of tokens.
+IDENTIFIER = "identifier"
+NUMBER = "number"
+PUNCTUATION = "punctuation"
+END = "end"
+
+_TOKEN = re.compile(r"""
+    \s*(?:
+        (?P<identifier>[A-Za-z_][A-Za-z0-9_]*)
+      | (?P<number>[0-9][0-9A-Za-z_.]*)
+      | (?P<punctuation>\.\.\.|\[\[|\]\]|[()\[\],;*.+\-/&|<>~!^%?:=])
+    )""", re.VERBOSE)
+
+_TRAILING_SPACE = re.compile(r"\s*")
+
+# derivations of a declared name, see Declaration.
+POINTER = "pointer"
+CONST_POINTER = "const_pointer"
+ARRAY = "array"
+FUNCTION = "function"
+
+
+class ParseError(Exception):
+    """
+    <Purpose>
+      Raised when a declaration can not be parsed.
+
+    <Attributes>
+      self.text:
+        The text being parsed.
+
+      self.position:
+        The index in text of the token the error was found at.
+
+    """
+
+    def __init__(self, message, text, position):
+        self.text = text
+        self.position = position
+
+        Exception.__init__(self, "%s at column %d: %s\n%s^" %
+                           (message, position + 1, text,
+                            " " * (len("%s at column %d: " % (message, position + 1)) + position)))
+
+
+
+class Declaration:
+    """
+    <Purpose>
+      The parts of one declaration: its specifiers, its name and how the type
+      of the name is derived from the specifiers.
+
+    <Attributes>
+      self.type:
+        The type words of the specifiers, without qualifiers, e.g. "long" for
+        "const unsigned long", or the tag for structures ("timespec"). None for
+        the ellipsis.
+
+      self.name:
+        The declared name, or None for abstract declarations such as the
+        "void *" parameter of a function pointer.
+
+      self.const, self.unsigned, self.struct, self.union, self.enum:
+        Whether the specifiers include these keywords.
+
+      self.ellipsis:
+        True for the "..." of variadic functions.
+
+      self.derivations:
+        A list of how the type of the name is derived from the specifiers,
+        from the name outwards. Each item is a tuple: (POINTER,),
+        (CONST_POINTER,), (ARRAY, size text) or (FUNCTION, list of parameter
+        Declarations). E.g. char *const argv[] is [(ARRAY, ""),
+        (CONST_POINTER,)]: an array of const pointers to char.
+
+      self.position:
+        The index of the declaration in the parsed text.
+
+    """
+
+    __slots__ = ("type", "name", "const", "unsigned", "struct", "union", "enum",
+                 "ellipsis", "derivations", "position")
+
+    def __init__(self, position):
+        self.type = None
+        self.name = None
+        self.const = False
+        self.unsigned = False
+        self.struct = False
+        self.union = False
+        self.enum = False
+        self.ellipsis = False
+        self.derivations = []
+        self.position = position
+
+
+    def __repr__(self):
+        if self.ellipsis:
+            return "Declaration(...)"
+
+        return "Declaration(%r, %r, %r)" % (self.type, self.name, self.derivations)
+
+
+
+def tokenize(text):
+    """
+    <Purpose>
+      Splits text into tokens in a single pass.
+
+    <Arguments>
+      text:
+        The text of a declaration.
+
+    <Exceptions>
+      ParseError is raised at the first character that does not start a token.
+
+    <Side Effects>
+      None
+
+    <Returns>
+      A list of (kind, value, position) tuples ending with an END token.
+    """
+
+    tokens = []
+    position = 0
+    length = len(text)
+    match_token = _TOKEN.match
+
+    while True:
+        match = match_token(text, position)
+        if match is None:
+            position = _TRAILING_SPACE.match(text, position).end()
+            if position == length:
+                break
+            raise ParseError("Unexpected character %r" % text[position], text, position)
+
+        kind = match.lastgroup
+        tokens.append((kind, match.group(kind), match.start(kind)))
+        position = match.end()
+
+    tokens.append((END, "", length))
+    return tokens
+
+
+
+class _Parser:
+    """
+    A recursive-descent parser over the tokens of one text.
+    """
+
+    def __init__(self, text):
+        self.text = text
+        self.tokens = tokenize(text)
+        self.index = 0
+
+
+    def peek(self, offset=0):
+        return self.tokens[min(self.index + offset, len(self.tokens) - 1)]
+
+
+    def next(self):
+        token = self.tokens[self.index]
+        if token[0] != END:
+            self.index += 1
+        return token
+
+
+    def accept(self, value):
+        if self.tokens[self.index][1] == value and self.tokens[self.index][0] != END:
+            self.index += 1
+            return True
+        return False
+
+
+    def expect(self, value):
+        if not self.accept(value):
+            self.error("Expected %r" % value)
+
+
+    def error(self, message, token=None):
+        if token is None:
+            token = self.peek()
+
+        if token[0] == END:
+            message += " but reached the end"
+        else:
+            message += " but found %r" % token[1]
+
+        raise ParseError(message, self.text, token[2])
+
+
+    def skip_attributes(self):
+        """
+        Skips [[...]] and __attribute__((...)) attributes.
+        """
+
+        while True:
+            kind, value, _ = self.peek()
+
+            if value == "[[" and kind == PUNCTUATION:
+                self.next()
+                self.skip_balanced("[[", "]]")
+
+            elif kind == IDENTIFIER and value in ATTRIBUTE_KEYWORDS:
+                self.next()
+                self.expect("(")
+                self.skip_balanced("(", ")")
+
+            else:
+                return
+
+
+    def skip_balanced(self, opening, closing):
+        """
+        Skips tokens up to and including the closing token matching an opening
+        token that has already been consumed. Returns the position of the
+        closing token.
+        """
+
+        depth = 1
+        while True:
+            kind, value, position = self.next()
+            if kind == END:
+                self.error("Expected %r" % closing, (kind, value, position))
+
+            if value == opening:
+                depth += 1
+            elif value == closing:
+                depth -= 1
+                if depth == 0:
+                    return position
+
+
+    def parse_prototype(self):
+        self.skip_attributes()
+
+        declaration = self.parse_declaration(abstract=False)
+        if not declaration.derivations or declaration.derivations[0][0] != FUNCTION:
+            raise ParseError("Expected a function declaration", self.text,
+                             declaration.position)
+
+        self.skip_attributes()
+        self.accept(";")
+
+        if self.peek()[0] != END:
+            self.error("Expected the end of the declaration")
+
+        return declaration
+
+
+    def parse_parameters(self):
+        """
+        Parses a parameter list whose "(" has already been consumed.
+        """
+
+        if self.accept(")"):
+            return []
+
+        # (void) declares no parameters.
+        if self.peek()[1] == "void" and self.peek(1)[1] == ")":
+            self.next()
+            self.next()
+            return []
+
+        parameters = []
+        while True:
+            parameters.append(self.parse_parameter())
+            if self.accept(")"):
+                return parameters
+            if not self.accept(","):
+                self.error("Expected ',' or ')'")
+
+
+    def parse_parameter(self):
+        kind, value, position = self.peek()
+
+        if value == "..." and kind == PUNCTUATION:
+            self.next()
+            declaration = Declaration(position)
+            declaration.ellipsis = True
+            return declaration
+
+        return self.parse_declaration(abstract=True)
+
+
+    def parse_declaration(self, abstract):
+        declaration = Declaration(self.peek()[2])
+        self.parse_specifiers(declaration)
+
+        name, derivations = self.parse_declarator(abstract)
+        declaration.name = name
+        declaration.derivations = derivations
+
+        return declaration
+
+
+    def parse_specifiers(self, declaration):
+        type_words = []
+        typedef_name = False
+
+        while True:
+            self.skip_attributes()
+            kind, value, position = self.peek()
+            if kind != IDENTIFIER:
+                break
+
+            if value == "const":
+                declaration.const = True
+
+            elif value in DROPPED_QUALIFIERS:
+                pass
+
+            elif value in TAG_KEYWORDS:
+                if type_words:
+                    self.error("Unexpected %r after the type" % value)
+                self.next()
+
+                tag = self.peek()
+                if tag[0] != IDENTIFIER:
+                    self.error("Expected the name of the " + value)
+
+                setattr(declaration, value, True)
+                type_words.append(tag[1])
+                typedef_name = True
+
+            elif value == "unsigned" and not typedef_name:
+                declaration.unsigned = True
+
+            elif value in BASIC_TYPES and not typedef_name:
+                type_words.append(value)
+
+            elif not type_words and not typedef_name and not declaration.unsigned:
+                # a typedef name such as size_t.
+                type_words.append(value)
+                typedef_name = True
+
+            else:
+                # the declared name.
+                break
+
+            self.next()
+
+        if not type_words:
+            if declaration.unsigned:
+                # "unsigned" on its own is a type.
+                declaration.unsigned = False
+                type_words.append("unsigned")
+            else:
+                self.error("Expected a type")
+
+        declaration.type = sys.intern(" ".join(type_words))
+
+
+    def parse_declarator(self, abstract):
+        """
+        Returns the name of a declarator, or None if it is abstract, and its
+        derivations from the name outwards.
+        """
+
+        pointers = []
+        while self.accept("*"):
+            const = False
+            while self.peek()[0] == IDENTIFIER and (self.peek()[1] == "const" or
+                                                    self.peek()[1] in DROPPED_QUALIFIERS):
+                if self.next()[1] == "const":
+                    const = True
+            self.skip_attributes()
+            pointers.append((CONST_POINTER,) if const else (POINTER,))
+
+        name = None
+        inner = []
+
+        kind, value, _ = self.peek()
+        if kind == IDENTIFIER:
+            self.next()
+            name = value
+
+        elif value == "(" and self.peek(1)[1] in ("*", "(", "["):
+            # a parenthesized declarator, e.g. (*fn) in int (*fn)(void *).
+            self.next()
+            name, inner = self.parse_declarator(abstract)
+            self.expect(")")
+
+        elif not abstract:
+            self.error("Expected a name")
+
+        suffixes = []
+        while True:
+            self.skip_attributes()
+
+            if self.accept("["):
+                # qualifiers of array parameters, e.g. times[_Nullable 2] or
+                # [static 2], are dropped so that only the size remains.
+                while self.peek()[0] == IDENTIFIER and (self.peek()[1] == "const" or
+                                                        self.peek()[1] in DROPPED_QUALIFIERS):
+                    self.next()
+                start = self.peek()[2]
+                end = self.skip_balanced("[", "]")
+                suffixes.append((ARRAY, sys.intern(self.text[start:end].strip())))
+
+            elif self.accept("("):
+                suffixes.append((FUNCTION, self.parse_parameters()))
+
+            else:
+                break
+
+        pointers.reverse()
+        return name, inner + suffixes + pointers
+
+
+
+def parse_prototype(text):
+    """
+    <Purpose>
+      Parses a function prototype.
+
+    <Arguments>
+      text:
+        The prototype, e.g. "int open(const char *pathname, int flags);".
+
+    <Exceptions>
+      ParseError is raised if text is not a function prototype.
+
+    <Side Effects>
+      None
+
+    <Returns>
+      The Declaration of the function. Its first derivation is (FUNCTION,
+      parameters) and the remaining derivations apply to the return type.
+    """
+
+    return _Parser(text).parse_prototype()
+
+
+
+def parse_parameter(text):
+    """
+    <Purpose>
+      Parses a single parameter declaration.
+
+    <Arguments>
+      text:
+        The parameter, e.g. "const char *pathname" or "...".
+
+    <Exceptions>
+      ParseError is raised if text is not a parameter declaration.
+
+    <Side Effects>
+      None
+
+    <Returns>
+      The Declaration of the parameter.
+    """
+
+    parser = _Parser(text)
+    declaration = parser.parse_parameter()
+
+    if parser.peek()[0] != END:
+        parser.error("Expected the end of the parameter")
+
+    return declaration
+
+
+
+def main():
+    for text in sys.argv[1:]:
+        try:
+            declaration = parse_prototype(text)
+        except ParseError as e:
+            print(e)
+            continue
+
+        print(declaration)
+        for parameter in declaration.derivations[0][1]:
+            print("  " + repr(parameter))
+
+if __name__ == "__main__":
+    main()
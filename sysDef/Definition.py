@@ -1,4 +1,7 @@
-from .SyscallParameter import SyscallParameter
+import sys
+
+from . import DeclarationParser
+from .SyscallParameter import SyscallParameter, _intern
 
 class Definition:
     """
@@ -17,10 +20,12 @@ class Definition:
         name.
 
       self.parameters:
-        A list of SyscallParameter objects each describing a parameter of the definition.
+        A tuple of SyscallParameter objects each describing a parameter of the definition.
 
     """
 
+    __slots__ = ("ret_type", "name", "parameters")
+
     def __init__(self, definition_line):
         """
         <Purpose>
@@ -37,7 +42,8 @@ class Definition:
             manual page of the corresponding system call, with any comments removed.
 
         <Exceptions>
-          None
+          A DeclarationParser.ParseError will be raised if the definition can
+          not be parsed.
 
         <Side Effects>
           None
@@ -46,49 +52,53 @@ class Definition:
           None
         """
 
-        # get the beginning of the line before the first opening bracket. This part
-        # holds the return type and the name of the definition. The remaining part
-        # holds the parameters of the definition.
-        def_beginning, parameters_string = definition_line.split("(", 1)
+        declaration = DeclarationParser.parse_prototype(definition_line)
+        parameters = declaration.derivations[0][1]
 
-        # get the name and the return type of the definition. Name is a single word
-        # at the end of def_beginning, and the rest is the return type.
-        self.ret_type, self.name = def_beginning.rsplit(None, 1)
+        # the remaining derivations apply to the return type, which can be a
+        # pointer, e.g. void *mmap(...). It is kept in the return type, not the
+        # name of the definition.
+        ret_type = ""
+        if(declaration.const):
+            ret_type += "const "
+        for keyword in ("struct", "union", "enum", "unsigned"):
+            if(getattr(declaration, keyword)):
+                ret_type += keyword + " "
+        ret_type += declaration.type
 
-        # return type can be a pointer in which case the '*' character will be
-        # included in the name of the definition instead of the return type.
-        if(self.name.startswith("*")):
-            self.name = self.name[1:]    # remove the asterisk from name
-            self.ret_type += "*"    # and add it to the return type.
+        for derivation in declaration.derivations[1:]:
+            if derivation[0] not in (DeclarationParser.POINTER, DeclarationParser.CONST_POINTER):
+                raise DeclarationParser.ParseError("Unsupported return type", definition_line,
+                                                   declaration.position)
+            ret_type += "*"
 
-        # remove brackets and semi-colon from the end of the parameters and split
-        # them into a list of type-name parameters.
-        parameters_list = parameters_string.strip("();").split(", ")
+        self.ret_type = sys.intern(ret_type)
+        self.name = sys.intern(declaration.name)
 
-        self.parameters = []
+        # syscall definitions with no parameters are given as (void), e.g.
+        # pid_t fork(void), in which case self.parameters is empty.
+        self.parameters = tuple(SyscallParameter.from_declaration(parameter, definition_line)
+                                for parameter in parameters)
 
-        # syscall definitions with no parameters are given as (void) in which case
-        # the parameter_list will have its first (and only) item as "void". In this
-        # case we leave the self.parameters as an empty list. Example void
-        # definition: pid_t fork(void)
-        if(parameters_list[0] == "void"):
-            return
 
-        for param_string in parameters_list:
-            # replace whitespace with space
-            param_string = " ".join(param_string.split())
+    def __getstate__(self):
+        """
+        Pickles definitions as a dictionary of their attributes, as older
+        versions did.
+        """
 
-            # if there is a "*" on its own, join it with the subsequent parameter. This
-            # can happen eg: int sched_rr_get_interval(pid_t pid, struct timespec * tp);
-            param_string = param_string.replace("* ", "*")
+        return {"ret_type": self.ret_type, "name": self.name,
+                "parameters": list(self.parameters)}
 
-            # parse the parameter.
-            parameter = SyscallParameter(param_string)
 
-            # test whether the parameter was parsed completely and correctly.
-            assert(str(parameter) == param_string)
+    def __setstate__(self, state):
+        """
+        Unpickles definitions pickled by this or by older versions.
+        """
 
-            self.parameters.append(parameter)
+        self.ret_type = _intern(state["ret_type"])
+        self.name = _intern(state["name"])
+        self.parameters = tuple(state["parameters"])
 
 
     def __repr__(self):
@@ -0,0 +1,327 @@
+"""
+<Started>
+  October 2026
+
+<Purpose>
+  Read and write syscall definition databases.
+
+  A definition database holds SyscallManual objects in a line-oriented text
+  format that can be memory-mapped and decoded lazily, one record at a time.
+  Unlike a pickle, loading a database never executes code taken from the file
+  and never builds objects for system calls that are not used.
+
+  Format (version 2):
+
+    SYSDEF 2
+    <number of records>
+    <syscall name> <record offset> <record length>     <-- one per record
+    ...
+    <syscall name>\t<type>\t<definition>\t<source digest>   <-- one per record
+    ...
+
+  The index lines come right after the header and record offsets are relative
+  to the end of the index. The definition of a record is the definition line as
+  it appears in the man page, e.g. "int open(const char *pathname, int flags,
+  mode_t mode);" or an empty string if the type of the record is not FOUND.
+  The source digest identifies the man page source the record was built from
+  (see ManSource.source_digest) and is used to rebuild only the records whose
+  man pages changed. It is empty if unknown.
+
+  Version 1 databases, whose records have no source digest, are still read.
+
+  Example converting a pickled list of SyscallManual objects to a database:
+
+    python -m sysDef.DefinitionDatabase syscall_definitions.pickle syscall_definitions.sdb
+
+"""
+
+import mmap
+import os
+
+from .Definition import Definition
+from .SyscallManual import SyscallManual
+
+
+MAGIC = b"SYSDEF"
+VERSION = 2
+
+# versions that can be read.
+SUPPORTED_VERSIONS = (1, 2)
+
+
+class DefinitionDatabase:
+    """
+    <Purpose>
+      A read-only, memory-mapped definition database. Records are decoded into
+      SyscallManual objects only when they are asked for.
+
+    <Attributes>
+      self.path:
+        The path of the database file.
+
+      self.names:
+        The names of the system calls in the database, in the order in which
+        they were written.
+
+    """
+
+    def __init__(self, path):
+        """
+        <Purpose>
+          Opens a definition database and reads its index.
+
+        <Arguments>
+          path:
+            The path of the database file.
+
+        <Exceptions>
+          An Exception is raised if the file is not a definition database or is
+          of an unsupported version.
+
+        <Side Effects>
+          The file is opened and memory-mapped until close() is called.
+
+        <Returns>
+          None
+        """
+
+        self.path = path
+        self.names = []
+        self._index = {}
+
+        self._file = open(path, "rb")
+        try:
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            # an empty file cannot be mapped.
+            self._file.close()
+            raise Exception("Not a syscall definition database: " + path)
+
+        header = self._map.readline().split()
+        if len(header) != 2 or header[0] != MAGIC:
+            self.close()
+            raise Exception("Not a syscall definition database: " + path)
+
+        if int(header[1]) not in SUPPORTED_VERSIONS:
+            self.close()
+            raise Exception("Unsupported syscall definition database version: " +
+                            header[1].decode("ascii"))
+
+        count = int(self._map.readline())
+        for _ in range(count):
+            name, offset, length = self._map.readline().split()
+            name = name.decode("utf-8")
+            self.names.append(name)
+            self._index[name] = (int(offset), int(length))
+
+        self._data_offset = self._map.tell()
+
+
+    @staticmethod
+    def is_database(path):
+        """
+        Returns True if the file in path starts like a definition database.
+        """
+
+        with open(path, "rb") as database_file:
+            return database_file.read(len(MAGIC)) == MAGIC
+
+
+    @staticmethod
+    def write(path, syscall_manuals, source_digests=None):
+        """
+        <Purpose>
+          Writes a list of SyscallManual objects to a new definition database.
+
+        <Arguments>
+          path:
+            The path of the database file to write.
+
+          syscall_manuals:
+            The SyscallManual objects to write, in order.
+
+          source_digests:
+            A dictionary of the source digests of the system calls, or None.
+            System calls missing from it are written without one.
+
+        <Exceptions>
+          An Exception is raised if a name or definition cannot be stored in the
+          line-oriented format.
+
+        <Side Effects>
+          path is replaced. The new database is written to a temporary file
+          first, so readers that have the old one open are not affected.
+
+        <Returns>
+          None
+        """
+
+        if source_digests is None:
+            source_digests = {}
+
+        records = []
+        for syscall_manual in syscall_manuals:
+            definition = ""
+            if syscall_manual.definition is not None:
+                definition = _definition_line(syscall_manual.definition)
+
+            record = "%s\t%d\t%s\t%s\n" % (syscall_manual.name, syscall_manual.type,
+                                           definition,
+                                           source_digests.get(syscall_manual.name) or "")
+            if record.count("\t") != 3 or record.count("\n") != 1 or " " in syscall_manual.name:
+                raise Exception("Cannot store record for syscall: " + syscall_manual.name)
+
+            records.append((syscall_manual.name, record.encode("utf-8")))
+
+        lines = [MAGIC + b" %d\n" % VERSION, b"%d\n" % len(records)]
+        offset = 0
+        for name, record in records:
+            lines.append(b"%s %d %d\n" % (name.encode("utf-8"), offset, len(record)))
+            offset += len(record)
+
+        temp_path = path + ".tmp"
+        with open(temp_path, "wb") as database_file:
+            database_file.writelines(lines)
+            database_file.writelines(record for _, record in records)
+
+        os.replace(temp_path, path)
+
+
+    def get(self, syscall_name):
+        """
+        <Purpose>
+          Decodes the record of the given system call.
+
+        <Arguments>
+          syscall_name:
+            The name of the system call.
+
+        <Exceptions>
+          KeyError if the system call is not in the database.
+
+        <Side Effects>
+          None
+
+        <Returns>
+          A SyscallManual object.
+        """
+
+        name, definition_type, definition_line = self._fields(syscall_name)[:3]
+
+        definition = None
+        if definition_line:
+            definition = Definition(definition_line)
+
+        return SyscallManual.from_definition(name, int(definition_type), definition)
+
+
+    def source_digest(self, syscall_name):
+        """
+        Returns the source digest of the given system call, or None if the
+        database does not have one for it. KeyError if the system call is not
+        in the database.
+        """
+
+        fields = self._fields(syscall_name)
+        if len(fields) < 4 or not fields[3]:
+            return None
+
+        return fields[3]
+
+
+    def _fields(self, syscall_name):
+        offset, length = self._index[syscall_name]
+        start = self._data_offset + offset
+        record = self._map[start:start + length].decode("utf-8")
+
+        return record.rstrip("\n").split("\t")
+
+
+    def close(self):
+        self._map.close()
+        self._file.close()
+
+
+    def __contains__(self, syscall_name):
+        return syscall_name in self._index
+
+
+    def __len__(self):
+        return len(self.names)
+
+
+    def __iter__(self):
+        for name in self.names:
+            yield self.get(name)
+
+
+    def __enter__(self):
+        return self
+
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+
+def _definition_line(definition):
+    """
+    Returns the definition line a Definition object was parsed from. Definitions
+    without parameters are written as (void) like they are in man pages.
+    """
+
+    parameters_string = ", ".join(str(par) for par in definition.parameters)
+    if not parameters_string:
+        parameters_string = "void"
+
+    return definition.ret_type + " " + definition.name + "(" + parameters_string + ");"
+
+
+def convert_pickle(pickle_path, database_path):
+    """
+    <Purpose>
+      Converts a pickled list of SyscallManual objects, as generated by
+      parse-syscall-definitions, to a definition database.
+
+      Only unpickle files from trusted sources.
+
+    <Arguments>
+      pickle_path:
+        The path of the pickle file to read.
+
+      database_path:
+        The path of the database file to write.
+
+    <Exceptions>
+      None
+
+    <Side Effects>
+      database_path is overwritten.
+
+    <Returns>
+      The number of records written.
+    """
+
+    import pickle
+
+    with open(pickle_path, "rb") as pickle_file:
+        syscall_manuals = pickle.load(pickle_file)
+
+    DefinitionDatabase.write(database_path, syscall_manuals)
+
+    return len(syscall_manuals)
+
+
+
+def main():
+    import sys
+
+    if(len(sys.argv) != 3):
+        print("Usage: python -m sysDef.DefinitionDatabase <pickle_file> <database_file>")
+        exit()
+
+    count = convert_pickle(sys.argv[1], sys.argv[2])
+    print("Converted " + str(count) + " definitions.")
+
+if __name__ == "__main__":
+    main()
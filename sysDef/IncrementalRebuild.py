@@ -0,0 +1,225 @@
+"""
+<Started>
+  October 2026
+
+<Purpose>
+  Rebuild a definition database incrementally, re-parsing only the man pages
+  of system calls that are new or whose man page source changed.
+
+  Each record of a definition database holds the digest of the man page source
+  it was built from (see ManSource.source_digest). Digests only depend on the
+  content of the man pages, so a database built on one host can be rebuilt on
+  another and only the pages that differ between the two are parsed again.
+  Records of version 1 databases have no digest and are all rebuilt the first
+  time.
+
+  System calls whose pages are not parsed keep their records. If parsing a page
+  fails the old record is kept too and the failure reported.
+
+  A summary of the definitions that were added, removed or changed is printed.
+
+  Example running this program:
+
+    python -m sysDef.IncrementalRebuild syscall_definitions.sdb
+    python -m sysDef.IncrementalRebuild syscall_definitions.sdb --table -o new.sdb
+
+  The first rebuilds the database in place. The second also adds the system
+  calls of the running architecture missing from the database and writes the
+  result to new.sdb.
+
+"""
+
+import argparse
+
+from . import ManSource
+from .DefinitionDatabase import DefinitionDatabase, _definition_line
+from .SyscallManual import SyscallManual
+from .SyscallTable import SyscallTable
+
+
+class RebuildSummary:
+    """
+    <Purpose>
+      The outcome of an incremental rebuild.
+
+    <Attributes>
+      self.rebuilt:
+        The names of the system calls whose man pages were parsed again.
+
+      self.added:
+        (name, definition line) tuples of definitions that were not in the
+        old database.
+
+      self.removed:
+        (name, definition line) tuples of definitions that are no longer
+        found.
+
+      self.changed:
+        (name, old definition line, new definition line) tuples.
+
+      self.failures:
+        (name, error message) tuples of man pages that could not be parsed.
+
+    """
+
+    def __init__(self):
+        self.rebuilt = []
+        self.added = []
+        self.removed = []
+        self.changed = []
+        self.failures = []
+
+
+    def compare(self, name, old_manual, new_manual):
+        """
+        Records the difference between the old and new SyscallManual objects
+        of a system call. old_manual is None for new system calls.
+        """
+
+        old_line = _found_definition_line(old_manual)
+        new_line = _found_definition_line(new_manual)
+
+        if old_line == new_line:
+            return
+
+        if old_line is None:
+            self.added.append((name, new_line))
+        elif new_line is None:
+            self.removed.append((name, old_line))
+        else:
+            self.changed.append((name, old_line, new_line))
+
+
+    def format(self):
+        """
+        Returns the summary formatted as text.
+        """
+
+        lines = ["rebuilt %d, added %d, removed %d, changed %d, failed %d" %
+                 (len(self.rebuilt), len(self.added), len(self.removed),
+                  len(self.changed), len(self.failures))]
+
+        for name, line in self.added:
+            lines.append("+ %s: %s" % (name, line))
+        for name, line in self.removed:
+            lines.append("- %s: %s" % (name, line))
+        for name, old_line, new_line in self.changed:
+            lines.append("~ %s: %s" % (name, old_line))
+            lines.append("  %s  %s" % (" " * len(name), new_line))
+        for name, error in self.failures:
+            lines.append("! %s: %s" % (name, error.strip().splitlines()[-1]))
+
+        return "\n".join(lines)
+
+
+
+def _found_definition_line(syscall_manual):
+    if syscall_manual is None or syscall_manual.type != SyscallManual.FOUND:
+        return None
+
+    return _definition_line(syscall_manual.definition)
+
+
+
+def rebuild(database_path, output_path=None, new_names=(), full=False, workers=None):
+    """
+    <Purpose>
+      Rebuilds a definition database, parsing only the man pages of new system
+      calls and of system calls whose man page source changed.
+
+    <Arguments>
+      database_path:
+        The path of the existing definition database.
+
+      output_path:
+        The path of the database to write. Defaults to database_path.
+
+      new_names:
+        Names of system calls to add to the database if they are not already
+        in it.
+
+      full:
+        If True the man pages of all system calls are parsed again.
+
+      workers:
+        The number of worker processes parsing man pages. See
+        SyscallManual.build_all.
+
+    <Exceptions>
+      An Exception is raised if database_path is not a definition database.
+
+    <Side Effects>
+      output_path is replaced.
+
+    <Returns>
+      A RebuildSummary.
+    """
+
+    if output_path is None:
+        output_path = database_path
+
+    summary = RebuildSummary()
+
+    with DefinitionDatabase(database_path) as database:
+        names = list(database.names)
+        old_manuals = dict((name, database.get(name)) for name in names)
+        old_digests = dict((name, database.source_digest(name)) for name in names)
+
+    for name in new_names:
+        if name not in names:
+            names.append(name)
+
+    digests = {}
+    for name in names:
+        digests[name] = ManSource.source_digest(name)
+
+        if full or name not in old_manuals or digests[name] != old_digests[name]:
+            summary.rebuilt.append(name)
+
+    new_manuals, summary.failures = SyscallManual.build_all(summary.rebuilt, workers)
+    new_manuals = dict((manual.name, manual) for manual in new_manuals)
+
+    syscall_manuals = []
+    for name in names:
+        if name in new_manuals:
+            summary.compare(name, old_manuals.get(name), new_manuals[name])
+            syscall_manuals.append(new_manuals[name])
+
+        elif name in old_manuals:
+            # not rebuilt, or failed to. A failed record keeps its old digest
+            # so that it is tried again next time.
+            if name in summary.rebuilt:
+                digests[name] = old_digests[name]
+            syscall_manuals.append(old_manuals[name])
+
+    DefinitionDatabase.write(output_path, syscall_manuals, digests)
+
+    return summary
+
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Rebuild a definition database, parsing only changed man pages.")
+    parser.add_argument("database", help="the definition database to rebuild")
+    parser.add_argument("syscalls", nargs="*",
+                        help="names of system calls to add if they are missing")
+    parser.add_argument("-o", "--output", metavar="FILE",
+                        help="write the rebuilt database to FILE instead of replacing DATABASE")
+    parser.add_argument("--table", action="store_true",
+                        help="also add the system calls of the running architecture")
+    parser.add_argument("--full", action="store_true",
+                        help="parse the man pages of all system calls again")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="number of worker processes parsing man pages")
+    args = parser.parse_intermixed_args()
+
+    new_names = list(args.syscalls)
+    if args.table:
+        new_names += sorted(SyscallTable.load().numbers)
+
+    summary = rebuild(args.database, args.output, new_names, args.full, args.workers)
+    print(summary.format())
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,163 @@
+"""
+<Started>
+  October 2026
+
+<Purpose>
+  Count latencies in log-linear buckets, so that any number of samples is
+  summarized in a fixed amount of memory and histograms of different threads
+  or intervals can be added together.
+
+  Latencies below 2 ** (SUB_BUCKET_BITS + 1) nanoseconds get a bucket each.
+  Above that, each power of two is split into 2 ** SUB_BUCKET_BITS buckets of
+  equal width, so that every bucket is at most 1/8 wide relative to its
+  values: 1000 ns is counted in the 960-1023 ns bucket, 1000000 ns in the
+  983040-1048575 ns bucket. Percentiles are reported as the upper bound of the
+  bucket they fall in.
+
+"""
+
+
+SUB_BUCKET_BITS = 3
+
+# latencies below this are counted exactly.
+_EXACT = 1 << (SUB_BUCKET_BITS + 1)
+
+
+def bucket(latency_ns):
+    """
+    Returns the index of the bucket of a latency in nanoseconds.
+    """
+
+    if latency_ns < _EXACT:
+        return max(latency_ns, 0)
+
+    shift = latency_ns.bit_length() - SUB_BUCKET_BITS - 1
+    return (shift << SUB_BUCKET_BITS) + (latency_ns >> shift)
+
+
+def bucket_bounds(index):
+    """
+    Returns the lowest and highest latency in nanoseconds of a bucket.
+    """
+
+    if index < _EXACT:
+        return index, index
+
+    shift = (index >> SUB_BUCKET_BITS) - 1
+    mantissa = index - (shift << SUB_BUCKET_BITS)
+    return mantissa << shift, ((mantissa + 1) << shift) - 1
+
+
+# buckets up to 2 ** 64 ns.
+BUCKETS = bucket((1 << 64) - 1) + 1
+
+
+
+class LatencyHistogram:
+    """
+    <Purpose>
+      A histogram of latencies in nanoseconds.
+
+    <Attributes>
+      self.counts:
+        A list of the number of latencies in each bucket.
+
+      self.count:
+        The number of recorded latencies.
+
+      self.total_ns:
+        The sum of the recorded latencies.
+
+      self.max_ns:
+        The highest recorded latency.
+
+    """
+
+    __slots__ = ("counts", "count", "total_ns", "max_ns")
+
+    def __init__(self):
+        self.counts = [0] * BUCKETS
+        self.count = 0
+        self.total_ns = 0
+        self.max_ns = 0
+
+
+    def record(self, latency_ns):
+        self.counts[bucket(latency_ns)] += 1
+        self.count += 1
+        self.total_ns += latency_ns
+        if latency_ns > self.max_ns:
+            self.max_ns = latency_ns
+
+
+    def add(self, other):
+        """
+        Adds the latencies of another histogram to this one.
+        """
+
+        counts = self.counts
+        for index, count in enumerate(other.counts):
+            if count:
+                counts[index] += count
+
+        self.count += other.count
+        self.total_ns += other.total_ns
+        self.max_ns = max(self.max_ns, other.max_ns)
+
+
+    def percentile(self, p):
+        """
+        Returns the upper bound of the bucket of the p-th percentile latency,
+        using the nearest-rank method, or 0 if the histogram is empty.
+        """
+
+        if not self.count:
+            return 0
+
+        rank = max(int(round(p / 100.0 * self.count)), 1)
+        seen = 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if seen >= rank:
+                return min(bucket_bounds(index)[1], self.max_ns)
+
+        return self.max_ns
+
+
+    def mean(self):
+        return self.total_ns / float(self.count) if self.count else 0.0
+
+
+    def buckets(self):
+        """
+        Returns a list of (lowest ns, highest ns, count) tuples of the buckets
+        holding latencies, in increasing order.
+        """
+
+        return [bucket_bounds(index) + (count,)
+                for index, count in enumerate(self.counts) if count]
+
+
+    def format_bars(self, width=50):
+        """
+        Returns the histogram as text, one line per power of two from the
+        lowest to the highest latency, with a bar proportional to its count.
+        """
+
+        # buckets are joined per power of two to keep the output short.
+        powers = {}
+        for low, high, count in self.buckets():
+            power = max(high.bit_length() - 1, 0)
+            powers[power] = powers.get(power, 0) + count
+
+        if not powers:
+            return ""
+
+        largest = max(powers.values())
+        lines = []
+        for power in range(min(powers), max(powers) + 1):
+            count = powers.get(power, 0)
+            bar = "#" * int(round(float(width) * count / largest))
+            lines.append("%12s ns  %10d  %s" % ("< %d" % (2 << power), count, bar))
+
+        return "\n".join(lines)
@@ -0,0 +1,443 @@
+"""
+<Started>
+  October 2026
+
+<Purpose>
+  Read the synopsis of a system call directly from its man page source, e.g.
+  /usr/share/man/man2/open.2.gz, without running man.
+
+  Running man means running groff and a pager pipeline for every system call,
+  and the rendered output depends on the terminal width. Instead, the roff
+  source of the man page is decompressed in process and the requests of its
+  SYNOPSIS section are rendered to plain text lines, the same lines that
+  SyscallManual extracts from the output of man.
+
+  Redirects using ".so" requests (e.g. fstat.2 containing ".so man2/stat.2")
+  are followed, which is how aliases such as chown32 -> chown are implemented
+  by many distributions. Symbolic links to other pages are followed by the
+  file system.
+
+"""
+
+import bz2
+import gzip
+import hashlib
+import lzma
+import os
+import re
+
+
+# directories searched for man pages if MANPATH is not set.
+DEFAULT_MANPATH = ["/usr/local/share/man", "/usr/share/man"]
+
+# man source files can be stored uncompressed or compressed.
+MAN_SUFFIXES = {
+    "": open,
+    ".gz": gzip.open,
+    ".bz2": bz2.open,
+    ".xz": lzma.open,
+}
+
+# the number of ".so" redirects followed before giving up.
+MAX_REDIRECTS = 5
+
+# roff macros whose arguments are printed in alternating fonts, without spaces
+# between them, e.g. .BI "int open(const char *" pathname );
+ALTERNATING_FONT_MACROS = set(["BI", "IB", "BR", "RB", "IR", "RI"])
+
+# roff macros whose arguments are printed in a single font, separated by spaces.
+SINGLE_FONT_MACROS = set(["B", "I", "SM", "SB"])
+
+# roff requests and macros that start a new paragraph.
+PARAGRAPH_MACROS = set(["PP", "P", "LP", "sp"])
+
+# special characters given as \(xx or \[xx] and their plain text equivalents.
+# Any other special character is removed.
+SPECIAL_CHARACTERS = {
+    "aq": "'",
+    "dq": '"',
+    "oq": "'",
+    "cq": "'",
+    "lq": '"',
+    "rq": '"',
+    "em": "--",
+    "en": "-",
+    "hy": "-",
+    "mi": "-",
+    "rs": "\\",
+    "ti": "~",
+    "ha": "^",
+    "bu": "*",
+    "at": "@",
+    "sl": "/",
+}
+
+# escape sequences: fonts (\fB, \f[B], \f(BI), interpolated strings (\*x,
+# \*(xx, \*[xx]), special characters (\(xx, \[xx]) and single characters.
+_escape = re.compile(r"\\(f(?:\[[^\]]*\]|\(..|.)|\*(?:\[[^\]]*\]|\(..|.)|\[[^\]]*\]|\(..|.)")
+
+_section_header = re.compile(r'^\.SH\s+"?([^"]*?)"?\s*$')
+
+
+def manpath():
+    """
+    Returns the list of directories in which to look for man pages.
+    """
+
+    if os.environ.get("MANPATH"):
+        return [d for d in os.environ["MANPATH"].split(":") if d]
+
+    return DEFAULT_MANPATH
+
+
+def find_man_source(name, section="2"):
+    """
+    <Purpose>
+      Finds the man source file of the given name in the given section.
+
+    <Arguments>
+      name:
+        The name of the man page, e.g. a system call name.
+
+      section:
+        The man section in which to look.
+
+    <Exceptions>
+      None
+
+    <Side Effects>
+      None
+
+    <Returns>
+      The path to the man source file or None if no such file was found.
+    """
+
+    for man_dir in manpath():
+        for suffix in MAN_SUFFIXES:
+            path = os.path.join(man_dir, "man" + section,
+                                name + "." + section + suffix)
+            if os.path.isfile(path):
+                return path
+
+    return None
+
+
+def find_syscall_source(syscall_name):
+    """
+    Finds the man source file of a system call in section 2. Like man, if
+    there is no page for a name ending in 32 or 64 (e.g. chown32) the page of
+    the name without the number is used. Returns None if there is none.
+    """
+
+    path = find_man_source(syscall_name)
+
+    if path is None and (syscall_name.endswith("32") or syscall_name.endswith("64")):
+        path = find_man_source(syscall_name[:-2])
+
+    return path
+
+
+def read_man_source(path):
+    """
+    Returns the content of the man source file in path as a byte string,
+    decompressing it if required.
+    """
+
+    for suffix, opener in MAN_SUFFIXES.items():
+        if suffix and path.endswith(suffix):
+            break
+    else:
+        opener = open
+
+    with opener(path, "rb") as man_file:
+        return man_file.read()
+
+
+def redirect_target(content):
+    """
+    Returns the name and section of the page a man source file redirects to
+    using a ".so man2/chown.2" line, or None if it is not a redirect.
+    """
+
+    for line in content.split(b"\n"):
+        if line.startswith(b".so "):
+            target = line[4:].strip().decode("utf-8", "replace")
+            page = os.path.basename(target)
+            if "." not in page:
+                return None
+            name, section = page.rsplit(".", 1)
+            return name, section
+
+        # redirects come before any actual content.
+        if line and not line.startswith(b'.\\"'):
+            return None
+
+    return None
+
+
+def read_synopsis(syscall_name):
+    """
+    <Purpose>
+      Reads the synopsis of a system call from its man page source.
+
+      Like man, if there is no page for a name ending in 32 or 64 (e.g.
+      chown32) the page of the name without the number is used.
+
+    <Arguments>
+      syscall_name:
+        The name of the system call.
+
+    <Exceptions>
+      An Exception is raised if the man page does not have a SYNOPSIS section or
+      has too many redirects.
+
+    <Side Effects>
+      None
+
+    <Returns>
+      None if no man page source was found. Otherwise a list of the synopsis
+      lines, stripped, as they would appear in the output of man.
+    """
+
+    path = find_syscall_source(syscall_name)
+    if path is None:
+        return None
+
+    for _ in range(MAX_REDIRECTS + 1):
+        content = read_man_source(path)
+
+        target = redirect_target(content)
+        if target is None:
+            return render_synopsis(content.decode("utf-8", "replace").split("\n"))
+
+        path = find_man_source(*target)
+        if path is None:
+            return None
+
+    raise Exception("Too many man page redirects for: " + syscall_name)
+
+
+def source_digest(syscall_name):
+    """
+    <Purpose>
+      Computes a digest of the man page source of a system call, following
+      redirects. Unlike SynopsisCache keys it only depends on the content of
+      the source files, not on their paths or modification times, so it is the
+      same on every host with the same man pages.
+
+    <Arguments>
+      syscall_name:
+        The name of the system call.
+
+    <Exceptions>
+      None
+
+    <Side Effects>
+      Reads the man source files of the system call.
+
+    <Returns>
+      A hex digest string, or None if no man page source was found or a
+      redirect could not be followed.
+    """
+
+    path = find_syscall_source(syscall_name)
+    if path is None:
+        return None
+
+    digest = hashlib.sha256()
+    for _ in range(MAX_REDIRECTS + 1):
+        try:
+            content = read_man_source(path)
+        except (IOError, OSError, EOFError):
+            return None
+
+        digest.update(hashlib.sha256(content).digest())
+
+        target = redirect_target(content)
+        if target is None:
+            return digest.hexdigest()
+
+        path = find_man_source(*target)
+        if path is None:
+            return None
+
+    return None
+
+
+def render_synopsis(roff_lines):
+    """
+    <Purpose>
+      Renders the SYNOPSIS section of a man page source to plain text.
+
+      Example source:
+
+        .SH SYNOPSIS
+        .nf
+        .B #include <fcntl.h>
+        .PP
+        .BI "int open(const char *" pathname ", int " flags );
+
+      is rendered to:
+
+        #include <fcntl.h>
+
+        int open(const char *pathname, int flags);
+
+    <Arguments>
+      roff_lines:
+        The lines of the man page source.
+
+    <Exceptions>
+      An Exception is raised if there is no SYNOPSIS section.
+
+    <Side Effects>
+      None
+
+    <Returns>
+      A list of the rendered, stripped lines of the SYNOPSIS section.
+    """
+
+    synopsis_lines = []
+    in_synopsis = False
+
+    for line in _join_continuations(roff_lines):
+        header = _section_header.match(line)
+        if header:
+            if in_synopsis:
+                return synopsis_lines
+            in_synopsis = header.group(1).strip() == "SYNOPSIS"
+            continue
+
+        if not in_synopsis:
+            continue
+
+        text = _render_line(line)
+        if text is not None:
+            synopsis_lines.append(text.strip())
+
+    if in_synopsis:
+        return synopsis_lines
+
+    raise Exception("Reached end of man page while looking for SYNOPSIS line.")
+
+
+def _join_continuations(roff_lines):
+    """
+    Yields the lines of a man page source with lines ending in an escaped
+    newline joined with the line following them.
+    """
+
+    pending = ""
+    for line in roff_lines:
+        # remove comments.
+        comment = line.find('\\"')
+        if comment != -1 and (comment == 0 or line[comment - 1] != "\\"):
+            line = line[:comment]
+            if line.strip() in (".", "'", ""):
+                continue
+
+        if line.endswith("\\") and not line.endswith("\\\\"):
+            pending += line[:-1]
+            continue
+
+        if line.endswith("\\c"):
+            pending += line[:-2]
+            continue
+
+        yield pending + line
+        pending = ""
+
+    if pending:
+        yield pending
+
+
+def _render_line(line):
+    """
+    Renders a single line of a man page source. Returns None for requests that
+    do not produce any text.
+    """
+
+    if not line.startswith((".", "'")):
+        return _unescape(line)
+
+    macro, _, arguments = line[1:].strip().partition(" ")
+
+    if macro in ALTERNATING_FONT_MACROS:
+        return "".join(_unescape(arg) for arg in _split_arguments(arguments))
+
+    if macro in SINGLE_FONT_MACROS:
+        return " ".join(_unescape(arg) for arg in _split_arguments(arguments))
+
+    if macro in PARAGRAPH_MACROS:
+        return ""
+
+    # formatting requests such as .nf, .fi, .RS, .RE and .ad.
+    return None
+
+
+def _split_arguments(arguments):
+    """
+    Splits the arguments of a roff macro. Arguments are separated by spaces
+    unless quoted, and "" inside a quoted argument is a literal quote.
+    """
+
+    result = []
+    index = 0
+    length = len(arguments)
+
+    while index < length:
+        if arguments[index] in " \t":
+            index += 1
+            continue
+
+        if arguments[index] == '"':
+            index += 1
+            argument = ""
+            while index < length:
+                if arguments[index] == '"':
+                    if index + 1 < length and arguments[index + 1] == '"':
+                        argument += '"'
+                        index += 2
+                        continue
+                    index += 1
+                    break
+                argument += arguments[index]
+                index += 1
+            result.append(argument)
+        else:
+            end = index
+            while end < length and arguments[end] not in " \t":
+                end += 1
+            result.append(arguments[index:end])
+            index = end
+
+    return result
+
+
+def _unescape(text):
+    return _escape.sub(_replace_escape, text)
+
+
+def _replace_escape(match):
+    escape = match.group(1)
+
+    if escape[0] in "f*":
+        return ""
+
+    if escape[0] == "(":
+        return SPECIAL_CHARACTERS.get(escape[1:], "")
+
+    if escape[0] == "[":
+        return SPECIAL_CHARACTERS.get(escape[1:-1], "")
+
+    if escape in "-":
+        return "-"
+
+    if escape in "e\\":
+        return "\\"
+
+    if escape in " ~0":
+        return " "
+
+    # non-printing escapes such as \&, \| and \^.
+    return ""
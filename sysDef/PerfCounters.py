@@ -0,0 +1,369 @@
+"""
+<Started>
+  October 2026
+
+<Purpose>
+  Count what the kernel does while system calls execute, using perf_event_open
+  counters of the running thread.
+
+  The counters are opened as one group through the raw perf_event_open system
+  call, so that all of them are read at once with a single read(). Software
+  counters (task-clock, context switches, page faults) are available on any
+  Linux system, including virtual machines. Hardware counters (cycles,
+  instructions) are opened when the CPU and the hypervisor provide them and
+  are otherwise reported as unavailable.
+
+  The counters are read before and after a call or a batch of calls and the
+  differences are added up per system call. The reads are system calls
+  themselves, so a small constant amount of task-clock, and of cycles and
+  instructions, is included in every measurement; measure batches to make it
+  negligible.
+
+  The file descriptors of the counters are moved to FD_FLOOR and above, away
+  from the small file descriptors that the measured system calls close or
+  replace, e.g. close(0) or dup2(0, 0).
+
+  Example printing the counters of a few calls of getpid:
+
+    python -m sysDef.PerfCounters
+
+"""
+
+import ctypes
+import errno
+import fcntl
+import os
+import struct
+
+from . import StructLayouts
+from .SyscallTable import SyscallTable
+
+
+# perf_event_attr types and configs.
+PERF_TYPE_HARDWARE = 0
+PERF_TYPE_SOFTWARE = 1
+
+PERF_COUNT_HW_CPU_CYCLES = 0
+PERF_COUNT_HW_INSTRUCTIONS = 1
+
+PERF_COUNT_SW_TASK_CLOCK = 1
+PERF_COUNT_SW_PAGE_FAULTS = 2
+PERF_COUNT_SW_CONTEXT_SWITCHES = 3
+
+# perf_event_attr read_format.
+PERF_FORMAT_TOTAL_TIME_ENABLED = 1 << 0
+PERF_FORMAT_TOTAL_TIME_RUNNING = 1 << 1
+PERF_FORMAT_GROUP = 1 << 3
+
+# perf_event_attr flags bits.
+FLAG_EXCLUDE_KERNEL = 1 << 5
+FLAG_EXCLUDE_HV = 1 << 6
+
+# perf_event_open flags.
+PERF_FLAG_FD_CLOEXEC = 1 << 3
+
+# the lowest file descriptor the counters are moved to. Lower file descriptors
+# are left to the system calls being measured.
+FD_FLOOR = 1000
+
+# name -> (type, config) of the counters opened by default, in the order they
+# are reported. The first is the group leader and must be a software counter.
+EVENTS = (
+    ("task_clock_ns", (PERF_TYPE_SOFTWARE, PERF_COUNT_SW_TASK_CLOCK)),
+    ("context_switches", (PERF_TYPE_SOFTWARE, PERF_COUNT_SW_CONTEXT_SWITCHES)),
+    ("page_faults", (PERF_TYPE_SOFTWARE, PERF_COUNT_SW_PAGE_FAULTS)),
+    ("cycles", (PERF_TYPE_HARDWARE, PERF_COUNT_HW_CPU_CYCLES)),
+    ("instructions", (PERF_TYPE_HARDWARE, PERF_COUNT_HW_INSTRUCTIONS)),
+)
+
+_syscall = ctypes.CDLL(None, use_errno=True).syscall
+_syscall.restype = ctypes.c_long
+
+
+def perf_event_open(attr, pid=0, cpu=-1, group_fd=-1, flags=PERF_FLAG_FD_CLOEXEC):
+    """
+    <Purpose>
+      Executes the perf_event_open system call.
+
+    <Arguments>
+      attr:
+        A StructLayouts.perf_event_attr.
+
+      pid, cpu, group_fd, flags:
+        As for perf_event_open(2). By default the counter counts the calling
+        thread on any CPU.
+
+    <Exceptions>
+      OSError is raised if the counter can not be opened.
+      An Exception is raised if perf_event_open has no number on the running
+      architecture.
+
+    <Side Effects>
+      A file descriptor is opened.
+
+    <Returns>
+      The file descriptor of the counter.
+    """
+
+    number = SyscallTable.load().number("perf_event_open")
+    if number is None:
+        raise Exception("perf_event_open is not available on this architecture")
+
+    fd = _syscall(ctypes.c_long(number), ctypes.byref(attr), ctypes.c_int(pid),
+                  ctypes.c_int(cpu), ctypes.c_int(group_fd), ctypes.c_ulong(flags))
+    if fd < 0:
+        error = ctypes.get_errno()
+        raise OSError(error, os.strerror(error))
+
+    return fd
+
+
+
+class PerfCounters:
+    """
+    <Purpose>
+      A group of perf_event_open counters of the running thread, and their
+      totals per system call.
+
+      Use as a context manager, or call close(), to close the counters.
+
+    <Attributes>
+      self.events:
+        The names of the opened counters, in the order of the values returned
+        by read().
+
+      self.unavailable:
+        A dictionary of the counters that could not be opened and the reason.
+
+      self.exclude_kernel:
+        True if the kernel does not allow counting in kernel mode
+        (perf_event_paranoid), in which case only user mode is counted.
+
+      self.totals:
+        A dictionary mapping system call names to [calls, value, value, ...]
+        lists, the values in the order of self.events.
+
+    """
+
+    def __init__(self, events=EVENTS):
+        self.events = []
+        self.unavailable = {}
+        self.exclude_kernel = False
+        self.totals = {}
+        self._fds = []
+
+        try:
+            self._open(events)
+        except Exception:
+            self.close()
+            raise
+
+        # nr, time_enabled, time_running, one value per counter.
+        self._format = "=%dQ" % (3 + len(self.events))
+        self._size = struct.calcsize(self._format)
+
+
+    def __enter__(self):
+        return self
+
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+    def close(self):
+        for fd in self._fds:
+            os.close(fd)
+        self._fds = []
+
+
+    def read(self):
+        """
+        Returns the current values of the counters, in the order of
+        self.events. Values are scaled up if the counters were not running all
+        the time they were enabled, e.g. because hardware counters were
+        multiplexed.
+        """
+
+        values = struct.unpack(self._format, os.read(self._fds[0], self._size))
+        time_enabled, time_running = values[1], values[2]
+        values = values[3:]
+
+        if 0 < time_running < time_enabled:
+            return [value * time_enabled // time_running for value in values]
+
+        return list(values)
+
+
+    def add(self, key, before, after, calls=1):
+        """
+        Adds the differences between two reads to the totals of a system call
+        executed calls times between them. The key is usually the name of the
+        system call.
+        """
+
+        totals = self.totals.get(key)
+        if totals is None:
+            totals = self.totals[key] = [0] * (1 + len(self.events))
+
+        totals[0] += calls
+        for index in range(len(self.events)):
+            totals[index + 1] += after[index] - before[index]
+
+
+    def call(self, call_plan, repeat=1, key=None):
+        """
+        <Purpose>
+          Executes a CallPlan repeatedly between two reads of the counters and
+          adds the differences to its totals.
+
+        <Arguments>
+          call_plan:
+            The CallPlan to execute.
+
+          repeat:
+            The number of times to execute it.
+
+          key:
+            The key of the totals to add to. Defaults to the name of the call
+            plan.
+
+        <Exceptions>
+          None
+
+        <Side Effects>
+          The call plan is executed.
+
+        <Returns>
+          The return value of the last execution.
+        """
+
+        return_value = None
+
+        before = self.read()
+        for _ in range(repeat):
+            return_value = call_plan()
+        after = self.read()
+
+        if key is None:
+            key = call_plan.name
+        self.add(key, before, after, repeat)
+
+        return return_value
+
+
+    def per_call(self, key):
+        """
+        Returns a dictionary of the average value of each counter per call of
+        the system call with the given key, or None if it was not counted.
+        """
+
+        totals = self.totals.get(key)
+        if totals is None or totals[0] == 0:
+            return None
+
+        return dict((event, float(total) / totals[0])
+                    for event, total in zip(self.events, totals[1:]))
+
+
+    def _open(self, events):
+        flags = 0
+
+        for name, (event_type, config) in events:
+            attr = StructLayouts.perf_event_attr()
+            attr.type = event_type
+            attr.size = ctypes.sizeof(attr)
+            attr.config = config
+            attr.read_format = (PERF_FORMAT_GROUP | PERF_FORMAT_TOTAL_TIME_ENABLED |
+                                PERF_FORMAT_TOTAL_TIME_RUNNING)
+            attr.flags = flags
+
+            group_fd = self._fds[0] if self._fds else -1
+
+            try:
+                fd = perf_event_open(attr, group_fd=group_fd)
+            except OSError as e:
+                if e.errno == errno.EACCES and not self.exclude_kernel and not self._fds:
+                    # retry the leader counting user mode only.
+                    flags = FLAG_EXCLUDE_KERNEL | FLAG_EXCLUDE_HV
+                    self.exclude_kernel = True
+                    attr.flags = flags
+                    fd = perf_event_open(attr, group_fd=group_fd)
+
+                elif self._fds:
+                    self.unavailable[name] = e.strerror
+                    continue
+
+                else:
+                    raise
+
+            self._fds.append(_move_fd(fd))
+            self.events.append(name)
+
+
+
+def _move_fd(fd):
+    """
+    Returns a duplicate of fd at FD_FLOOR or above and closes fd. fd is
+    returned as it is if the file descriptor limit is lower than FD_FLOOR.
+    """
+
+    try:
+        moved = fcntl.fcntl(fd, fcntl.F_DUPFD_CLOEXEC, FD_FLOOR)
+    except OSError as e:
+        if e.errno == errno.EINVAL:
+            return fd
+        os.close(fd)
+        raise
+
+    os.close(fd)
+    return moved
+
+
+
+def format_counters(counters, names):
+    """
+    Returns the per call values of the counters of the given system calls
+    formatted as a text table, one row per system call.
+    """
+
+    headers = ["syscall"] + counters.events
+    rows = []
+    for name in list(dict.fromkeys(names)):
+        per_call = counters.per_call(name)
+        if per_call is not None:
+            rows.append([name] + ["%.2f" % per_call[event] for event in counters.events])
+
+    widths = [len(header) for header in headers]
+    for row in rows:
+        widths = [max(width, len(cell)) for width, cell in zip(widths, row)]
+
+    lines = ["  ".join(h.ljust(w) if i == 0 else h.rjust(w)
+                       for i, (h, w) in enumerate(zip(headers, widths)))]
+    for row in rows:
+        lines.append("  ".join(c.ljust(w) if i == 0 else c.rjust(w)
+                               for i, (c, w) in enumerate(zip(row, widths))))
+
+    for name, reason in sorted(counters.unavailable.items()):
+        lines.append("%s: not available (%s)" % (name, reason))
+
+    if counters.exclude_kernel:
+        lines.append("kernel mode not counted (perf_event_paranoid)")
+
+    return "\n".join(lines)
+
+
+
+def main():
+    getpid = ctypes.CDLL(None).getpid
+
+    with PerfCounters() as counters:
+        for _ in range(10000):
+            before = counters.read()
+            getpid()
+            counters.add("getpid", before, counters.read())
+
+        print(format_counters(counters, ["getpid"]))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,507 @@
+"""
+<Started>
+  October 2026
+
+<Purpose>
+  Keep the latencies of runs on different kernels and hosts in one SQLite
+  file and find the syscalls whose latencies regressed between them.
+
+  A run is a set of latencies, each keyed by syscall name and argument set,
+  stored with metadata about the host it was measured on (host name, kernel
+  release, machine, CPU model and count) and a free-form label. Runs are
+  usually added from the call logs written with --capture (see CallLog.py).
+
+  Two sets of runs, a baseline and a candidate, are compared with the
+  Mann-Whitney U test on the whole latency distribution of each syscall and
+  argument set, optionally separately for each host. The latencies of all
+  syscalls and hosts are counted and ranked by SQLite in a single query with
+  window functions, so comparing hundreds of syscalls across many hosts costs
+  one pass over the data rather than a Python loop over the samples. The
+  p-values are then adjusted for the number of comparisons
+  (Benjamini-Hochberg), and a change is flagged when it is significant and the
+  median moved by at least a minimum relative amount.
+
+  Runs are added and compared with results_syscall.py. Example listing the
+  runs of a store:
+
+    python -m sysDef.ResultStore results.db
+
+"""
+
+import math
+import os
+import platform
+import sqlite3
+import time
+
+
+SCHEMA_VERSION = 1
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY,
+    label TEXT,
+    created TEXT NOT NULL,
+    hostname TEXT NOT NULL,
+    kernel TEXT NOT NULL,
+    machine TEXT NOT NULL,
+    cpu_model TEXT NOT NULL,
+    cpus INTEGER NOT NULL,
+    source TEXT
+);
+
+CREATE TABLE IF NOT EXISTS latencies (
+    run INTEGER NOT NULL REFERENCES runs(id) ON DELETE CASCADE,
+    syscall TEXT NOT NULL,
+    argument_set INTEGER NOT NULL,
+    latency_ns INTEGER NOT NULL
+);
+
+CREATE INDEX IF NOT EXISTS latencies_run ON latencies(run);
+"""
+
+# the columns of the runs table, which runs can be selected by.
+RUN_FIELDS = ("id", "label", "created", "hostname", "kernel", "machine", "cpu_model",
+              "cpus", "source")
+
+# percentiles reported for both sides of a comparison.
+PERCENTILES = (50, 90, 99)
+
+DEFAULT_ALPHA = 0.05
+DEFAULT_MIN_CHANGE = 0.05
+
+# statuses of a comparison.
+REGRESSION = "regression"
+IMPROVEMENT = "improvement"
+
+# counts the latencies of each side at each distinct latency of each syscall,
+# argument set and host, so that a few thousand rows remain of millions of
+# latencies, and ranks them. side is 0 for the baseline and 1 for the
+# candidate. The t latencies at one value take the ranks below + 1 to
+# below + t, so each gets the rank below + (t + 1) / 2, and add t ** 3 - t to
+# the tie correction. The nearest-rank percentile p of a side is the lowest
+# latency at which its cumulative count reaches n * p / 100.
+_COMPARE_QUERY = """
+WITH counted AS (
+    SELECT latencies.syscall AS syscall, %(argument_set)s AS argument_set,
+           %(host)s AS host, latencies.latency_ns AS latency_ns,
+           SUM(sides.side = 0) AS baseline, SUM(sides.side = 1) AS candidate
+    FROM latencies
+    JOIN temp.sides AS sides ON sides.run = latencies.run
+    JOIN runs ON runs.id = latencies.run
+    GROUP BY 1, 2, 3, 4
+),
+ranked AS (
+    SELECT syscall, argument_set, host, latency_ns, baseline, candidate,
+           baseline + candidate AS ties,
+           SUM(baseline + candidate) OVER ordered - baseline - candidate AS below,
+           SUM(baseline) OVER ordered AS baseline_cumulative,
+           SUM(candidate) OVER ordered AS candidate_cumulative,
+           SUM(baseline) OVER key AS baseline_n,
+           SUM(candidate) OVER key AS candidate_n
+    FROM counted
+    WINDOW key AS (PARTITION BY syscall, argument_set, host),
+           ordered AS (key ORDER BY latency_ns ROWS UNBOUNDED PRECEDING)
+)
+SELECT syscall, argument_set, host,
+       MAX(baseline_n), MAX(candidate_n),
+       TOTAL(candidate * (below + (ties + 1) / 2.0)),
+       TOTAL(ties * ties * ties - ties),
+       %(percentiles)s
+FROM ranked
+GROUP BY syscall, argument_set, host
+ORDER BY syscall, argument_set, host
+"""
+
+_PERCENTILE_COLUMN = ("MIN(CASE WHEN %(side)s_cumulative * 100 >= %(side)s_n * %(p)d "
+                      "THEN latency_ns END)")
+
+
+
+def host_metadata():
+    """
+    Returns a dictionary of the hostname, kernel, machine, cpu_model and
+    cpus of this host.
+    """
+
+    uname = os.uname()
+
+    cpu_model = platform.processor()
+    try:
+        with open("/proc/cpuinfo") as cpuinfo:
+            for line in cpuinfo:
+                if line.startswith("model name"):
+                    cpu_model = line.partition(":")[2].strip()
+                    break
+    except IOError:
+        pass
+
+    return {
+        "hostname": uname.nodename,
+        "kernel": uname.release,
+        "machine": uname.machine,
+        "cpu_model": cpu_model,
+        "cpus": os.cpu_count() or 1,
+    }
+
+
+
+class ResultStore:
+    """
+    <Purpose>
+      A SQLite file of latency runs.
+
+    <Attributes>
+      self.path:
+        The path of the store.
+
+    """
+
+    def __init__(self, path):
+        """
+        <Purpose>
+          Opens a store, creating it if it does not exist.
+
+        <Arguments>
+          path:
+            The path of the SQLite file.
+
+        <Exceptions>
+          An Exception is raised if the file is a store of another schema
+          version or not a SQLite file.
+
+        <Side Effects>
+          The file is opened until close() is called.
+
+        <Returns>
+          None
+        """
+
+        self.path = path
+        self._connection = sqlite3.connect(path)
+
+        try:
+            version = self._connection.execute("PRAGMA user_version").fetchone()[0]
+            if version not in (0, SCHEMA_VERSION):
+                raise Exception("Unsupported result store version %d: %s" % (version, path))
+
+            self._connection.executescript(SCHEMA)
+            self._connection.execute("PRAGMA user_version = %d" % SCHEMA_VERSION)
+            self._connection.execute("PRAGMA foreign_keys = ON")
+            self._connection.commit()
+
+        except sqlite3.DatabaseError as e:
+            self.close()
+            raise Exception("Not a result store: %s (%s)" % (path, e))
+
+        except Exception:
+            self.close()
+            raise
+
+
+    def __enter__(self):
+        return self
+
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+    def close(self):
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
+
+
+    def add_run(self, latencies, label=None, source=None, metadata=None):
+        """
+        <Purpose>
+          Adds a run.
+
+        <Arguments>
+          latencies:
+            An iterable of (syscall name, argument set, latency in ns) tuples.
+
+          label:
+            A label to select the run by, e.g. the kernel under test, or None.
+
+          source:
+            Where the latencies come from, e.g. the capture file, or None.
+
+          metadata:
+            A dictionary overriding items of host_metadata(), e.g. when the
+            latencies were measured on another host, or None.
+
+        <Exceptions>
+          None
+
+        <Side Effects>
+          The run is written to the store.
+
+        <Returns>
+          The id of the run.
+        """
+
+        host = host_metadata()
+        host.update(metadata or {})
+
+        with self._connection:
+            cursor = self._connection.execute(
+                "INSERT INTO runs (label, created, hostname, kernel, machine, cpu_model, "
+                "cpus, source) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (label, time.strftime("%Y-%m-%dT%H:%M:%S"), host["hostname"], host["kernel"],
+                 host["machine"], host["cpu_model"], host["cpus"], source))
+            run = cursor.lastrowid
+
+            self._connection.executemany(
+                "INSERT INTO latencies (run, syscall, argument_set, latency_ns) "
+                "VALUES (?, ?, ?, ?)",
+                ((run, name, argument_set, latency_ns)
+                 for name, argument_set, latency_ns in latencies))
+
+        return run
+
+
+    def add_call_log(self, call_log, label=None, source=None, metadata=None):
+        """
+        Adds the latencies of the calls of a CallLog as a run and returns its
+        id. See add_run.
+        """
+
+        names = call_log.names
+        columns = call_log.columns
+        syscall = columns["syscall"]
+        argument_set = columns["argument_set"]
+        start_ns = columns["start_ns"]
+        end_ns = columns["end_ns"]
+
+        latencies = ((names[syscall[index]], argument_set[index], end_ns[index] - start_ns[index])
+                     for index in range(len(call_log)))
+
+        return self.add_run(latencies, label, source, metadata)
+
+
+    def delete_run(self, run):
+        with self._connection:
+            self._connection.execute("DELETE FROM runs WHERE id = ?", (run,))
+
+
+    def runs(self):
+        """
+        Returns a list of dictionaries of the RUN_FIELDS of every run, with
+        the number of "latencies" it holds, in the order they were added.
+        """
+
+        rows = self._connection.execute(
+            "SELECT %s, (SELECT COUNT(*) FROM latencies WHERE latencies.run = runs.id) "
+            "FROM runs ORDER BY id" % ", ".join(RUN_FIELDS)).fetchall()
+
+        return [dict(zip(RUN_FIELDS + ("latencies",), row)) for row in rows]
+
+
+    def select_runs(self, selector):
+        """
+        <Purpose>
+          Returns the ids of the runs a selector selects.
+
+        <Arguments>
+          selector:
+            "latest" for the last added run, comma separated run ids (e.g.
+            "3,4") or comma separated field=value conditions that all hold
+            (e.g. "label=6.8,hostname=db1"), with fields from RUN_FIELDS.
+
+        <Exceptions>
+          An Exception is raised if the selector is invalid.
+
+        <Side Effects>
+          None
+
+        <Returns>
+          A list of run ids.
+        """
+
+        if selector == "latest":
+            row = self._connection.execute("SELECT MAX(id) FROM runs").fetchone()
+            return [row[0]] if row[0] is not None else []
+
+        items = [item.strip() for item in selector.split(",") if item.strip()]
+        if items and all(item.isdigit() for item in items):
+            query = "SELECT id FROM runs WHERE id IN (%s)" % ", ".join("?" * len(items))
+            return [row[0] for row in self._connection.execute(query, [int(item) for item in items])]
+
+        conditions = []
+        values = []
+        for item in items:
+            field, equals, value = item.partition("=")
+            field = field.strip()
+            if not equals or field not in RUN_FIELDS:
+                raise Exception("Invalid run selector %r, expected ids or %s=VALUE" %
+                                (item, "|".join(RUN_FIELDS)))
+            conditions.append("CAST(%s AS TEXT) = ?" % field)
+            values.append(value.strip())
+
+        if not conditions:
+            raise Exception("Empty run selector")
+
+        query = "SELECT id FROM runs WHERE %s ORDER BY id" % " AND ".join(conditions)
+        return [row[0] for row in self._connection.execute(query, values)]
+
+
+    def compare(self, baseline, candidate, per_host=False, by_argument_set=True,
+                alpha=DEFAULT_ALPHA, min_change=DEFAULT_MIN_CHANGE):
+        """
+        <Purpose>
+          Compares the latencies of two sets of runs.
+
+        <Arguments>
+          baseline, candidate:
+            Lists of the ids of the runs to compare.
+
+          per_host:
+            Compare the runs of each hostname separately instead of pooling
+            the runs of all hosts.
+
+          by_argument_set:
+            Compare each argument set of a syscall separately instead of
+            pooling them.
+
+          alpha:
+            The false discovery rate below which a change is significant.
+
+          min_change:
+            The relative change of the median below which a significant
+            change is not flagged.
+
+        <Exceptions>
+          An Exception is raised if a run is in both sets or a set is empty.
+
+        <Side Effects>
+          None
+
+        <Returns>
+          A list of dictionaries, one per syscall, argument set (None if
+          pooled) and host (None if pooled) measured in both sets, with the
+          sample sizes, the percentiles of both sides, the relative "change"
+          of the median, the probability "p_greater" that a candidate
+          latency is greater than a baseline latency, the adjusted p-value
+          "p" and the "status": REGRESSION, IMPROVEMENT or None.
+        """
+
+        if not baseline or not candidate:
+            raise Exception("Both the baseline and the candidate need at least one run")
+
+        if set(baseline) & set(candidate):
+            raise Exception("Runs in both the baseline and the candidate: " +
+                            ", ".join(str(run) for run in sorted(set(baseline) & set(candidate))))
+
+        connection = self._connection
+        connection.execute("CREATE TEMP TABLE IF NOT EXISTS sides "
+                           "(run INTEGER PRIMARY KEY, side INTEGER NOT NULL)")
+        connection.execute("DELETE FROM temp.sides")
+        connection.executemany("INSERT INTO temp.sides VALUES (?, ?)",
+                               [(run, 0) for run in baseline] + [(run, 1) for run in candidate])
+
+        percentile_columns = [_PERCENTILE_COLUMN % {"side": side, "p": p}
+                              for side in ("baseline", "candidate") for p in PERCENTILES]
+        query = _COMPARE_QUERY % {
+            "argument_set": "latencies.argument_set" if by_argument_set else "NULL",
+            "host": "runs.hostname" if per_host else "NULL",
+            "percentiles": ",\n       ".join(percentile_columns),
+        }
+
+        results = []
+        for row in connection.execute(query):
+            syscall, argument_set, host, n1, n2, rank_sum, tie_term = row[:7]
+            if not n1 or not n2:
+                continue
+
+            result = {
+                "syscall": syscall,
+                "argument_set": argument_set,
+                "host": host,
+                "baseline_n": n1,
+                "candidate_n": n2,
+            }
+            for index, (side, p) in enumerate((side, p) for side in ("baseline", "candidate")
+                                              for p in PERCENTILES):
+                result["%s_p%d_ns" % (side, p)] = row[7 + index]
+
+            u, z = _mann_whitney(n1, n2, rank_sum, tie_term)
+            result["p_greater"] = u / (n1 * n2)
+            result["p_raw"] = math.erfc(abs(z) / math.sqrt(2))
+
+            baseline_median = result["baseline_p50_ns"]
+            result["change"] = (result["candidate_p50_ns"] - baseline_median) / float(baseline_median) \
+                if baseline_median else 0.0
+
+            results.append(result)
+
+        connection.execute("DELETE FROM temp.sides")
+
+        _adjust_p_values(results)
+
+        for result in results:
+            result["status"] = None
+            if result["p"] < alpha and abs(result["change"]) >= min_change:
+                if result["change"] > 0 and result["p_greater"] > 0.5:
+                    result["status"] = REGRESSION
+                elif result["change"] < 0 and result["p_greater"] < 0.5:
+                    result["status"] = IMPROVEMENT
+
+        return results
+
+
+
+def _mann_whitney(n1, n2, rank_sum, tie_term):
+    """
+    Returns the U statistic of the candidate (the number of pairs in which
+    its latency is greater, ties counting half) and its z score under the
+    normal approximation, with tie and continuity corrections.
+    """
+
+    u = rank_sum - n2 * (n2 + 1) / 2.0
+    n = n1 + n2
+    mean = n1 * n2 / 2.0
+
+    variance = n1 * n2 / 12.0 * ((n + 1) - (tie_term / (n * (n - 1)) if n > 1 else 0))
+    if variance <= 0:
+        return u, 0.0
+
+    difference = u - mean
+    difference -= math.copysign(min(0.5, abs(difference)), difference)
+
+    return u, difference / math.sqrt(variance)
+
+
+def _adjust_p_values(results):
+    """
+    Sets the "p" of each result to its p_raw adjusted with the
+    Benjamini-Hochberg procedure.
+    """
+
+    order = sorted(range(len(results)), key=lambda index: results[index]["p_raw"])
+    count = len(results)
+
+    adjusted = 1.0
+    for position in range(count - 1, -1, -1):
+        result = results[order[position]]
+        adjusted = min(adjusted, result["p_raw"] * count / (position + 1))
+        result["p"] = adjusted
+
+
+
+def main():
+    import sys
+
+    if(len(sys.argv) != 2):
+        print("Usage: python -m sysDef.ResultStore <store>")
+        exit()
+
+    with ResultStore(sys.argv[1]) as store:
+        for run in store.runs():
+            print("%4d  %s  %-16s %-16s %-24s %10d latencies" % (
+                run["id"], run["created"], run["label"] or "", run["hostname"], run["kernel"],
+                run["latencies"]))
+
+if __name__ == "__main__":
+    main()
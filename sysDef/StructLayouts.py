@@ -0,0 +1,325 @@
+"""
+<Started>
+  October 2026
+
+<Purpose>
+  ctypes layouts of the kernel and libc structures that system calls take
+  pointers to, registered by the name they appear under in definitions, e.g.
+  "stat" for "struct stat *statbuf".
+
+  The layouts are those of 64-bit Linux (LP64) as seen through glibc on
+  x86_64. Most are the same on other 64-bit architectures; where they are not
+  (e.g. struct stat on aarch64) the buffers of BufferPool leave zeroed slack
+  after the structure, at least the size of another structure, that a larger
+  structure is written to instead of other memory.
+
+  Structures whose fields are never looked at are declared as opaque byte
+  arrays of the right size.
+
+  Example registering an additional layout:
+
+    StructLayouts.register_layout("my_struct", MyStructure)
+
+"""
+
+import ctypes
+import os
+
+
+# the machine the layouts are for, as platform.machine() reports it.
+# platform itself is not imported, it slows down start up.
+_MACHINE = os.uname().machine
+
+
+def _opaque(name, size):
+    """
+    Returns a structure of the given size without named fields.
+    """
+
+    return type(name, (ctypes.Structure,), {"_fields_": [("data", ctypes.c_ubyte * size)]})
+
+
+
+class sockaddr(ctypes.Structure):
+    """
+    struct sockaddr {
+        unsigned short    sa_family;    // address family, AF_xxx
+        char              sa_data[14];  // 14 bytes of protocol address
+    };
+    """
+    _fields_ = (('family', ctypes.c_ushort), ('data', ctypes.c_byte * 14))
+
+
+class timespec(ctypes.Structure):
+    _fields_ = (('tv_sec', ctypes.c_long), ('tv_nsec', ctypes.c_long))
+
+
+class timeval(ctypes.Structure):
+    _fields_ = (('tv_sec', ctypes.c_long), ('tv_usec', ctypes.c_long))
+
+
+class timezone(ctypes.Structure):
+    _fields_ = (('tz_minuteswest', ctypes.c_int), ('tz_dsttime', ctypes.c_int))
+
+
+class itimerspec(ctypes.Structure):
+    _fields_ = (('it_interval', timespec), ('it_value', timespec))
+
+
+class itimerval(ctypes.Structure):
+    _fields_ = (('it_interval', timeval), ('it_value', timeval))
+
+
+class stat(ctypes.Structure):
+    _fields_ = (('st_dev', ctypes.c_ulong),
+                ('st_ino', ctypes.c_ulong),
+                ('st_nlink', ctypes.c_ulong),
+                ('st_mode', ctypes.c_uint),
+                ('st_uid', ctypes.c_uint),
+                ('st_gid', ctypes.c_uint),
+                ('__pad0', ctypes.c_int),
+                ('st_rdev', ctypes.c_ulong),
+                ('st_size', ctypes.c_long),
+                ('st_blksize', ctypes.c_long),
+                ('st_blocks', ctypes.c_long),
+                ('st_atim', timespec),
+                ('st_mtim', timespec),
+                ('st_ctim', timespec),
+                ('__unused', ctypes.c_long * 3))
+
+
+class statfs(ctypes.Structure):
+    _fields_ = (('f_type', ctypes.c_long),
+                ('f_bsize', ctypes.c_long),
+                ('f_blocks', ctypes.c_ulong),
+                ('f_bfree', ctypes.c_ulong),
+                ('f_bavail', ctypes.c_ulong),
+                ('f_files', ctypes.c_ulong),
+                ('f_ffree', ctypes.c_ulong),
+                ('f_fsid', ctypes.c_int * 2),
+                ('f_namelen', ctypes.c_long),
+                ('f_frsize', ctypes.c_long),
+                ('f_flags', ctypes.c_long),
+                ('f_spare', ctypes.c_long * 4))
+
+
+class iovec(ctypes.Structure):
+    _fields_ = (('iov_base', ctypes.c_void_p), ('iov_len', ctypes.c_size_t))
+
+
+class msghdr(ctypes.Structure):
+    _fields_ = (('msg_name', ctypes.c_void_p),
+                ('msg_namelen', ctypes.c_uint),
+                ('msg_iov', ctypes.POINTER(iovec)),
+                ('msg_iovlen', ctypes.c_size_t),
+                ('msg_control', ctypes.c_void_p),
+                ('msg_controllen', ctypes.c_size_t),
+                ('msg_flags', ctypes.c_int))
+
+
+class mmsghdr(ctypes.Structure):
+    _fields_ = (('msg_hdr', msghdr), ('msg_len', ctypes.c_uint))
+
+
+class sigaction(ctypes.Structure):
+    _fields_ = (('sa_handler', ctypes.c_void_p),
+                ('sa_mask', ctypes.c_ulong * 16),
+                ('sa_flags', ctypes.c_int),
+                ('sa_restorer', ctypes.c_void_p))
+
+
+class rlimit(ctypes.Structure):
+    _fields_ = (('rlim_cur', ctypes.c_ulong), ('rlim_max', ctypes.c_ulong))
+
+
+class pollfd(ctypes.Structure):
+    _fields_ = (('fd', ctypes.c_int), ('events', ctypes.c_short), ('revents', ctypes.c_short))
+
+
+class epoll_event(ctypes.Structure):
+    # packed on x86_64 only, see __EPOLL_PACKED in <sys/epoll.h>.
+    if _MACHINE == "x86_64":
+        _pack_ = 1
+    _fields_ = (('events', ctypes.c_uint32), ('data', ctypes.c_uint64))
+
+
+class sched_param(ctypes.Structure):
+    _fields_ = (('sched_priority', ctypes.c_int),)
+
+
+class sched_attr(ctypes.Structure):
+    _fields_ = (('size', ctypes.c_uint32),
+                ('sched_policy', ctypes.c_uint32),
+                ('sched_flags', ctypes.c_uint64),
+                ('sched_nice', ctypes.c_int32),
+                ('sched_priority', ctypes.c_uint32),
+                ('sched_runtime', ctypes.c_uint64),
+                ('sched_deadline', ctypes.c_uint64),
+                ('sched_period', ctypes.c_uint64),
+                ('sched_util_min', ctypes.c_uint32),
+                ('sched_util_max', ctypes.c_uint32))
+
+
+class rusage(ctypes.Structure):
+    _fields_ = (('ru_utime', timeval), ('ru_stime', timeval), ('ru_fields', ctypes.c_long * 14))
+
+
+class tms(ctypes.Structure):
+    _fields_ = (('tms_utime', ctypes.c_long),
+                ('tms_stime', ctypes.c_long),
+                ('tms_cutime', ctypes.c_long),
+                ('tms_cstime', ctypes.c_long))
+
+
+class utimbuf(ctypes.Structure):
+    _fields_ = (('actime', ctypes.c_long), ('modtime', ctypes.c_long))
+
+
+class utsname(ctypes.Structure):
+    _fields_ = (('sysname', ctypes.c_char * 65),
+                ('nodename', ctypes.c_char * 65),
+                ('release', ctypes.c_char * 65),
+                ('version', ctypes.c_char * 65),
+                ('machine', ctypes.c_char * 65),
+                ('domainname', ctypes.c_char * 65))
+
+
+class sysinfo(ctypes.Structure):
+    _fields_ = (('uptime', ctypes.c_long),
+                ('loads', ctypes.c_ulong * 3),
+                ('totalram', ctypes.c_ulong),
+                ('freeram', ctypes.c_ulong),
+                ('sharedram', ctypes.c_ulong),
+                ('bufferram', ctypes.c_ulong),
+                ('totalswap', ctypes.c_ulong),
+                ('freeswap', ctypes.c_ulong),
+                ('procs', ctypes.c_ushort),
+                ('pad', ctypes.c_ushort),
+                ('totalhigh', ctypes.c_ulong),
+                ('freehigh', ctypes.c_ulong),
+                ('mem_unit', ctypes.c_uint))
+
+
+class mq_attr(ctypes.Structure):
+    _fields_ = (('mq_flags', ctypes.c_long),
+                ('mq_maxmsg', ctypes.c_long),
+                ('mq_msgsize', ctypes.c_long),
+                ('mq_curmsgs', ctypes.c_long),
+                ('__reserved', ctypes.c_long * 4))
+
+
+class sembuf(ctypes.Structure):
+    _fields_ = (('sem_num', ctypes.c_ushort), ('sem_op', ctypes.c_short), ('sem_flg', ctypes.c_short))
+
+
+class io_event(ctypes.Structure):
+    _fields_ = (('data', ctypes.c_uint64),
+                ('obj', ctypes.c_uint64),
+                ('res', ctypes.c_int64),
+                ('res2', ctypes.c_int64))
+
+
+class file_handle(ctypes.Structure):
+    # followed by handle_bytes bytes of handle.
+    _fields_ = (('handle_bytes', ctypes.c_uint), ('handle_type', ctypes.c_int))
+
+
+class robust_list_head(ctypes.Structure):
+    _fields_ = (('list', ctypes.c_void_p),
+                ('futex_offset', ctypes.c_long),
+                ('list_op_pending', ctypes.c_void_p))
+
+
+class linux_dirent64(ctypes.Structure):
+    # followed by the name of the entry.
+    _fields_ = (('d_ino', ctypes.c_uint64),
+                ('d_off', ctypes.c_int64),
+                ('d_reclen', ctypes.c_ushort),
+                ('d_type', ctypes.c_ubyte))
+
+
+class linux_dirent(ctypes.Structure):
+    # followed by the name and type of the entry.
+    _fields_ = (('d_ino', ctypes.c_ulong),
+                ('d_off', ctypes.c_ulong),
+                ('d_reclen', ctypes.c_ushort))
+
+
+class user_desc(ctypes.Structure):
+    _fields_ = (('entry_number', ctypes.c_uint),
+                ('base_addr', ctypes.c_uint),
+                ('limit', ctypes.c_uint),
+                ('flags', ctypes.c_uint))
+
+
+class perf_event_attr(ctypes.Structure):
+    # the bit fields from disabled to the end of the first 64 bits are in
+    # flags. Unions are named after their first member.
+    _fields_ = (('type', ctypes.c_uint32),
+                ('size', ctypes.c_uint32),
+                ('config', ctypes.c_uint64),
+                ('sample_period', ctypes.c_uint64),
+                ('sample_type', ctypes.c_uint64),
+                ('read_format', ctypes.c_uint64),
+                ('flags', ctypes.c_uint64),
+                ('wakeup_events', ctypes.c_uint32),
+                ('bp_type', ctypes.c_uint32),
+                ('bp_addr', ctypes.c_uint64),
+                ('bp_len', ctypes.c_uint64),
+                ('branch_sample_type', ctypes.c_uint64),
+                ('sample_regs_user', ctypes.c_uint64),
+                ('sample_stack_user', ctypes.c_uint32),
+                ('clockid', ctypes.c_int32),
+                ('sample_regs_intr', ctypes.c_uint64),
+                ('aux_watermark', ctypes.c_uint32),
+                ('sample_max_stack', ctypes.c_uint16),
+                ('__reserved_2', ctypes.c_uint16),
+                ('aux_sample_size', ctypes.c_uint32),
+                ('__reserved_3', ctypes.c_uint32),
+                ('sig_data', ctypes.c_uint64),
+                ('config3', ctypes.c_uint64))
+
+
+# typedef'd structures, not preceded by "struct" in definitions.
+fd_set = _opaque("fd_set", 128)
+
+timex = _opaque("timex", 208)
+sigevent = _opaque("sigevent", 64)
+iocb = _opaque("iocb", 64)
+shmid_ds = _opaque("shmid_ds", 112)
+msqid_ds = _opaque("msqid_ds", 120)
+getcpu_cache = _opaque("getcpu_cache", 128)
+
+
+# name in definitions -> layout.
+STRUCT_LAYOUTS = {}
+
+for _layout in (sockaddr, timespec, timeval, timezone, itimerspec, itimerval,
+                stat, statfs, iovec, msghdr, mmsghdr, sigaction, rlimit, pollfd,
+                epoll_event, sched_param, sched_attr, rusage, tms, utimbuf,
+                utsname, sysinfo, mq_attr, sembuf, io_event, file_handle,
+                robust_list_head, linux_dirent64, linux_dirent, user_desc,
+                perf_event_attr, fd_set, timex, sigevent, iocb, shmid_ds,
+                msqid_ds, getcpu_cache):
+    STRUCT_LAYOUTS[_layout.__name__] = _layout
+
+# old_linux_dirent has the layout of linux_dirent.
+STRUCT_LAYOUTS["old_linux_dirent"] = linux_dirent
+
+
+def register_layout(name, layout):
+    """
+    Registers the ctypes layout of the structure with the given name as it
+    appears in definitions, replacing any existing one.
+    """
+
+    STRUCT_LAYOUTS[name] = layout
+
+
+def get_layout(name):
+    """
+    Returns the ctypes layout of the structure with the given name, or None if
+    there is none.
+    """
+
+    return STRUCT_LAYOUTS.get(name)
@@ -0,0 +1,217 @@
+"""
+<Started>
+  October 2026
+
+<Purpose>
+  An on-disk cache of the synopsis part of system call man pages.
+
+  Reading a man page means running man, which in turn runs groff and a pager
+  pipeline. On a host where the man pages have not changed since the last
+  time the definitions were generated, all this work can be skipped by
+  reusing the synopsis lines read the previous time.
+
+  Each cache entry is keyed by the system call name and by the path,
+  modification time and content hash of every man source file the page is
+  built from, including the target of a ".so" redirect. Upgrading the man
+  pages changes these and therefore automatically invalidates the entry.
+
+  Only the synopsis lines are stored, not the whole rendered man page.
+
+"""
+
+import hashlib
+import json
+import os
+
+from .ManSource import find_man_source, find_syscall_source, read_man_source, redirect_target
+
+
+# bump this if the format of the cache entries changes.
+CACHE_VERSION = 1
+
+
+def default_cache_dir():
+    """
+    Returns the default directory in which the synopsis cache is stored.
+    """
+
+    cache_home = os.environ.get("XDG_CACHE_HOME",
+                                os.path.join(os.path.expanduser("~"), ".cache"))
+    return os.path.join(cache_home, "execute-syscall", "synopsis")
+
+
+
+class SynopsisCache:
+    """
+    <Purpose>
+      Stores the synopsis lines of man pages on disk, one file per system call
+      name, so that reading the same man page again can be avoided.
+
+    <Attributes>
+      self.cache_dir:
+        The directory holding the cache entries.
+
+    """
+
+    def __init__(self, cache_dir=None):
+        """
+        <Purpose>
+          Creates a SynopsisCache object.
+
+        <Arguments>
+          cache_dir:
+            The directory in which to store the cache entries. Defaults to
+            default_cache_dir().
+
+        <Exceptions>
+          None
+
+        <Side Effects>
+          None
+
+        <Returns>
+          None
+        """
+
+        if cache_dir is None:
+            cache_dir = default_cache_dir()
+
+        self.cache_dir = cache_dir
+
+
+    def key(self, syscall_name, backend="man"):
+        """
+        <Purpose>
+          Computes the key identifying the current man source of syscall_name,
+          as read by the given backend.
+
+          Like man, if there is no page for a name ending in 32 or 64 (e.g.
+          chown32) the page of the name without the number is used.
+
+        <Arguments>
+          syscall_name:
+            The name of the system call.
+
+          backend:
+            How the synopsis is read from the man source, "man" or "source".
+            Synopses read by different backends are cached separately.
+
+        <Exceptions>
+          None
+
+        <Side Effects>
+          Reads the man source files of the system call.
+
+        <Returns>
+          A hex digest string, or None if no man source file could be found, in
+          which case nothing should be cached for this system call.
+        """
+
+        path = find_syscall_source(syscall_name)
+        if path is None:
+            return None
+
+        digest = hashlib.sha256()
+        digest.update(("%d\0%s\0%s\0" % (CACHE_VERSION, backend, syscall_name)).encode("utf-8"))
+
+        # follow redirects so that changes to the page actually holding the
+        # synopsis invalidate the entry too. Stop on redirect loops.
+        seen = set()
+        while path is not None and path not in seen:
+            seen.add(path)
+
+            try:
+                content = read_man_source(path)
+                mtime = os.stat(path).st_mtime_ns
+            except (IOError, OSError, EOFError):
+                return None
+
+            digest.update(("%s\0%d\0" % (path, mtime)).encode("utf-8"))
+            digest.update(hashlib.sha256(content).digest())
+
+            target = redirect_target(content)
+            if target is None:
+                break
+            path = find_man_source(*target)
+
+        return digest.hexdigest()
+
+
+    def get(self, syscall_name, key):
+        """
+        <Purpose>
+          Returns the cached synopsis lines of syscall_name if they were stored
+          under the given key.
+
+        <Arguments>
+          syscall_name:
+            The name of the system call.
+
+          key:
+            The key returned by self.key(syscall_name).
+
+        <Exceptions>
+          None
+
+        <Side Effects>
+          None
+
+        <Returns>
+          A list of synopsis lines or None on a cache miss.
+        """
+
+        try:
+            with open(self._entry_path(syscall_name), "r") as entry_file:
+                entry = json.load(entry_file)
+        except (IOError, OSError, ValueError):
+            return None
+
+        if entry.get("key") != key:
+            return None
+
+        return entry.get("synopsis")
+
+
+    def put(self, syscall_name, key, synopsis_lines):
+        """
+        <Purpose>
+          Stores the synopsis lines of syscall_name under the given key, replacing
+          any previous entry of the same system call.
+
+        <Arguments>
+          syscall_name:
+            The name of the system call.
+
+          key:
+            The key returned by self.key(syscall_name).
+
+          synopsis_lines:
+            The list of synopsis lines to store.
+
+        <Exceptions>
+          None. Failing to write the cache is not an error.
+
+        <Side Effects>
+          Writes a file in self.cache_dir.
+
+        <Returns>
+          None
+        """
+
+        entry_path = self._entry_path(syscall_name)
+        temp_path = entry_path + ".%d.tmp" % os.getpid()
+
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+
+            with open(temp_path, "w") as entry_file:
+                json.dump({"key": key, "synopsis": synopsis_lines}, entry_file)
+
+            # rename is atomic so concurrent readers never see partial entries.
+            os.rename(temp_path, entry_path)
+        except (IOError, OSError):
+            pass
+
+
+    def _entry_path(self, syscall_name):
+        return os.path.join(self.cache_dir, syscall_name + ".json")
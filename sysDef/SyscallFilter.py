@@ -0,0 +1,271 @@
+"""
+<Started>
+  October 2026
+
+<Purpose>
+  Select the system calls to execute by name, by regular expression, by the
+  types they take or by category.
+
+  Name and regular expression filters only look at names, so with a definition
+  database only the definitions of the selected system calls are decoded. Type
+  and category filters look at the parameters of each definition, so the
+  definitions of all system calls passing the name filters are decoded.
+
+  Categories:
+
+    fd        takes a file descriptor
+    path      takes a path (const char *path, pathname, filename, ...)
+    socket    takes a socket or a socket address
+    time      takes a struct timespec, timeval, itimerspec or itimerval
+    signal    takes a signal number, set or action
+    process   takes a process, thread or process group id
+    struct    takes a structure, by value or by pointer
+    noargs    takes no arguments
+
+  Example printing the file descriptor syscalls that take a struct sockaddr:
+
+    python -m sysDef.SyscallFilter syscall_definitions.sdb --category fd --takes "struct sockaddr"
+
+"""
+
+import re
+
+
+# names of parameters holding file descriptors.
+FD_PARAMETER_NAMES = set(["fd", "fildes", "oldfd", "newfd", "fd_in", "fd_out",
+                          "in_fd", "out_fd", "sockfd", "epfd", "dirfd",
+                          "olddirfd", "newdirfd", "fanotify_fd"])
+
+# names of char * parameters holding paths.
+PATH_PARAMETER_NAMES = set(["path", "pathname", "filename", "oldpath", "newpath",
+                            "target", "linkpath", "name"])
+
+TIME_STRUCTS = set(["timespec", "timeval", "itimerspec", "itimerval",
+                    "__kernel_timespec", "__kernel_old_timeval"])
+
+SIGNAL_TYPES = set(["sigset_t", "sigaction", "siginfo_t", "stack_t"])
+SIGNAL_PARAMETER_NAMES = set(["sig", "signum", "signo"])
+
+PROCESS_TYPES = set(["pid_t"])
+
+
+def _takes_fd(parameters):
+    return any(p.name in FD_PARAMETER_NAMES and not p.pointer for p in parameters)
+
+
+def _takes_path(parameters):
+    return any(p.type == "char" and p.pointer and p.name in PATH_PARAMETER_NAMES
+               for p in parameters)
+
+
+def _takes_socket(parameters):
+    return any(p.name == "sockfd" or (p.struct and p.type in ("sockaddr", "msghdr", "mmsghdr"))
+               for p in parameters)
+
+
+def _takes_time(parameters):
+    return any(p.struct and p.type in TIME_STRUCTS for p in parameters)
+
+
+def _takes_signal(parameters):
+    return any(p.type in SIGNAL_TYPES or p.name in SIGNAL_PARAMETER_NAMES
+               for p in parameters)
+
+
+def _takes_process(parameters):
+    return any(p.type in PROCESS_TYPES and not p.pointer for p in parameters)
+
+
+def _takes_struct(parameters):
+    return any(p.struct for p in parameters)
+
+
+def _takes_nothing(parameters):
+    return not parameters
+
+
+# category -> predicate on the parameters of a definition.
+CATEGORIES = {
+    "fd": _takes_fd,
+    "path": _takes_path,
+    "socket": _takes_socket,
+    "time": _takes_time,
+    "signal": _takes_signal,
+    "process": _takes_process,
+    "struct": _takes_struct,
+    "noargs": _takes_nothing,
+}
+
+
+class SyscallFilter:
+    """
+    <Purpose>
+      A selection of system calls. A system call is selected if it passes all
+      of the given filters.
+
+    <Attributes>
+      self.only:
+        A set of the names of the system calls to select, or None for all.
+
+      self.exclude:
+        A set of the names of the system calls never to select.
+
+      self.regex:
+        A compiled regular expression names must match (re.search), or None.
+
+      self.categories:
+        A list of CATEGORIES the definitions must all be in.
+
+      self.takes:
+        A list of (type, struct) tuples of types the definitions must all
+        take, e.g. ("sockaddr", True) for "struct sockaddr".
+
+    """
+
+    def __init__(self, only=None, exclude=(), regex=None, categories=(), takes=()):
+        for category in categories:
+            if category not in CATEGORIES:
+                raise Exception("Unknown syscall category: " + category +
+                                ". Known categories: " + ", ".join(sorted(CATEGORIES)))
+
+        self.only = set(only) if only is not None else None
+        self.exclude = set(exclude)
+        self.regex = re.compile(regex) if regex is not None else None
+        self.categories = list(categories)
+        self.takes = [_parse_type(type_name) for type_name in takes]
+
+
+    def needs_definitions(self):
+        """
+        Returns True if selecting system calls requires their definitions.
+        """
+
+        return bool(self.categories or self.takes)
+
+
+    def select_names(self, names):
+        """
+        Returns the names passing the name and regular expression filters, in
+        the given order.
+        """
+
+        return [name for name in names if self.match_name(name)]
+
+
+    def match_name(self, name):
+        if self.only is not None and name not in self.only:
+            return False
+
+        if name in self.exclude:
+            return False
+
+        if self.regex is not None and self.regex.search(name) is None:
+            return False
+
+        return True
+
+
+    def match_definition(self, syscall_manual):
+        """
+        Returns True if the definition of a SyscallManual passes the type and
+        category filters. System calls without a definition only pass if there
+        are no such filters.
+        """
+
+        if not self.needs_definitions():
+            return True
+
+        if syscall_manual.definition is None:
+            return False
+
+        parameters = [p for p in syscall_manual.definition.parameters if not p.ellipsis]
+
+        for category in self.categories:
+            if not CATEGORIES[category](parameters):
+                return False
+
+        for type_name, struct in self.takes:
+            if not any(p.type == type_name and (p.struct or not struct) for p in parameters):
+                return False
+
+        return True
+
+
+    def match(self, syscall_manual):
+        return self.match_name(syscall_manual.name) and self.match_definition(syscall_manual)
+
+
+
+def _parse_type(type_name):
+    """
+    Returns the (type, struct) tuple of a type given on the command line, e.g.
+    ("sockaddr", True) for "struct sockaddr *".
+    """
+
+    words = type_name.replace("*", " ").split()
+    struct = bool(words) and words[0] == "struct"
+    if struct:
+        words = words[1:]
+
+    return " ".join(words), struct
+
+
+
+def add_arguments(parser):
+    """
+    Adds the filter options to an argparse parser. Use from_arguments to build
+    the SyscallFilter from the parsed arguments.
+    """
+
+    parser.add_argument("--only", action="append", default=[], metavar="NAMES",
+                        help="comma separated names of syscalls to execute (repeatable)")
+    parser.add_argument("--exclude", action="append", default=[], metavar="NAMES",
+                        help="comma separated names of syscalls not to execute (repeatable)")
+    parser.add_argument("--regex", metavar="PATTERN",
+                        help="only execute syscalls whose names match PATTERN")
+    parser.add_argument("--category", action="append", default=[],
+                        choices=sorted(CATEGORIES),
+                        help="only execute syscalls in this category (repeatable)")
+    parser.add_argument("--takes", action="append", default=[], metavar="TYPE",
+                        help='only execute syscalls taking TYPE, e.g. "struct sockaddr" (repeatable)')
+
+
+def from_arguments(args, names=()):
+    """
+    Returns the SyscallFilter of parsed arguments. names are further names of
+    syscalls to execute, e.g. positional arguments, and are added to --only.
+    """
+
+    only = list(names)
+    for names_argument in args.only:
+        only += [name for name in names_argument.split(",") if name]
+
+    exclude = []
+    for names_argument in args.exclude:
+        exclude += [name for name in names_argument.split(",") if name]
+
+    return SyscallFilter(only or None, exclude, args.regex, args.category, args.takes)
+
+
+
+def main():
+    import argparse
+
+    from .DefinitionDatabase import DefinitionDatabase
+
+    parser = argparse.ArgumentParser(description="Print the syscalls selected by filters.")
+    parser.add_argument("database", help="the definition database")
+    parser.add_argument("syscalls", nargs="*", help="names of syscalls to select")
+    add_arguments(parser)
+    args = parser.parse_intermixed_args()
+
+    syscall_filter = from_arguments(args, args.syscalls)
+
+    with DefinitionDatabase(args.database) as database:
+        for name in syscall_filter.select_names(database.names):
+            syscall_manual = database.get(name)
+            if syscall_filter.match_definition(syscall_manual):
+                print(syscall_manual.definition if syscall_manual.definition else name)
+
+if __name__ == "__main__":
+    main()
@@ -25,7 +25,10 @@
   so we pick the second definition which has the most arguments.
 
 
-  Manual pages (man) are read using the subprocess library.
+  The synopsis part of a manual page is read directly from its source file
+  (see ManSource) or from the output of man, which is run using the subprocess
+  library. The synopsis part of each man page is cached on disk (see
+  SynopsisCache) so that man is not run again for pages that have not changed.
 
   Example running this program:
 
@@ -39,15 +42,34 @@
 """
 
 import re
-import signal
-import subprocess
+import sys
 
+from . import DeclarationParser
 from .Definition import Definition
 
+# multiprocessing, subprocess and the modules reading man pages are imported
+# where they are used, so that programs only loading definitions from a
+# database start quickly.
+
 
 # controls printing
 DEBUG = False
 
+# how man pages are read:
+#  - "source": the man page source files are read directly (see ManSource). man
+#    is only run for pages whose source cannot be found.
+#  - "man": man is run for every page and its output is read.
+MAN_BACKEND = "source"
+
+# reuse the synopsis read from man pages in previous runs if the man pages have
+# not changed since. See SynopsisCache.
+USE_CACHE = True
+
+# directory of the synopsis cache. None means the SynopsisCache default.
+CACHE_DIR = None
+
+_synopsis_cache = None
+
 
 class SyscallManual:
     """
@@ -91,6 +113,8 @@ class SyscallManual:
 
     """
 
+    __slots__ = ("name", "type", "definition")
+
     # types of SyscallManual.
     NO_MAN_ENTRY = 1
     NOT_FOUND = 2
@@ -121,20 +145,27 @@ class SyscallManual:
         <Returns>
           None
         """
-        self.name = syscall_name
+        self.name = sys.intern(syscall_name)
         self.type, self.definition = self._parse_definition(self.name)
 
 
-    def _parse_definition(self, syscall_name):
+    @classmethod
+    def from_definition(cls, syscall_name, definition_type, definition):
         """
         <Purpose>
-          Reads the man entry of the system call whose name is given as a parameter
-          and returns its definition as a Description object along with what kind of
-          definition it is.
+          Creates a SyscallManual object from an already known type and
+          definition, without reading any man page. Used when loading stored
+          definitions.
 
         <Arguments>
           syscall_name:
-            The name of the system call for which to get the definition.
+            The name of the system call.
+
+          definition_type:
+            One of NO_MAN_ENTRY, NOT_FOUND, UNIMPLEMENTED or FOUND.
+
+          definition:
+            The Definition object if definition_type is FOUND, None otherwise.
 
         <Exceptions>
           None
@@ -143,123 +174,201 @@ class SyscallManual:
           None
 
         <Returns>
-          (self.NO_MAN_ENTRY, None):   if no manual entry was found.
-          (self.NOT_FOUND, None):      if man entry found but definition not found.
-          (self.UNIMPLEMENTED, None):  if the system call was identified as unimplemented.
-          (self.FOUND, Definition()):  if the definition was found.
+          A SyscallManual object.
         """
 
-        if DEBUG:
-            print("Given name of syscall to parse: " + syscall_name)
+        syscall_manual = cls.__new__(cls)
+        syscall_manual.name = sys.intern(syscall_name)
+        syscall_manual.type = definition_type
+        syscall_manual.definition = definition
+        return syscall_manual
 
-        # read the man page of syscall_name into a byte string.
-        #
-        # TODO: reading entire man page: current implementation is not concerned
-        # with performance too much.
-        try:
-            man_page_bytestring = subprocess.check_output(['man', '2', syscall_name], preexec_fn=lambda:
-                          signal.signal(signal.SIGPIPE, signal.SIG_DFL))
-        except subprocess.CalledProcessError:
-            # if a man entry does not exist no definitions exists.
-            return self.NO_MAN_ENTRY, None
 
-        # cast to string and split into a list of lines.
-        man_page_lines = man_page_bytestring.decode("utf-8").split("\n")
+    @classmethod
+    def from_synopsis(cls, syscall_name, synopsis_lines):
+        """
+        <Purpose>
+          Creates a SyscallManual object from the synopsis lines of a man
+          entry that were already read, e.g. recorded ones, without reading
+          any man page.
+
+        <Arguments>
+          syscall_name:
+            The name of the system call.
+
+          synopsis_lines:
+            The list of the synopsis lines of its man entry, or None if it has
+            no man entry.
+
+        <Exceptions>
+          None
 
+        <Side Effects>
+          None
+
+        <Returns>
+          A SyscallManual object.
         """
-        Example of the open man page, upto the definitions part:
 
-        <--start example-->
-              OPEN(2)                  Linux Programmer's Manual           OPEN(2)
+        syscall_manual = cls.__new__(cls)
+        syscall_manual.name = sys.intern(syscall_name)
 
-              NAME
-                     open, creat - open and possibly create a file or device
+        if synopsis_lines is None:
+            syscall_manual.type, syscall_manual.definition = cls.NO_MAN_ENTRY, None
+        else:
+            syscall_manual.type, syscall_manual.definition = syscall_manual._parse_synopsis(
+                syscall_manual.name, synopsis_lines)
 
-              SYNOPSIS
-                     #include <sys/types.h>
-                     #include <sys/stat.h>
-                     #include <fcntl.h>
+        return syscall_manual
 
-                     int open(const char *pathname, int flags);
-                     int open(const char *pathname, int flags, mode_t mode);
 
-                     int creat(const char *pathname, mode_t mode);
+    @staticmethod
+    def build_all(syscall_names, workers=None):
+        """
+        <Purpose>
+          Creates a SyscallManual object for each of the given system call names.
+
+          Reading and parsing a man page is dominated by the time spent waiting on
+          the man subprocess, so the work is spread across a pool of worker
+          processes. Results are returned in the same order as the given names
+          regardless of the order in which the workers finish.
+
+          A failure while building one SyscallManual (e.g. an unexpected man page
+          format) does not stop the remaining ones from being built. Instead the
+          failure is recorded and returned to the caller.
 
-              DESCRIPTION
-        <--end example-->
+        <Arguments>
+          syscall_names:
+            A list of system call names for which to create SyscallManual objects.
+
+          workers:
+            The number of worker processes to use. Defaults to the number of
+            CPUs available. If set to 1 the objects are built serially in the
+            calling process.
 
+        <Exceptions>
+          None
 
-        Note that, as shown in the example above, a man page can have multiple
-        definitions for the same system call (2 definitions given for open) and it
-        can also include definitions of similar but different system calls (creat).
+        <Side Effects>
+          Starts up to workers processes.
 
+        <Returns>
+          A tuple (syscall_manuals, failures) where syscall_manuals is a list of
+          the SyscallManual objects that were built successfully and failures is a
+          list of (syscall_name, error_message) tuples for the ones that were not.
+          Both lists follow the order of syscall_names.
         """
 
-        # in some platforms attempts to access the man page of system calls ending
-        # with 32 eg chown32 return the man page of the system call without the 32
-        # eg chown. Same goes for syscalls ending with 64. Other platforms can
-        # instead return an empty string which means the syscall definition will not
-        # be discovered. If this happens check if there is a man page for the
-        # syscall without the number at the end.
-        if len(man_page_lines) == 1 and man_page_lines[0] == '':
-            # read the man page of syscall_name into a byte string.
-            if(syscall_name.endswith("32") or syscall_name.endswith("64")):
-                try:
-                    man_page_bytestring = subprocess.check_output(['man', '2', syscall_name[:-2]])
-                except subprocess.CalledProcessError:
-                    # if a man entry does not exist no definition exists.
-                    return self.NO_MAN_ENTRY, None
-
-                # cast to string and split into a list of lines.
-                man_page_lines = man_page_bytestring.decode("utf-8").split("\n")
+        import multiprocessing
+
+        if workers is None:
+            workers = multiprocessing.cpu_count()
+
+        if workers == 1 or len(syscall_names) <= 1:
+            results = [_build_syscall_manual(name) for name in syscall_names]
+        else:
+            pool = multiprocessing.Pool(min(workers, len(syscall_names)))
+            try:
+                # imap preserves the order of the given names. Man pages are
+                # small so hand out a few names at a time to each worker.
+                results = list(pool.imap(_build_syscall_manual, syscall_names,
+                                         chunksize=4))
+            finally:
+                pool.close()
+                pool.join()
+
+        syscall_manuals = []
+        failures = []
+        for syscall_name, syscall_manual, error in results:
+            if error is None:
+                syscall_manuals.append(syscall_manual)
             else:
-                return self.NO_MAN_ENTRY, None
+                failures.append((syscall_name, error))
 
+        return syscall_manuals, failures
 
-        # a regular expression used to sanitize the read lines. Specifically it
-        # removes the backspace characters and the character they hide to allow
-        # searching for substrings. e.g. the string "example\b" will be replaced
-        # with the string "exampl".
-        char_backspace = re.compile(".\b")
 
-        # remove all lines until the "SYNOPSIS" line since the definitions of the
-        # system calls are given right after this line. Refer to the example man
-        # page given above for more information.
-        while True:
-            if len(man_page_lines) == 0:
-                raise Exception("Reached end of man page while looking for SYNOPSIS ine")
+    def _parse_definition(self, syscall_name):
+        """
+        <Purpose>
+          Reads the man entry of the system call whose name is given as a parameter
+          and returns its definition as a Description object along with what kind of
+          definition it is.
 
-            # read the first line
-            line = man_page_lines[0]
+          The synopsis part of the man entry is looked up in the synopsis cache
+          first, if caching is enabled, and man is only run on a cache miss.
 
-            # and then remove the line
-            man_page_lines.pop(0)
+        <Arguments>
+          syscall_name:
+            The name of the system call for which to get the definition.
 
-            # line could include backspaces \b which prevents from searching the line
-            # correctly. Remove backspaces.
-            # e.g. __llllsseeeekk(2)                  1.2
-            line = char_backspace.sub("", line)
+        <Exceptions>
+          None
 
-            # if the line is the synopsis line we don't want to remove any more lines.
-            if (line == "SYNOPSIS"):
-                break
+        <Side Effects>
+          The synopsis read from man is stored in the synopsis cache if caching is
+          enabled.
 
-        # examine the lines until the 'DESCRIPTION' line is met, indicating the end
-        # of the synopsis part. Examine each line in between for whether it is a
-        # definition.
-        all_definitions = []
-        while True:
-            if len(man_page_lines) == 0:
-                raise Exception("Reached end of man page while looking for DESCRIPTION line.")
+        <Returns>
+          (self.NO_MAN_ENTRY, None):   if no manual entry was found.
+          (self.NOT_FOUND, None):      if man entry found but definition not found.
+          (self.UNIMPLEMENTED, None):  if the system call was identified as unimplemented.
+          (self.FOUND, Definition()):  if the definition was found.
+        """
+
+        if DEBUG:
+            print("Given name of syscall to parse: " + syscall_name)
+
+        synopsis_lines = None
+        cache_key = None
+
+        if USE_CACHE:
+            cache = _get_synopsis_cache()
+            cache_key = cache.key(syscall_name, MAN_BACKEND)
+            if cache_key is not None:
+                synopsis_lines = cache.get(syscall_name, cache_key)
+
+        if synopsis_lines is None:
+            synopsis_lines = self._read_synopsis(syscall_name)
+
+            if synopsis_lines is None:
+                return self.NO_MAN_ENTRY, None
 
-            line = man_page_lines.pop(0).strip()
+            if cache_key is not None:
+                cache.put(syscall_name, cache_key, synopsis_lines)
 
-            # remove backspaces from line
-            line = char_backspace.sub("", line)
+        return self._parse_synopsis(syscall_name, synopsis_lines)
+
+
+    def _parse_synopsis(self, syscall_name, synopsis_lines):
+        """
+        <Purpose>
+          Finds the definition of the system call whose name is given as a
+          parameter in the synopsis lines of its man entry.
+
+        <Arguments>
+          syscall_name:
+            The name of the system call for which to get the definition.
+
+          synopsis_lines:
+            The list of the synopsis lines of the man entry.
+
+        <Exceptions>
+          None
+
+        <Side Effects>
+          None
+
+        <Returns>
+          The same as _parse_definition, except for NO_MAN_ENTRY.
+        """
 
-            # when we reach the description line then we can safely stop.
-            if (line == "DESCRIPTION"):
-                break
+        # examine the synopsis lines for whether they are definitions.
+        all_definitions = []
+        line_index = 0
+        while line_index < len(synopsis_lines):
+            line = synopsis_lines[line_index]
+            line_index += 1
 
             # if the line includes the word "Unimplemented" then the system call is
             # unimplemented.
@@ -288,10 +397,13 @@ class SyscallManual:
             # line with the subsequent line.
             times = 0
             while(not line.endswith(";")):
-                # join the line with the subsequent line, without removing it from the
-                # man_page_lines, to avoid skipping a definition.
-                nextLine = char_backspace.sub("", man_page_lines[times]).strip()
-                line += " " + nextLine
+                # the synopsis ended before the definition did.
+                if(line_index + times == len(synopsis_lines)):
+                    break
+
+                # join the line with the subsequent line, without consuming it, to
+                # avoid skipping a definition.
+                line += " " + synopsis_lines[line_index + times]
 
                 # remove comments from the newly created line.
                 if("/*" in line and "*/" in line):
@@ -313,7 +425,18 @@ class SyscallManual:
             if DEBUG:
                 print(line)
 
-            all_definitions.append(Definition(line))
+            # the continuation lines of a definition spanning multiple lines can
+            # look like definitions too, e.g. the last two lines of a three line
+            # definition, but they do not parse. Skip them like any other line
+            # that is not a definition.
+            try:
+                definition = Definition(line)
+            except DeclarationParser.ParseError as e:
+                if DEBUG:
+                    print(e)
+                continue
+
+            all_definitions.append(definition)
 
         # We will consume some of these definitions but let's keep the
         # all_definitions variable intact which holds all the definitions parsed
@@ -394,6 +517,83 @@ class SyscallManual:
             return self.FOUND, similar_definitions[0]
 
 
+    def _read_synopsis(self, syscall_name):
+        """
+        <Purpose>
+          Reads the man entry of the system call whose name is given as a parameter
+          and returns the lines of its synopsis part, i.e. the lines between the
+          "SYNOPSIS" and the "DESCRIPTION" lines.
+
+        <Arguments>
+          syscall_name:
+            The name of the system call for which to read the synopsis.
+
+        <Exceptions>
+          An Exception is raised if the man page does not have a SYNOPSIS or a
+          DESCRIPTION line.
+
+        <Side Effects>
+          Runs man as a subprocess, unless the synopsis is read from the man page
+          source (see MAN_BACKEND). man is terminated as soon as the synopsis has
+          been read.
+
+        <Returns>
+          None if no manual entry was found. Otherwise a list of the synopsis lines,
+          stripped and with backspaces removed.
+        """
+
+        import shutil
+        import subprocess
+
+        from . import ManSource
+
+        if MAN_BACKEND == "source":
+            synopsis_lines = ManSource.read_synopsis(syscall_name)
+
+            # fall back to man if there is no source file, e.g. because man is
+            # configured with different man page directories.
+            if synopsis_lines is not None or shutil.which("man") is None:
+                return synopsis_lines
+
+        # in some platforms attempts to access the man page of system calls ending
+        # with 32 eg chown32 return the man page of the system call without the 32
+        # eg chown. Same goes for syscalls ending with 64. Other platforms can
+        # instead return an empty man page which means the syscall definition will
+        # not be discovered. If this happens check if there is a man page for the
+        # syscall without the number at the end.
+        try:
+            synopsis_lines = _read_man_synopsis(syscall_name)
+
+            if synopsis_lines is None and (syscall_name.endswith("32") or
+                                           syscall_name.endswith("64")):
+                synopsis_lines = _read_man_synopsis(syscall_name[:-2])
+
+        except subprocess.CalledProcessError:
+            # if a man entry does not exist no definitions exists.
+            return None
+
+        return synopsis_lines
+
+
+    def __getstate__(self):
+        """
+        Pickles SyscallManual objects as a dictionary of their attributes, as
+        older versions did.
+        """
+
+        return {"name": self.name, "type": self.type, "definition": self.definition}
+
+
+    def __setstate__(self, state):
+        """
+        Unpickles SyscallManual objects pickled by this or by older versions.
+        """
+
+        self.name = sys.intern(state["name"])
+        self.type = state["type"]
+        self.definition = state["definition"]
+
+
     def __repr__(self):
         representation = "Syscall Name: " + self.name + "\nDefinition:   "
 
@@ -411,10 +611,175 @@ class SyscallManual:
 
 
 
+# a regular expression used to sanitize the read lines. Specifically it
+# removes the backspace characters and the character they hide to allow
+# searching for substrings. e.g. the string "example\b" will be replaced
+# with the string "exampl". It is compiled on first use rather than when the
+# module is imported, since most runs read no man page.
+_CHAR_BACKSPACE = ".\b"
 
-def main():
-    import sys
 
+def extract_synopsis(man_page_lines):
+    """
+    <Purpose>
+      Extracts the synopsis part of a rendered man page, i.e. the lines between
+      the "SYNOPSIS" and the "DESCRIPTION" lines.
+
+      The lines are consumed one at a time and no line after the "DESCRIPTION"
+      line is read, so man_page_lines can be a stream such as the output of a
+      man subprocess.
+
+      Example of the open man page, up to the end of the synopsis part:
+
+    <--start example-->
+          OPEN(2)                  Linux Programmer's Manual           OPEN(2)
+
+          NAME
+                 open, creat - open and possibly create a file or device
+
+          SYNOPSIS
+                 #include <sys/types.h>
+                 #include <sys/stat.h>
+                 #include <fcntl.h>
+
+                 int open(const char *pathname, int flags);
+                 int open(const char *pathname, int flags, mode_t mode);
+
+                 int creat(const char *pathname, mode_t mode);
+
+          DESCRIPTION
+    <--end example-->
+
+      Note that, as shown in the example above, a man page can have multiple
+      definitions for the same system call (2 definitions given for open) and
+      it can also include definitions of similar but different system calls
+      (creat).
+
+    <Arguments>
+      man_page_lines:
+        An iterable of the lines of the rendered man page, with or without
+        their line endings.
+
+    <Exceptions>
+      An Exception is raised if the man page does not have a SYNOPSIS or a
+      DESCRIPTION line.
+
+    <Side Effects>
+      None
+
+    <Returns>
+      None if man_page_lines is empty. Otherwise a list of the synopsis lines,
+      stripped and with backspaces removed.
+    """
+
+    char_backspace = re.compile(_CHAR_BACKSPACE)
+    man_page_lines = iter(man_page_lines)
+    empty = True
+
+    # skip all lines until the "SYNOPSIS" line since the definitions of the
+    # system calls are given right after this line.
+    for line in man_page_lines:
+        empty = False
+
+        # line could include backspaces \b which prevents from searching the line
+        # correctly. Remove backspaces.
+        # e.g. __llllsseeeekk(2)                  1.2
+        line = char_backspace.sub("", line.rstrip("\n"))
+
+        if (line == "SYNOPSIS"):
+            break
+    else:
+        if empty:
+            return None
+        raise Exception("Reached end of man page while looking for SYNOPSIS line.")
+
+    # keep the lines until the 'DESCRIPTION' line is met, indicating the end
+    # of the synopsis part.
+    synopsis_lines = []
+    for line in man_page_lines:
+        line = char_backspace.sub("", line.strip())
+
+        # when we reach the description line then we can safely stop.
+        if (line == "DESCRIPTION"):
+            return synopsis_lines
+
+        synopsis_lines.append(line)
+
+    raise Exception("Reached end of man page while looking for DESCRIPTION line.")
+
+
+def _read_man_synopsis(name):
+    """
+    Runs man on the section 2 page of name and extracts its synopsis while man
+    is still writing the page. man is terminated once the synopsis is read.
+
+    Returns the synopsis lines, or None if man printed nothing. Raises
+    subprocess.CalledProcessError if man failed, e.g. because there is no such
+    page.
+    """
+
+    import signal
+    import subprocess
+
+    process = subprocess.Popen(['man', '2', name], stdout=subprocess.PIPE, preexec_fn=lambda:
+                          signal.signal(signal.SIGPIPE, signal.SIG_DFL))
+
+    try:
+        synopsis_lines = extract_synopsis(raw_line.decode("utf-8")
+                                          for raw_line in process.stdout)
+    except Exception:
+        # a man page that could not be read is not a man page with an unexpected
+        # format.
+        if process.wait() != 0:
+            raise subprocess.CalledProcessError(process.returncode, 'man')
+        raise
+    finally:
+        process.stdout.close()
+        if process.poll() is None:
+            process.terminate()
+        process.wait()
+
+    if synopsis_lines is None and process.returncode != 0:
+        raise subprocess.CalledProcessError(process.returncode, 'man')
+
+    return synopsis_lines
+
+
+def _get_synopsis_cache():
+    """
+    Returns the SynopsisCache used by all SyscallManual objects, creating it on
+    first use.
+    """
+
+    from .SynopsisCache import SynopsisCache
+
+    global _synopsis_cache
+
+    if _synopsis_cache is None or (CACHE_DIR is not None and _synopsis_cache.cache_dir != CACHE_DIR):
+        _synopsis_cache = SynopsisCache(CACHE_DIR)
+
+    return _synopsis_cache
+
+
+def _build_syscall_manual(syscall_name):
+    """
+    Worker used by SyscallManual.build_all. Must be defined at module level so
+    that it can be sent to the worker processes.
+
+    Returns a (syscall_name, SyscallManual, None) tuple on success and a
+    (syscall_name, None, error_message) tuple on failure.
+    """
+
+    import traceback
+
+    try:
+        return syscall_name, SyscallManual(syscall_name), None
+    except Exception:
+        return syscall_name, None, traceback.format_exc()
+
+
+
+def main():
     if(len(sys.argv) != 2):
         print("Usage: python " + sys.argv[0] + " <syscall_name>")
         exit()
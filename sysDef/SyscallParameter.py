@@ -1,159 +1,301 @@
+import sys
+
+from . import DeclarationParser
+
+
+# bits of SyscallParameter._flags, one per boolean attribute. The order of
+# FLAG_NAMES gives the bit of each attribute. The number of pointers is kept in
+# the bits above them.
+FLAG_NAMES = ("ellipsis", "enum", "const", "union", "struct", "unsigned", "function",
+              "const_pointer")
+
+ELLIPSIS, ENUM, CONST, UNION, STRUCT, UNSIGNED, FUNCTION, \
+    CONST_POINTER = [1 << bit for bit in range(len(FLAG_NAMES))]
+
+POINTERS_SHIFT = len(FLAG_NAMES)
+
+# the attributes of parameters pickled by older versions.
+STATE_NAMES = ("type", "name", "ellipsis", "enum", "array", "const", "union", "struct",
+               "pointer", "unsigned", "function", "const_pointer")
+
+
+def _flag(bit):
+    """
+    Returns a property reading and writing one bit of _flags as a bool.
+    """
+
+    def get(self):
+        return bool(self._flags & bit)
+
+    def set(self, value):
+        if value:
+            self._flags |= bit
+        else:
+            self._flags &= ~bit
+
+    return property(get, set)
+
+
 
 class SyscallParameter:
     """
     <Purpose>
       This object is used to describe a parameter of system call definitions.
-    
+
+      Parameters are kept in memory for many definitions at once, so they have
+      no per-instance __dict__: the boolean attributes below are bits of a
+      single integer and the type and name strings are interned, so that all
+      parameters of the same type share one string.
+
     <Attributes>
       self.type:
-        the data type of the argument, this can be for example int or char
-    
+        the data type of the argument, this can be for example int or char.
+        For function pointers this is the return type of the function.
+
       self.name:
-        this is the name given to the parameter, for example pathname or domain
-    
+        this is the name given to the parameter, for example pathname or
+        domain. None for parameters without a name, which only appear in the
+        parameters of function pointers.
+
       self.ellipsis:
         ellipsis can appear in some syscalls indicating additional unspecified
-        arguments may be required 
+        arguments may be required
         e.g. int fcntl(int fd, int cmd, ...)
-    
+
       self.enum:
         long ptrace(enum __ptrace_request request, pid_t pid, void *addr, void *data)
-    
+
       self.array:
         int execve(const char *filename, char *const argv[], char *const envp[])
-    
+
+      self.array_size:
+        the text between the brackets of arrays, e.g. "2" for int pipefd[2],
+        ".count" for void buf[.count] and "" for gid_t list[]. None if the
+        parameter is not an array.
+
+      self.array_length:
+        the number of elements of arrays of a fixed size, e.g. 2 for int
+        pipefd[2], otherwise None.
+
       self.const:
         int execve(const char *filename, char *const argv[], char *const envp[])
-    
+
       self.union:
         long nfsservctl(int cmd, struct nfsctl_arg *argp, union nfsctl_res *resp)
-    
+
       self.struct:
         int accept(int sockfd, struct sockaddr *addr, socklen_t *addrlen)
-    
+
       self.pointer:
         int access(const char *pathname, int mode)
-    
+
+      self.pointers:
+        the number of pointers, e.g. 2 for struct iocb **iocbpp.
+
       self.unsigned:
         int getdents(unsigned int fd, struct linux_dirent *dirp, unsigned int count)
-    
+
       self.function:
         int clone(int (*fn)(void *), void *child_stack, int flags, void *arg, ...)
-    
+
+      self.function_parameters:
+        a tuple of the SyscallParameter objects of the parameters of function
+        pointers, e.g. (void *) for fn above. None for other parameters.
+
       self.const_pointer:
         int execve(const char *filename, char *const argv[], char *const envp[])
-    
+        The pointer nearest to the name is const.
+
     """
 
+    __slots__ = ("type", "name", "_flags", "array_size", "function_parameters")
+
+    ellipsis = _flag(ELLIPSIS)
+    enum = _flag(ENUM)
+    const = _flag(CONST)
+    union = _flag(UNION)
+    struct = _flag(STRUCT)
+    unsigned = _flag(UNSIGNED)
+    function = _flag(FUNCTION)
+    const_pointer = _flag(CONST_POINTER)
+
     def __init__(self, parameter_string):
         """
         <Purpose>
           Creates a SyscallParameter object.
-        
+
           The passed parameter_string is made up from the parameter type and a
           parameter name. We need both the type and the name along with some other
-          derived information, to fully describe the parameter. 
-          
+          derived information, to fully describe the parameter.
+
           Example:
           Full definition: int open(const char *pathname, int flags);
           Example parameter string: const char *pathname
-          
+
           In this example the name of the parameter is pathname and the type of the
           parameter is char. The type should be further described as const and
           pointer.
-        
+
         <Arguments>
           parameter_string:
-            The string part from a system call definition that describes a single 
+            The string part from a system call definition that describes a single
             parameter.
-        
+
         <Exceptions>
-          An Exception will be raised if the format of the parameter string is not
-          recognized.
-        
+          A DeclarationParser.ParseError will be raised if the parameter string
+          can not be parsed.
+
         <Side Effects>
           None
-        
+
         <Returns>
           None
         """
 
-        # Let's first initialize all required fields.
-        self.type = None
-        self.name = None
-        self.ellipsis = False
-
-        # fields describing the type of the parameter.
-        self.enum = False
-        self.array = False
-        self.const = False
-        self.union = False
-        self.struct = False
-        self.pointer = False
-        self.unsigned = False
-        self.function = False
-        self.const_pointer = False
+        self._fill(DeclarationParser.parse_parameter(parameter_string), parameter_string)
+
+    @classmethod
+    def from_declaration(cls, declaration, text):
+        """
+        Creates a SyscallParameter object from a DeclarationParser.Declaration
+        parsed from text.
+        """
+
+        parameter = cls.__new__(cls)
+        parameter._fill(declaration, text)
+        return parameter
+
+    def _fill(self, declaration, text):
+        self.type = declaration.type
+        self.name = _intern(declaration.name)
+        self._flags = 0
+        self.array_size = None
+        self.function_parameters = None
 
         # a parameter could be the ellipsis ("...")
-        if(parameter_string == "..."):
+        if(declaration.ellipsis):
             # type and name of the parameter remain None
             self.ellipsis = True
             return
 
+        self.const = declaration.const
+        self.struct = declaration.struct
+        self.union = declaration.union
+        self.enum = declaration.enum
+        self.unsigned = declaration.unsigned
+
+        derivations = declaration.derivations
+
         # parameter can be a function pointer eg in clone:
         # int clone(int (*fn)(void *), void *child_stack, int flags, void *arg, ...)
         # ==> int (*fn)(void *)
-        if(parameter_string.endswith(")")):
+        if(len(derivations) > 1 and derivations[0][0] != DeclarationParser.ARRAY
+           and derivations[1][0] == DeclarationParser.FUNCTION):
             self.function = True
-            # type will hold the return type of the function
-            self.type = parameter_string[:parameter_string.find(" (*")].strip()
-            # name will hold everything else.
-            # TODO: could potentially be more fine-grained parsed.
-            self.name = parameter_string[parameter_string.find(" (*"):].strip()
+            self.function_parameters = tuple(SyscallParameter.from_declaration(p, text)
+                                             for p in derivations[1][1])
 
-        else:
-            # otherwise name is the right-most part and everything else is the type.
-            self.type, self.name = parameter_string.rsplit(None, 1)
-
-        # if the name starts with a "*" the parameter is a pointer.
-        if(self.name.startswith("*")):
-            self.pointer = True
-            self.name = self.name[1:]    # remove the asterisk.
-
-        # if the name ends with a "[]" the parameter is an array.
-        if(self.name.endswith("[]")):
-            self.array = True
-            self.name = self.name[:-2]    # remove square brackets.
-
-        # split and examine the parts of the type.
-        while(len(self.type.split()) > 1):
-            item, self.type = self.type.split(None, 1)
-
-            if(item == "unsigned"):
-                self.unsigned = True
-            elif(item == "const"):
-                self.const = True
-            elif(item == "struct"):
-                self.struct = True
-            elif(item == "union"):
-                self.union = True
-            elif(item == "enum"):
-                self.enum = True
-            else:
-                # it could be a constant pointer eg char *const argv[] in execve in
-                # which case the item variable holds the correct type of the pointer and
-                # self.type variable should hold the string "*const"
-                if(self.type == "*const"):
-                    self.const_pointer = True
-                    self.type = item
-                else:
-                    # if this is not the case then an unexpected format was encountered.
-                    raise Exception("Unexpected part in parameter: " + parameter_string)
+            # type holds the return type of the function.
+            return_pointers = _count_pointers(derivations[2:], declaration, text)
+            if return_pointers:
+                self.type = sys.intern(self.type + " " + "*" * return_pointers)
+            return
+
+        # an array, possibly of pointers eg char *const argv[].
+        if(derivations and derivations[0][0] == DeclarationParser.ARRAY):
+            self.array_size = derivations[0][1]
+            derivations = derivations[1:]
+
+        self.pointers = _count_pointers(derivations, declaration, text)
+        if(derivations and derivations[0][0] == DeclarationParser.CONST_POINTER):
+            self.const_pointer = True
+
+    @property
+    def pointers(self):
+        return self._flags >> POINTERS_SHIFT
+
+    @pointers.setter
+    def pointers(self, count):
+        self._flags = (self._flags & ((1 << POINTERS_SHIFT) - 1)) | (count << POINTERS_SHIFT)
+
+    @property
+    def pointer(self):
+        return self._flags >= (1 << POINTERS_SHIFT)
+
+    @pointer.setter
+    def pointer(self, value):
+        if not value:
+            self.pointers = 0
+        elif not self.pointer:
+            self.pointers = 1
+
+    @property
+    def array(self):
+        return self.array_size is not None
+
+    @array.setter
+    def array(self, value):
+        if not value:
+            self.array_size = None
+        elif self.array_size is None:
+            self.array_size = ""
+
+    @property
+    def array_length(self):
+        """
+        The number of elements of arrays of a fixed size, e.g. 2 for int
+        pipefd[2], otherwise None.
+        """
+
+        if self.array_size is not None and self.array_size.isdigit():
+            return int(self.array_size)
+
+        return None
+
+    def __getstate__(self):
+        """
+        Pickles parameters as a dictionary of all attributes, including those
+        of older versions, so that pickles can be read by older versions too.
+        """
+
+        state = {}
+        for state_name in STATE_NAMES:
+            state[state_name] = getattr(self, state_name)
+
+        state["pointers"] = self.pointers
+        state["array_size"] = self.array_size
+        state["function_parameters"] = self.function_parameters
+        return state
+
+    def __setstate__(self, state):
+        """
+        Unpickles parameters pickled as a dictionary of attributes, by this or
+        by older versions (including the Python 2 pickles of
+        parse-syscall-definitions). Older versions left parts of the declarator
+        in the name, e.g. *head_ptr for struct robust_list_head **head_ptr, so
+        their parameters are parsed again from their representation.
+        """
+
+        if "pointers" not in state:
+            text = _old_representation(state)
+            self._fill(DeclarationParser.parse_parameter(text), text)
+            return
+
+        self.type = _intern(state["type"])
+        self.name = _intern(state["name"])
+        self._flags = 0
+        for flag_name in FLAG_NAMES:
+            setattr(self, flag_name, state[flag_name])
+        self.pointers = state["pointers"]
+        self.array_size = state["array_size"]
+        self.function_parameters = state["function_parameters"]
 
     def __str__(self):
         """
-        This should match the original representation of the parameter as it appears
-        in the man page it was originally parsed from.
+        This should match the original representation of the parameter as it
+        appears in the man page it was originally parsed from, without
+        qualifiers that do not change how it is passed (e.g. restrict) and with
+        whitespace normalized.
         """
 
         if(self.ellipsis):
@@ -176,19 +318,83 @@ class SyscallParameter:
         if(self.unsigned):
             representation += "unsigned "
 
-        representation += self.type + " "
+        representation += self.type
 
-        # const pointer comes after the type.
-        if(self.const_pointer):
-            representation += "*const "
+        if(self.function):
+            parameters = ", ".join(str(p) for p in self.function_parameters) or "void"
+            return representation + " (*" + (self.name or "") + ")(" + parameters + ")"
 
-        if(self.pointer):
-            representation += "*"
+        representation += " "
 
-        representation += self.name
+        # a const pointer is the pointer nearest to the name.
+        pointers = self.pointers
+        if(self.const_pointer):
+            representation += "*" * (pointers - 1) + "*const "
+        else:
+            representation += "*" * pointers
+
+        if(self.name is None):
+            representation = representation.rstrip()
+        else:
+            representation += self.name
 
         # square brackets come right after the name.
         if(self.array):
-            representation += "[]"
+            representation += "[" + self.array_size + "]"
 
         return representation
+
+
+
+def _count_pointers(derivations, declaration, text):
+    """
+    Returns the number of derivations, which must all be pointers.
+    """
+
+    for derivation in derivations:
+        if derivation[0] not in (DeclarationParser.POINTER, DeclarationParser.CONST_POINTER):
+            raise DeclarationParser.ParseError("Unsupported declarator", text,
+                                               declaration.position)
+
+    return len(derivations)
+
+
+def _old_representation(state):
+    """
+    Returns the representation of a parameter pickled by an older version, as
+    its __str__ returned it.
+    """
+
+    if state.get("ellipsis"):
+        return "..."
+
+    representation = ""
+    for keyword in ("const", "struct", "union", "enum", "unsigned"):
+        if state.get(keyword):
+            representation += keyword + " "
+
+    representation += state["type"] + " "
+
+    if state.get("const_pointer"):
+        representation += "*const "
+
+    if state.get("pointer"):
+        representation += "*"
+
+    representation += state["name"]
+
+    if state.get("array"):
+        representation += "[]"
+
+    return representation
+
+
+def _intern(string):
+    """
+    Returns the interned string, or None.
+    """
+
+    if string is None:
+        return None
+
+    return sys.intern(string)
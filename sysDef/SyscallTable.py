@@ -0,0 +1,182 @@
+"""
+<Started>
+  October 2026
+
+<Purpose>
+  Map system call names to system call numbers.
+
+  System call numbers are needed to execute system calls through libc's
+  syscall(2) function instead of their libc wrappers. This is the only way to
+  execute system calls that libc does not wrap, and it avoids the overhead the
+  wrappers add on top of the kernel entry.
+
+  Numbers are read from the kernel headers installed on the system
+  (asm/unistd_64.h) if available. Otherwise a table bundled in the
+  syscall_tables directory is used. Bundled tables exist for x86_64 and
+  aarch64.
+
+  Example running this program:
+
+    python -m sysDef.SyscallTable getpid open
+
+  will print the numbers of getpid and open on the running architecture.
+
+"""
+
+import os
+import platform
+import re
+
+
+# the bundled tables.
+TABLES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "syscall_tables")
+
+# kernel headers defining the system call numbers of each architecture as
+# "#define __NR_<name> <number>" lines.
+HEADERS = {
+    "x86_64": ["/usr/include/asm/unistd_64.h",
+               "/usr/include/x86_64-linux-gnu/asm/unistd_64.h"],
+}
+
+# architecture names as reported by platform.machine() that share a table.
+ARCH_ALIASES = {
+    "amd64": "x86_64",
+    "arm64": "aarch64",
+}
+
+_define_line = re.compile(r"#define\s+__NR_(\w+)\s+(\d+)\s*$")
+
+
+class SyscallTable:
+    """
+    <Purpose>
+      A table of the system call numbers of one architecture.
+
+    <Attributes>
+      self.arch:
+        The architecture the numbers are for, e.g. x86_64.
+
+      self.source:
+        The path of the header or bundled table the numbers were read from.
+
+      self.numbers:
+        A dictionary mapping system call names to numbers.
+
+    """
+
+    def __init__(self, arch, source, numbers):
+        self.arch = arch
+        self.source = source
+        self.numbers = numbers
+
+
+    @classmethod
+    def from_header(cls, path, arch):
+        """
+        Reads a table from a kernel header with "#define __NR_<name> <number>"
+        lines.
+        """
+
+        numbers = {}
+        with open(path) as header:
+            for line in header:
+                match = _define_line.match(line)
+                if match:
+                    numbers[match.group(1)] = int(match.group(2))
+
+        return cls(arch, path, numbers)
+
+
+    @classmethod
+    def from_table_file(cls, path, arch):
+        """
+        Reads a table from a bundled table file with "<name> <number>" lines.
+        """
+
+        numbers = {}
+        with open(path) as table_file:
+            for line in table_file:
+                line = line.strip()
+                if not line or line.startswith("#"):
+                    continue
+                name, number = line.split()
+                numbers[name] = int(number)
+
+        return cls(arch, path, numbers)
+
+
+    @classmethod
+    def load(cls, arch=None):
+        """
+        <Purpose>
+          Loads the system call table of an architecture, preferring the kernel
+          headers installed on the system over the bundled tables.
+
+        <Arguments>
+          arch:
+            The architecture for which to load the table. Defaults to the
+            architecture of the running machine.
+
+        <Exceptions>
+          An Exception is raised if no table is available for arch.
+
+        <Side Effects>
+          None
+
+        <Returns>
+          A SyscallTable object.
+        """
+
+        if arch is None:
+            arch = platform.machine()
+
+        arch = ARCH_ALIASES.get(arch, arch)
+
+        for path in HEADERS.get(arch, []):
+            if os.path.isfile(path):
+                return cls.from_header(path, arch)
+
+        path = os.path.join(TABLES_DIR, arch + ".tbl")
+        if os.path.isfile(path):
+            return cls.from_table_file(path, arch)
+
+        raise Exception("No system call table available for architecture: " + arch)
+
+
+    def number(self, syscall_name):
+        """
+        Returns the number of the given system call or None if the architecture
+        does not have such a system call.
+        """
+
+        return self.numbers.get(syscall_name)
+
+
+    def __contains__(self, syscall_name):
+        return syscall_name in self.numbers
+
+
+    def __len__(self):
+        return len(self.numbers)
+
+
+    def __repr__(self):
+        return "SyscallTable(" + self.arch + ", " + self.source + ")"
+
+
+
+
+
+def main():
+    import sys
+
+    if(len(sys.argv) < 2):
+        print("Usage: python " + sys.argv[0] + " <syscall_name> ...")
+        exit()
+
+    syscall_table = SyscallTable.load()
+    for syscall_name in sys.argv[1:]:
+        print(syscall_name + " " + str(syscall_table.number(syscall_name)))
+
+if __name__ == "__main__":
+    main()
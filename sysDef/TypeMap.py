@@ -0,0 +1,295 @@
+"""
+<Started>
+  October 2026
+
+<Purpose>
+  Map the parameters of syscall definitions to the ctypes types passing them.
+
+  The C types known to the map, and the ctypes types passing them, are read
+  from data files: type_map.txt next to this module and any additional files
+  given, later files overriding earlier ones. See type_map.txt for the format.
+  Structures are mapped to their layouts in StructLayouts.
+
+  A parameter is looked up by the key (type, pointers, unsigned, struct,
+  array, const_pointer, const) in a dictionary that is filled in for all
+  known types when the map is built and for other types the first time they
+  are looked up. Each entry tells what kind of argument the parameter takes
+  (a value, a pointer to a buffer, a path, ...) and its ctypes type.
+
+  Only const char * parameters are passed a path. Other char * parameters are
+  buffers the syscall writes to, e.g. the buf of readlink, and parameters
+  with more than one pointer, e.g. struct iocb **iocbpp, are passed a zeroed
+  buffer, that is NULL pointers.
+
+  Example printing how each parameter of open is passed:
+
+    python -m sysDef.TypeMap "int open(const char *pathname, int flags, mode_t mode);"
+
+"""
+
+import ctypes
+import itertools
+import os
+import sys
+
+from . import StructLayouts
+
+
+DEFAULT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "type_map.txt")
+
+# kinds of arguments.
+VALUE = "value"                    # a number, passed by value.
+POINTER = "pointer"                # a pointer to a buffer holding a number.
+STRING = "string"                  # const char *, passed a path.
+NULL = "null"                      # a pointer that is passed NULL.
+SCRATCH = "scratch"                # void *, char ** and unknown pointers, passed a buffer.
+STRUCT = "struct"                  # a structure, passed by value.
+STRUCT_POINTER = "struct_pointer"  # a pointer to a buffer holding a structure.
+ELLIPSIS = "ellipsis"              # the ... of variadic functions, passed NULL.
+
+# signed ctypes types and their unsigned counterparts.
+UNSIGNED_TYPES = {
+    ctypes.c_char: ctypes.c_ubyte,
+    ctypes.c_byte: ctypes.c_ubyte,
+    ctypes.c_short: ctypes.c_ushort,
+    ctypes.c_int: ctypes.c_uint,
+    ctypes.c_long: ctypes.c_ulong,
+    ctypes.c_longlong: ctypes.c_ulonglong,
+}
+
+# unknown typedefs ending in _t are assumed to be integers no wider than a
+# register.
+DEFAULT_TYPEDEF = ctypes.c_long
+
+
+class TypeMap:
+    """
+    <Purpose>
+      A table mapping syscall parameters to ctypes types.
+
+    <Attributes>
+      self.types:
+        A dictionary of the C types read from the data files and their ctypes
+        types.
+
+    """
+
+    def __init__(self, paths=()):
+        self.types = {}
+
+        # parameter key -> (kind, argtype, element type)
+        self._table = {}
+
+        for path in [DEFAULT_PATH] + list(paths):
+            self.load(path)
+
+        self._precompute()
+
+
+    def load(self, path):
+        """
+        <Purpose>
+          Reads C types and the ctypes types passing them from a data file.
+
+        <Arguments>
+          path:
+            The path of the data file.
+
+        <Exceptions>
+          An Exception is raised if a line does not name a ctypes type.
+
+        <Side Effects>
+          Entries computed before for the types in the file are dropped.
+
+        <Returns>
+          None
+        """
+
+        with open(path) as data_file:
+            for line_number, line in enumerate(data_file, 1):
+                line = line.split("#", 1)[0].strip()
+                if not line:
+                    continue
+
+                parts = line.rsplit(None, 1)
+                ctype = getattr(ctypes, parts[-1], None)
+                if len(parts) != 2 or not isinstance(ctype, type):
+                    raise Exception("Invalid type map line %s:%d: %s" % (path, line_number, line))
+
+                self.types[parts[0]] = ctype
+
+        self._table.clear()
+
+
+    @staticmethod
+    def key(parameter):
+        """
+        Returns the key of a SyscallParameter in the table.
+        """
+
+        return (parameter.type, parameter.pointers, parameter.unsigned,
+                parameter.struct, parameter.array, parameter.const_pointer,
+                parameter.const)
+
+
+    def lookup(self, parameter):
+        """
+        <Purpose>
+          Returns how a parameter is passed.
+
+        <Arguments>
+          parameter:
+            A SyscallParameter.
+
+        <Exceptions>
+          None
+
+        <Side Effects>
+          The entry of the parameter is computed and stored if it was not yet.
+
+        <Returns>
+          A tuple (kind, argtype, element type) where kind is one of the kinds
+          of arguments defined in this module, argtype the ctypes type of the
+          argument and element type the ctypes type of the buffer the argument
+          points to, if any. None if the parameter is not supported.
+        """
+
+        if parameter.ellipsis:
+            return (ELLIPSIS, None, None)
+
+        # function pointers and unions are not keyed.
+        if parameter.function:
+            return (NULL, ctypes.c_void_p, None)
+
+        if parameter.union:
+            return None
+
+        key = self.key(parameter)
+
+        entry = self._table.get(key)
+        if entry is None:
+            entry = self._resolve(key, parameter.enum)
+
+            # unsupported types are not stored, a layout may be registered
+            # for them later.
+            if entry is not None:
+                self._table[key] = entry
+
+        return entry
+
+
+    def return_type(self, ret_type):
+        """
+        Returns the ctypes type of the return value of a definition. ctypes
+        assumes int unless told otherwise, which truncates pointers and longs.
+        """
+
+        ret_type = ret_type.strip()
+
+        if ret_type == "void":
+            return None
+
+        if ret_type.endswith("*"):
+            return ctypes.c_void_p
+
+        unsigned = ret_type.startswith("unsigned ")
+        if unsigned:
+            ret_type = ret_type[len("unsigned "):]
+
+        ctype = self.types.get(ret_type, ctypes.c_int)
+        if unsigned:
+            ctype = UNSIGNED_TYPES.get(ctype, ctype)
+
+        return ctype
+
+
+    def _precompute(self):
+        flags = list(itertools.product((False, True), repeat=3))
+
+        for name in self.types:
+            for pointer, unsigned, array in flags:
+                key = (name, int(pointer), unsigned, False, array, False, False)
+                self._table[key] = self._resolve(key)
+
+        for name in StructLayouts.STRUCT_LAYOUTS:
+            for pointers in (0, 1):
+                key = (name, pointers, False, True, False, False, False)
+                self._table[key] = self._resolve(key)
+
+
+    def _resolve(self, key, enum=False):
+        type_name, pointers, unsigned, struct, array, const_pointer, const = key
+        pointer = pointers > 0
+
+        if type_name == "char":
+            if array:
+                # e.g. char *const argv[]
+                return (NULL, ctypes.c_char_p, None)
+
+            if pointers == 1 and const:
+                return (STRING, ctypes.c_char_p, None)
+
+        if pointers > 1:
+            # e.g. struct iocb **iocbpp, void **pages or char **, a buffer of
+            # NULL pointers the syscall may also write pointers to.
+            return (SCRATCH, ctypes.c_void_p, None)
+
+        if type_name == "char" and pointer:
+            # e.g. char *buf of readlink, written to by the syscall.
+            return (SCRATCH, ctypes.c_void_p, None)
+
+        if type_name == "void":
+            if pointer or array:
+                return (SCRATCH, ctypes.c_void_p, None)
+
+            return None
+
+        layout = StructLayouts.get_layout(type_name)
+        if layout is not None:
+            if pointer or array:
+                return (STRUCT_POINTER, ctypes.POINTER(layout), layout)
+
+            return (STRUCT, layout, layout)
+
+        if struct:
+            return None
+
+        ctype = self.types.get(type_name)
+        if ctype is None:
+            if enum:
+                ctype = ctypes.c_int
+
+            elif type_name and type_name.endswith("_t"):
+                # e.g. sigset_t *, the size of the buffer is unknown.
+                if pointer or array:
+                    return (SCRATCH, ctypes.c_void_p, None)
+
+                ctype = DEFAULT_TYPEDEF
+
+            else:
+                return None
+
+        if unsigned:
+            ctype = UNSIGNED_TYPES.get(ctype, ctype)
+
+        if pointer or array:
+            return (POINTER, ctypes.POINTER(ctype), ctype)
+
+        return (VALUE, ctype, None)
+
+
+
+def main():
+    from .Definition import Definition
+
+    type_map = TypeMap()
+
+    for definition_line in sys.argv[1:]:
+        definition = Definition(definition_line)
+        print(str(definition))
+        print("  returns " + str(type_map.return_type(definition.ret_type)))
+        for parameter in definition.parameters:
+            print("  " + str(parameter) + ": " + str(type_map.lookup(parameter)))
+
+if __name__ == "__main__":
+    main()
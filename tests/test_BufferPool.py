@@ -0,0 +1,26 @@
+import ctypes
+import unittest
+
+from sysDef import BufferPool
+from sysDef import StructLayouts
+
+
+class SlackTest(unittest.TestCase):
+
+    def test_room_for_an_array_of_structures(self):
+        pool = BufferPool.BufferPool()
+        timeval = pool.acquire("timeval")
+
+        # read the structure as an array, as utimes() does with times.
+        times = (StructLayouts.timeval * BufferPool.MIN_ELEMENTS).from_address(
+            ctypes.addressof(timeval))
+        times[1].tv_sec = 1
+
+        # acquiring the buffer again zeroes the slack too.
+        pool.acquire("timeval")
+        self.assertEqual(times[1].tv_sec, 0)
+
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,38 @@
+import unittest
+
+from sysDef import DeclarationParser
+from sysDef.SyscallParameter import SyscallParameter
+
+
+def parse(text):
+    return SyscallParameter.from_declaration(DeclarationParser.parse_parameter(text), text)
+
+
+
+class ArrayQualifierTest(unittest.TestCase):
+
+    def test_nullable_array_size(self):
+        parameter = parse("const struct timeval times[_Nullable 2]")
+        self.assertEqual(parameter.array_size, "2")
+        self.assertEqual(parameter.array_length, 2)
+        self.assertEqual(str(parameter), "const struct timeval times[2]")
+
+    def test_static_array_size(self):
+        parameter = parse("int fds[static 2]")
+        self.assertEqual(parameter.array_size, "2")
+        self.assertEqual(parameter.array_length, 2)
+
+    def test_qualifier_without_size(self):
+        parameter = parse("char *const argv[_Nullable]")
+        self.assertEqual(parameter.array_size, "")
+        self.assertIsNone(parameter.array_length)
+
+    def test_variable_length_array(self):
+        parameter = parse("void buf[.count]")
+        self.assertEqual(parameter.array_size, ".count")
+        self.assertIsNone(parameter.array_length)
+
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,34 @@
+import unittest
+
+from sysDef import DeclarationParser
+from sysDef import TypeMap
+from sysDef.SyscallParameter import SyscallParameter
+
+
+def kind(text):
+    parameter = SyscallParameter.from_declaration(DeclarationParser.parse_parameter(text), text)
+    return TypeMap.TypeMap().lookup(parameter)[0]
+
+
+
+class PointerDepthTest(unittest.TestCase):
+
+    def test_const_char_pointer_is_a_path(self):
+        self.assertEqual(kind("const char *pathname"), TypeMap.STRING)
+
+    def test_char_pointer_is_a_buffer(self):
+        self.assertEqual(kind("char *buf"), TypeMap.SCRATCH)
+
+    def test_pointers_to_pointers_are_buffers(self):
+        for text in ("struct iocb **iocbpp", "struct robust_list_head **head_ptr",
+                     "void **pages", "char **argv", "int **values"):
+            self.assertEqual(kind(text), TypeMap.SCRATCH, text)
+
+    def test_single_pointers(self):
+        self.assertEqual(kind("struct timespec *tp"), TypeMap.STRUCT_POINTER)
+        self.assertEqual(kind("int *status"), TypeMap.POINTER)
+
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,48 @@
+import ctypes
+import os
+import resource
+import unittest
+
+import benchmark_syscall
+import execute_syscall
+
+
+def dup_plan(name):
+    return execute_syscall.CallPlan(name, execute_syscall.LIBC["dup"], [ctypes.c_int],
+                                    ctypes.c_int, [ctypes.c_int(0)])
+
+
+
+class TimeCallPlanTest(unittest.TestCase):
+
+    def test_new_fds_are_closed(self):
+        before = len(os.listdir("/proc/self/fd"))
+        samples, errno, errno_changes = benchmark_syscall.time_call_plan(dup_plan("dup"), 100, 10)
+
+        self.assertEqual(len(os.listdir("/proc/self/fd")), before)
+        self.assertEqual((len(samples), errno, errno_changes), (100, 0, 0))
+
+    def test_errno_changes_are_counted(self):
+        # a plan of a name that is not closed runs out of file descriptors.
+        plan = dup_plan("leaking_dup")
+        limits = resource.getrlimit(resource.RLIMIT_NOFILE)
+        open_fds = set(os.listdir("/proc/self/fd"))
+
+        resource.setrlimit(resource.RLIMIT_NOFILE, (max(map(int, open_fds)) + 3, limits[1]))
+        try:
+            samples, errno, errno_changes = benchmark_syscall.time_call_plan(plan, 10, 0)
+        finally:
+            resource.setrlimit(resource.RLIMIT_NOFILE, limits)
+            for fd in set(os.listdir("/proc/self/fd")) - open_fds:
+                try:
+                    os.close(int(fd))
+                except OSError:
+                    pass
+
+        self.assertEqual(errno, 0)
+        self.assertGreater(errno_changes, 0)
+
+
+
+if __name__ == "__main__":
+    unittest.main()
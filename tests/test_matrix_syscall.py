@@ -0,0 +1,41 @@
+import itertools
+import unittest
+
+import matrix_syscall
+
+
+def covered_pairs(sizes, combinations):
+    return set((i, j, combination[i], combination[j]) for combination in combinations
+               for i, j in itertools.combinations(range(len(sizes)), 2))
+
+
+def all_pairs(sizes):
+    return set((i, j, a, b) for i, j in itertools.combinations(range(len(sizes)), 2)
+               for a in range(sizes[i]) for b in range(sizes[j]))
+
+
+
+class PairwiseIndexesTest(unittest.TestCase):
+
+    def test_every_pair_is_covered(self):
+        for sizes in ([3, 3, 3, 3], [5, 2, 7, 3, 3, 3, 4], [2, 6], [3, 1, 2]):
+            combinations = matrix_syscall.pairwise_indexes(sizes)
+
+            self.assertEqual(covered_pairs(sizes, combinations), all_pairs(sizes))
+            for combination in combinations:
+                self.assertTrue(all(0 <= index < size for index, size in zip(combination, sizes)))
+
+    def test_smaller_than_product(self):
+        sizes = [6, 4, 4, 4, 4, 4, 4]
+        combinations = matrix_syscall.pairwise_indexes(sizes)
+
+        self.assertLess(len(combinations), 50)
+
+    def test_fewer_than_two_lists(self):
+        self.assertEqual(matrix_syscall.pairwise_indexes([3]), [(0,), (1,), (2,)])
+        self.assertEqual(matrix_syscall.pairwise_indexes([]), [()])
+
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,47 @@
+import os
+import unittest
+
+import execute_syscall
+import stress_syscall
+
+
+DATABASE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                        "syscall_definitions.sdb")
+
+
+class MixTest(unittest.TestCase):
+
+    def test_plans_do_not_share_buffers(self):
+        # clock_gettime writing the time into the timespec nanosleep sleeps
+        # for stalled every thread.
+        mix = stress_syscall.parse_mix(["clock_gettime", "nanosleep"])
+        syscall_definitions = execute_syscall.load_syscall_definitions(DATABASE, list(mix))
+        plans, weights, skipped = stress_syscall.compile_mix(syscall_definitions, mix)
+        self.assertEqual(sorted(plan.name for plan in plans), ["clock_gettime", "nanosleep"])
+
+        total, intervals, totals, _ = stress_syscall.stress(plans, weights, threads=2,
+                                                            duration=0.5, interval=0.25,
+                                                            seed=1)
+
+        self.assertEqual(sum(interval.stalled for interval in intervals), 0)
+        self.assertGreater(totals["clock_gettime"][0], 0)
+        self.assertGreater(totals["nanosleep"][0], 0)
+
+
+    def test_new_fds_are_closed(self):
+        mix = stress_syscall.parse_mix(["dup", "pipe"])
+        syscall_definitions = execute_syscall.load_syscall_definitions(DATABASE, list(mix))
+        plans, weights, skipped = stress_syscall.compile_mix(syscall_definitions, mix)
+
+        before = len(os.listdir("/proc/self/fd"))
+        total, intervals, totals, _ = stress_syscall.stress(plans, weights, threads=2,
+                                                            duration=0.3, interval=0.3,
+                                                            seed=1)
+
+        self.assertEqual(total.errors, 0)
+        self.assertEqual(len(os.listdir("/proc/self/fd")), before)
+
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,57 @@
+import unittest
+
+import trace_syscall
+from execute_syscall import TRACE_SENTINEL_BASE
+
+
+class Definition:
+
+    def __init__(self, name):
+        self.name = name
+        self.definition = "int %s(void)" % name
+
+
+
+def sentinel(index):
+    return "close(-%d) = -1 EBADF (Bad file descriptor)" % (TRACE_SENTINEL_BASE + index)
+
+
+
+class CorrelatorTest(unittest.TestCase):
+
+    def test_lines_are_correlated_per_pid(self):
+        correlator = trace_syscall.TraceCorrelator([Definition("getpid"), Definition("sync")])
+
+        lines = [
+            "execve(\"/usr/bin/python\", ...) = 0",
+            sentinel(0),
+            "getpid() = 100",
+            "[pid 200] " + sentinel(1),
+            "getpid() = 100",
+            "[pid 200] sync() = 0",
+        ]
+        finished = [correlator.feed(line) for line in lines]
+        self.assertEqual(finished, [None] * len(lines))
+        self.assertEqual(correlator.preamble_lines, 1)
+
+        records = correlator.finish()
+        self.assertEqual([(record["pid"], record["name"]) for record in records],
+                         [(None, "getpid"), (200, "sync")])
+        self.assertEqual(records[0]["syscalls"], {"getpid": 2})
+        self.assertEqual(records[1]["syscalls"], {"sync": 1})
+
+    def test_pid_at_the_start_of_lines(self):
+        correlator = trace_syscall.TraceCorrelator([Definition("getpid"), Definition("sync")])
+
+        correlator.feed("100 " + sentinel(0))
+        correlator.feed("200 " + sentinel(1))
+        correlator.feed("100 getpid() = 100")
+
+        record = correlator.feed("100 " + sentinel(1))
+        self.assertEqual((record["pid"], record["index"]), (100, 0))
+        self.assertEqual(record["syscalls"], {"getpid": 1})
+
+
+
+if __name__ == "__main__":
+    unittest.main()
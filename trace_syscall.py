@@ -0,0 +1,288 @@
+"""
+<Started>
+  October 2026
+
+<Purpose>
+  Execute syscalls under strace and write a structured, per-syscall report of
+  what was traced.
+
+  The syscalls are executed by a child process started under strace. Before
+  each syscall the child executes a sentinel: a close() on a negative file
+  descriptor that encodes the index of the syscall (see
+  execute_syscall.TRACE_SENTINEL). strace writes its output to a pipe which is
+  read while the child runs. Every traced line after a sentinel belongs to the
+  syscall the sentinel announced, until the next sentinel of the same process.
+  strace follows forks, so lines are told apart by the pid they are prefixed
+  with and correlated per process. The child does not execute syscalls that
+  fork (see FORKING_SYSCALLS), whose children would continue the run and
+  interleave their sentinels with those of the child.
+
+  The report has one JSON object per line, one per executed syscall, and is
+  written as the trace is read so that long runs never hold the whole trace in
+  memory.
+
+  Example running this program:
+
+    python trace_syscall.py syscall_definitions.sdb open close -o report.jsonl
+
+"""
+
+import argparse
+import collections
+import json
+import os
+import re
+import shutil
+import subprocess
+import sys
+
+import execute_syscall
+
+
+# traced lines kept per syscall. Longer traces are counted but not stored.
+DEFAULT_MAX_LINES = 100
+
+# syscalls the traced child does not execute, in addition to those skipped by
+# execute_syscall, because the child they create would continue the run.
+FORKING_SYSCALLS = ["fork"]
+
+# "1234 close(-1000005) = -1 EBADF (Bad file descriptor)". The pid is there
+# when following forks, at the start of the line when writing to a file and as
+# "[pid 1234]" for processes other than the first one otherwise.
+_pid_prefix = re.compile(r"^(?:(\d+)\s+)?(?:\[pid\s+(\d+)\]\s+)?")
+_traced_call = re.compile(r"(\w+)\(")
+_sentinel_call = re.compile(r"close\(-(\d+)\)")
+
+
+class TraceCorrelator:
+    """
+    <Purpose>
+      Matches strace output lines to the syscalls that produced them using the
+      sentinels executed before each syscall.
+
+    <Attributes>
+      self.syscall_definitions:
+        The SyscallManual objects, in the order they were executed. Sentinels
+        carry indexes into this list.
+
+      self.max_lines:
+        The number of traced lines stored per syscall.
+
+      self.preamble_lines:
+        The number of lines traced by a process before its first sentinel,
+        e.g. during interpreter startup.
+
+    """
+
+    def __init__(self, syscall_definitions, max_lines=DEFAULT_MAX_LINES):
+        self.syscall_definitions = syscall_definitions
+        self.max_lines = max_lines
+        self.preamble_lines = 0
+
+        # pid -> the record of the syscall the process is executing. The pid
+        # is None for lines without one.
+        self._records = {}
+
+
+    def feed(self, line):
+        """
+        <Purpose>
+          Processes one line of strace output.
+
+        <Arguments>
+          line:
+            The line of strace output.
+
+        <Exceptions>
+          None
+
+        <Side Effects>
+          None
+
+        <Returns>
+          The record of the previous syscall if the line is a sentinel starting
+          a new one, None otherwise.
+        """
+
+        line = line.rstrip("\n")
+
+        prefix = _pid_prefix.match(line)
+        pid = prefix.group(2) or prefix.group(1)
+        if pid is not None:
+            pid = int(pid)
+
+        match = _sentinel_call.match(line, prefix.end())
+        if match and int(match.group(1)) >= execute_syscall.TRACE_SENTINEL_BASE:
+            index = int(match.group(1)) - execute_syscall.TRACE_SENTINEL_BASE
+            finished = self._records.get(pid)
+            self._records[pid] = self._new_record(index, pid)
+            return finished
+
+        record = self._records.get(pid)
+        if record is None:
+            self.preamble_lines += 1
+            return None
+
+        record["line_count"] += 1
+        if len(record["lines"]) < self.max_lines:
+            record["lines"].append(line)
+
+        match = _traced_call.match(line, prefix.end())
+        if match:
+            record["syscalls"][match.group(1)] += 1
+
+        return None
+
+
+    def finish(self):
+        """
+        Returns the records of the last syscall of each process, once the
+        trace ended, in the order of their indexes.
+        """
+
+        finished = sorted(self._records.values(), key=lambda record: record["index"])
+        self._records = {}
+        return finished
+
+
+    def _new_record(self, index, pid):
+        sd = self.syscall_definitions[index]
+        return {
+            "index": index,
+            "pid": pid,
+            "name": sd.name,
+            "definition": str(sd.definition),
+            "line_count": 0,
+            "lines": [],
+            # traced syscall name -> number of times traced.
+            "syscalls": collections.Counter(),
+        }
+
+
+
+def trace(database, syscall_names, report_file, strace="strace", strace_args=(),
+          max_lines=DEFAULT_MAX_LINES):
+    """
+    <Purpose>
+      Executes syscalls under strace and writes a report of the traced lines of
+      each syscall.
+
+    <Arguments>
+      database:
+        The definition database or pickle file to read syscall definitions
+        from.
+
+      syscall_names:
+        The names of the syscalls to execute, or None for all.
+
+      report_file:
+        A file object to write the report to, one JSON object per line.
+
+      strace:
+        The strace executable.
+
+      strace_args:
+        Additional arguments to pass to strace.
+
+      max_lines:
+        The number of traced lines stored per syscall.
+
+    <Exceptions>
+      An Exception is raised if strace cannot be found or fails.
+
+    <Side Effects>
+      The syscalls are executed in a child process.
+
+    <Returns>
+      The number of syscalls reported.
+    """
+
+    strace_path = shutil.which(strace)
+    if strace_path is None:
+        raise Exception("Could not find strace executable: " + strace)
+
+    # the child loads the same definitions, so sentinel indexes refer to the
+    # same list.
+    syscall_definitions = execute_syscall.load_syscall_definitions(database, syscall_names)
+    correlator = TraceCorrelator(syscall_definitions, max_lines)
+
+    trace_read, trace_write = os.pipe()
+
+    command = [strace_path, "-f", "-qq", "-o", "/dev/fd/%d" % trace_write]
+    command += list(strace_args)
+    command += [sys.executable, os.path.abspath(__file__), "--traced-child", database]
+    command += syscall_names or []
+
+    child = subprocess.Popen(command, pass_fds=(trace_write,))
+    os.close(trace_write)
+
+    reported = 0
+    with os.fdopen(trace_read, "r", errors="replace") as trace_output:
+        for line in trace_output:
+            record = correlator.feed(line)
+            if record is not None:
+                _write_record(report_file, record)
+                reported += 1
+
+    for record in correlator.finish():
+        _write_record(report_file, record)
+        reported += 1
+
+    if child.wait() != 0:
+        raise Exception("Traced run failed with exit status " + str(child.returncode))
+
+    return reported
+
+
+def _write_record(report_file, record):
+    report_file.write(json.dumps(record) + "\n")
+
+
+def _run_traced_child(database, syscall_names):
+    """
+    The run traced by strace: executes the syscalls with sentinels.
+    """
+
+    execute_syscall.TRACE_SENTINEL = True
+    execute_syscall.SKIP_SYSCALLS = execute_syscall.SKIP_SYSCALLS + FORKING_SYSCALLS
+    execute_syscall.init()
+
+    syscall_definitions = execute_syscall.load_syscall_definitions(database, syscall_names)
+    execute_syscall.execute_syscalls(syscall_definitions)
+
+
+def main():
+    if len(sys.argv) > 2 and sys.argv[1] == "--traced-child":
+        _run_traced_child(sys.argv[2], sys.argv[3:] or None)
+        return
+
+    parser = argparse.ArgumentParser(
+        description="Execute syscalls under strace and report what each one traced.")
+    parser.add_argument("database",
+                        help="definition database or pickle file to read syscall definitions from")
+    parser.add_argument("syscalls", nargs="*",
+                        help="names of the syscalls to execute (default: all)")
+    parser.add_argument("-o", "--output", metavar="FILE",
+                        help="write the report to FILE instead of stdout")
+    parser.add_argument("--strace", default="strace",
+                        help="strace executable to use")
+    parser.add_argument("--strace-arg", action="append", default=[],
+                        help="additional argument to pass to strace (repeatable)")
+    parser.add_argument("--max-lines", type=int, default=DEFAULT_MAX_LINES,
+                        help="traced lines stored per syscall")
+    args = parser.parse_intermixed_args()
+
+    if args.output:
+        report_file = open(args.output, "w")
+    else:
+        report_file = sys.stdout
+
+    try:
+        trace(args.database, args.syscalls or None, report_file, args.strace,
+              args.strace_arg, args.max_lines)
+    finally:
+        if args.output:
+            report_file.close()
+
+if __name__ == "__main__":
+    main()